@@ -7,6 +7,11 @@ from real elevation data.
 
 from .point_map import TopomapGenerator, create_gradient_scaling
 from .ridge_map import RidgeMap, FontManager
+from .ridges import RidgeSet
+from .tile_store import MemmapTileStore
+from .pipeline import RenderPipeline
+from .gpx import GPXTrack, read_gpx
 
 __version__ = "2.0.0"
-__all__ = ["TopomapGenerator", "create_gradient_scaling", "RidgeMap", "FontManager"]
+__all__ = ["TopomapGenerator", "create_gradient_scaling", "RidgeMap", "FontManager",
+           "RidgeSet", "MemmapTileStore", "RenderPipeline", "GPXTrack", "read_gpx"]
@@ -0,0 +1,322 @@
+"""
+Persistent On-Disk Caches
+
+Content-addressed caches for expensive intermediate results (sampled
+elevation matrices and parsed GPX tracks), stored as
+NumPy files in the user cache directory and evicted least-recently-used
+first once they grow past a size budget.
+"""
+
+import hashlib
+import json
+import os
+import threading
+from typing import Dict, Optional
+
+import numpy as np
+
+from .elevation import SAMPLER_VERSION
+from .gpx import READER_VERSION, GPXTrack
+from .tile_store import DEFAULT_CACHE_DIR
+
+
+def tile_source_id(tiles) -> str:
+    """
+    Identify a tile source for elevation cache keys.
+
+    Args:
+        tiles: Tile source; a ``source_id`` attribute, if any, is used as is
+
+    Returns:
+        The source_id, or the class name and tile directory of the source
+    """
+    source_id = getattr(tiles, "source_id", None)
+    if source_id is not None:
+        return str(source_id)
+    kind = type(tiles)
+    return f"{kind.__module__}.{kind.__qualname__}:{getattr(tiles, 'tile_dir', '')}"
+
+
+class DiskCache:
+    """
+    Size-bounded directory of cache files with hit/miss counters.
+
+    Entries are addressed by the SHA-256 of their key parameters. Reading an
+    entry refreshes its modification time, which drives LRU eviction.
+    """
+
+    suffix = ".bin"
+
+    def __init__(self, cache_dir: str, max_bytes: int = 512 * 1024 ** 2):
+        """
+        Initialize the cache.
+
+        Args:
+            cache_dir: Directory holding the cache files
+            max_bytes: Total size above which the oldest entries are evicted
+        """
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        os.makedirs(cache_dir, exist_ok=True)
+
+    @staticmethod
+    def make_key(**params) -> str:
+        """
+        Hash key parameters into a stable cache key.
+
+        Args:
+            **params: JSON-serializable parameters identifying the entry
+
+        Returns:
+            Hex digest usable as a file name
+        """
+        payload = json.dumps(params, sort_keys=True, default=repr)
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def path_for(self, key: str) -> str:
+        """Path of the file storing an entry."""
+        return os.path.join(self.cache_dir, key + self.suffix)
+
+    def _lookup(self, key: str) -> Optional[str]:
+        """Return the entry path and count a hit, or count a miss."""
+        path = self.path_for(key)
+        if os.path.exists(path):
+            self.hits += 1
+            try:
+                os.utime(path)
+            except OSError:
+                pass
+            return path
+        self.misses += 1
+        return None
+
+    def _tmp_path(self, key: str) -> str:
+        """Temporary path to write an entry before renaming it into place."""
+        return f"{self.path_for(key)}.{os.getpid()}.{threading.get_ident()}.tmp{self.suffix}"
+
+    def evict(self) -> int:
+        """
+        Delete least-recently-used entries until the cache fits max_bytes.
+
+        Returns:
+            Number of entries removed
+        """
+        entries = []
+        for name in os.listdir(self.cache_dir):
+            if not name.endswith(self.suffix) or ".tmp" in name:
+                continue
+            path = os.path.join(self.cache_dir, name)
+            try:
+                stat = os.stat(path)
+            except OSError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, path))
+
+        total = sum(size for _, size, _ in entries)
+        removed = 0
+        for _, size, path in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            try:
+                os.remove(path)
+            except OSError:
+                continue
+            total -= size
+            removed += 1
+        return removed
+
+    def clear(self) -> None:
+        """Remove every entry and reset the counters."""
+        for name in os.listdir(self.cache_dir):
+            if name.endswith(self.suffix):
+                os.remove(os.path.join(self.cache_dir, name))
+        self.hits = 0
+        self.misses = 0
+
+    def stats(self) -> Dict[str, int]:
+        """
+        Get cache usage counters.
+
+        Returns:
+            Dictionary with hits, misses, entries and total size in bytes
+        """
+        sizes = [
+            os.path.getsize(os.path.join(self.cache_dir, name))
+            for name in os.listdir(self.cache_dir)
+            if name.endswith(self.suffix) and ".tmp" not in name
+        ]
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "entries": len(sizes),
+            "bytes": sum(sizes),
+        }
+
+
+class ElevationCache(DiskCache):
+    """
+    Cache of sampled elevation matrices stored as .npy files.
+
+    Cached matrices are loaded memory-mapped (copy-on-write), so a hit costs
+    little more than opening the file.
+    """
+
+    suffix = ".npy"
+
+    def __init__(self, cache_dir: Optional[str] = None,
+                 max_bytes: int = 512 * 1024 ** 2):
+        """
+        Initialize the cache.
+
+        Args:
+            cache_dir: Directory holding the .npy files (defaults to the
+                ``elevation`` folder of the rmclogo cache directory)
+            max_bytes: Total size above which the oldest entries are evicted
+        """
+        super().__init__(cache_dir or os.path.join(DEFAULT_CACHE_DIR, "elevation"),
+                         max_bytes)
+
+    def key(self, lat_min: float, lat_max: float,
+            lon_min: float, lon_max: float,
+            shape: tuple, source: str = "") -> str:
+        """
+        Build the key of an elevation matrix.
+
+        Args:
+            lat_min, lat_max: Latitude bounds
+            lon_min, lon_max: Longitude bounds
+            shape: (rows, cols) of the sampled grid
+            source: Identity of the tile source sampled, see tile_source_id()
+
+        Returns:
+            Cache key
+        """
+        return self.make_key(
+            bounds=[round(float(v), 9) for v in (lat_min, lat_max, lon_min, lon_max)],
+            shape=[int(n) for n in shape],
+            sampler=SAMPLER_VERSION,
+            source=source,
+        )
+
+    def get(self, key: str) -> Optional[np.ndarray]:
+        """
+        Load a cached matrix.
+
+        Args:
+            key: Cache key
+
+        Returns:
+            Memory-mapped matrix, or None on a miss
+        """
+        path = self._lookup(key)
+        if path is None:
+            return None
+        try:
+            return np.load(path, mmap_mode="c")
+        except (OSError, ValueError):
+            # Corrupted entry: drop it and treat as a miss
+            self.hits -= 1
+            self.misses += 1
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+            return None
+
+    def put(self, key: str, matrix: np.ndarray) -> None:
+        """
+        Store a matrix and evict old entries if over budget.
+
+        Args:
+            key: Cache key
+            matrix: Elevation matrix to store
+        """
+        tmp_path = self._tmp_path(key)
+        np.save(tmp_path, np.ascontiguousarray(matrix))
+        os.replace(tmp_path, self.path_for(key))
+        self.evict()
+
+
+class GPXCache(DiskCache):
+    """
+    Cache of parsed GPX tracks stored as compressed .npz files.
+
+    Entries are keyed by the file's path, modification time and content
+    hash, so an edited or replaced file is parsed again.
+    """
+
+    suffix = ".npz"
+
+    def __init__(self, cache_dir: Optional[str] = None,
+                 max_bytes: int = 64 * 1024 ** 2):
+        """
+        Initialize the cache.
+
+        Args:
+            cache_dir: Directory holding the .npz files (defaults to the
+                ``gpx`` folder of the rmclogo cache directory)
+            max_bytes: Total size above which the oldest entries are evicted
+        """
+        super().__init__(cache_dir or os.path.join(DEFAULT_CACHE_DIR, "gpx"), max_bytes)
+
+    def key(self, gpx_file: str) -> str:
+        """
+        Build the key of a GPX file.
+
+        Args:
+            gpx_file: Path to the GPX file
+
+        Returns:
+            Cache key
+        """
+        digest = hashlib.sha256()
+        with open(gpx_file, "rb") as f:
+            for block in iter(lambda: f.read(1 << 20), b""):
+                digest.update(block)
+        return self.make_key(
+            path=os.path.abspath(gpx_file),
+            mtime=os.stat(gpx_file).st_mtime_ns,
+            sha256=digest.hexdigest(),
+            reader=READER_VERSION,
+        )
+
+    def get(self, key: str) -> Optional[GPXTrack]:
+        """
+        Load a cached track.
+
+        Args:
+            key: Cache key
+
+        Returns:
+            GPXTrack, or None on a miss
+        """
+        path = self._lookup(key)
+        if path is None:
+            return None
+        try:
+            with np.load(path) as data:
+                return GPXTrack(*(data[name] for name in GPXTrack._fields))
+        except (OSError, ValueError, KeyError):
+            # Corrupted entry: drop it and treat as a miss
+            self.hits -= 1
+            self.misses += 1
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+            return None
+
+    def put(self, key: str, track: GPXTrack) -> None:
+        """
+        Store a track and evict old entries if over budget.
+
+        Args:
+            key: Cache key
+            track: Parsed track to store
+        """
+        tmp_path = self._tmp_path(key)
+        np.savez_compressed(tmp_path, **track._asdict())
+        os.replace(tmp_path, self.path_for(key))
+        self.evict()
@@ -0,0 +1,424 @@
+"""
+Vectorized Elevation Sampling
+
+Samples SRTM tiles for whole coordinate arrays at once, replacing the
+per-point ``get_elevation`` calls of ``srtm.py`` with NumPy gathers against
+the decoded tile arrays.
+"""
+
+import math
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+from scipy.ndimage import gaussian_filter
+
+
+# Bump whenever sampling results change, so cached matrices are invalidated
+SAMPLER_VERSION = 1
+
+# srtm.py reports anything outside this range (e.g. the -32768 void marker)
+# as missing data, so the vectorized samplers do the same.
+MIN_VALID_ELEVATION = -1000
+MAX_VALID_ELEVATION = 10000
+
+
+def decode_hgt(data: bytes) -> np.ndarray:
+    """
+    Decode the raw contents of an .hgt file into a 2D array.
+
+    Args:
+        data: Raw (unzipped) .hgt bytes, big-endian int16 samples
+
+    Returns:
+        Square int16 array view of the data, row 0 being the northern edge
+    """
+    side = int(round(math.sqrt(len(data) / 2)))
+    if side * side * 2 != len(data):
+        raise ValueError(f"Invalid .hgt size: {len(data)} bytes")
+    return np.frombuffer(data, dtype='>i2').reshape(side, side)
+
+
+class SRTMTileSource:
+    """
+    Exposes the tiles of an ``srtm.py`` data handler as NumPy arrays.
+
+    Tiles are decoded lazily and shared with the handler's own in-memory
+    copy, so no elevation data is duplicated. This is the non-memmap
+    alternative to MemmapTileStore, for ``tile_store=`` when tiles should
+    not be written to the disk cache; each instance holds its own copies.
+    """
+
+    def __init__(self, data_handler):
+        """
+        Initialize the tile source.
+
+        Args:
+            data_handler: Object returned by ``srtm.get_data()``
+        """
+        self.data_handler = data_handler
+        self._tiles: Dict[Tuple[int, int], Optional[np.ndarray]] = {}
+
+    def get_tile(self, tile_lat: int, tile_lon: int) -> Optional[np.ndarray]:
+        """
+        Get the tile whose south-west corner is at (tile_lat, tile_lon).
+
+        Args:
+            tile_lat, tile_lon: Integer coordinates of the tile corner
+
+        Returns:
+            Square elevation array, or None if no tile covers this area
+        """
+        key = (tile_lat, tile_lon)
+        if key in self._tiles:
+            return self._tiles[key]
+
+        try:
+            geo_file = self.data_handler.get_file(tile_lat + 0.5, tile_lon + 0.5)
+        except Exception:
+            # Download errors are not cached so the next call retries
+            return None
+
+        tile = decode_hgt(geo_file.data) if geo_file is not None else None
+        self._tiles[key] = tile
+        return tile
+
+
+def _tile_rows(lats: np.ndarray, tile_lat: int, side: int) -> np.ndarray:
+    """Row indices of latitudes inside a tile (same rounding as srtm.py)."""
+    rows = np.floor((tile_lat + 1 - lats) * (side - 1)).astype(np.intp)
+    return np.clip(rows, 0, side - 1)
+
+
+def _tile_cols(lons: np.ndarray, tile_lon: int, side: int) -> np.ndarray:
+    """Column indices of longitudes inside a tile (same rounding as srtm.py)."""
+    cols = np.floor((lons - tile_lon) * (side - 1)).astype(np.intp)
+    return np.clip(cols, 0, side - 1)
+
+
+def _mask_invalid(values: np.ndarray) -> np.ndarray:
+    """Replace out-of-range samples with NaN in place."""
+    values[(values < MIN_VALID_ELEVATION) | (values > MAX_VALID_ELEVATION)] = np.nan
+    return values
+
+
+def sample_grid(tiles, lats: np.ndarray, lons: np.ndarray) -> np.ndarray:
+    """
+    Sample elevations on the regular grid spanned by lats × lons.
+
+    Each (tile row band, tile column band) pair is filled with a single
+    fancy-indexing gather, so the cost is a handful of NumPy calls whatever
+    the grid size.
+
+    Args:
+        tiles: Tile source providing ``get_tile(tile_lat, tile_lon)``
+        lats: 1D array of latitudes (one per output row)
+        lons: 1D array of longitudes (one per output column)
+
+    Returns:
+        2D float array of shape (len(lats), len(lons)), NaN where no data
+    """
+    lats = np.asarray(lats, dtype=float)
+    lons = np.asarray(lons, dtype=float)
+    elevation = np.full((lats.size, lons.size), np.nan)
+
+    lat_tiles = np.floor(lats).astype(int)
+    lon_tiles = np.floor(lons).astype(int)
+
+    for tile_lat in np.unique(lat_tiles):
+        row_sel = np.flatnonzero(lat_tiles == tile_lat)
+        for tile_lon in np.unique(lon_tiles):
+            col_sel = np.flatnonzero(lon_tiles == tile_lon)
+            tile = tiles.get_tile(int(tile_lat), int(tile_lon))
+            if tile is None:
+                continue
+
+            side = tile.shape[0]
+            rows = _tile_rows(lats[row_sel], tile_lat, side)
+            cols = _tile_cols(lons[col_sel], tile_lon, side)
+            elevation[np.ix_(row_sel, col_sel)] = tile[np.ix_(rows, cols)]
+
+    return _mask_invalid(elevation)
+
+
+def sample_points(tiles, lats: np.ndarray, lons: np.ndarray) -> np.ndarray:
+    """
+    Sample elevations at arbitrary (lat, lon) points.
+
+    Args:
+        tiles: Tile source providing ``get_tile(tile_lat, tile_lon)``
+        lats: Array of latitudes
+        lons: Array of longitudes (broadcast against lats)
+
+    Returns:
+        Float array with the broadcast shape of lats and lons, NaN where no data
+    """
+    lats, lons = np.broadcast_arrays(np.asarray(lats, dtype=float),
+                                     np.asarray(lons, dtype=float))
+    flat_lats = lats.ravel()
+    flat_lons = lons.ravel()
+    elevation = np.full(flat_lats.size, np.nan)
+
+    tile_keys = np.stack([np.floor(flat_lats), np.floor(flat_lons)], axis=1).astype(int)
+    unique_keys, inverse = np.unique(tile_keys, axis=0, return_inverse=True)
+    inverse = inverse.ravel()
+
+    for key_idx, (tile_lat, tile_lon) in enumerate(unique_keys):
+        tile = tiles.get_tile(int(tile_lat), int(tile_lon))
+        if tile is None:
+            continue
+
+        sel = np.flatnonzero(inverse == key_idx)
+        side = tile.shape[0]
+        rows = _tile_rows(flat_lats[sel], tile_lat, side)
+        cols = _tile_cols(flat_lons[sel], tile_lon, side)
+        elevation[sel] = tile[rows, cols]
+
+    return _mask_invalid(elevation).reshape(lats.shape)
+
+
+def _upsample(values: np.ndarray, at: np.ndarray, size: int, axis: int) -> np.ndarray:
+    """Linearly interpolate samples taken at indices ``at`` to every index along an axis."""
+    if len(at) < 2:
+        return np.repeat(values, size, axis=axis)
+    index = np.arange(size)
+    k = np.clip(np.searchsorted(at, index, side="right") - 1, 0, len(at) - 2)
+    weight = (index - at[k]) / (at[k + 1] - at[k])
+    shape = [1, 1]
+    shape[axis] = size
+    weight = weight.reshape(shape)
+    return (np.take(values, k, axis=axis) * (1 - weight)
+            + np.take(values, k + 1, axis=axis) * weight)
+
+
+def sample_corridor(tiles, lats: np.ndarray, lons: np.ndarray, mask: np.ndarray,
+                    coarse_step: int = 8) -> np.ndarray:
+    """
+    Sample a grid at full resolution only where a mask is set.
+
+    Every ``coarse_step``-th row and column is sampled everywhere and
+    interpolated linearly in between; the cells of the mask are then
+    sampled individually, so the samples taken grow with the masked area
+    rather than with the whole grid.
+
+    Args:
+        tiles: Tile source providing ``get_tile(tile_lat, tile_lon)``
+        lats: 1D array of latitudes (one per output row)
+        lons: 1D array of longitudes (one per output column)
+        mask: Boolean (len(lats), len(lons)) array of full-resolution cells
+        coarse_step: Spacing of the coarse grid in rows and columns
+
+    Returns:
+        2D float array of shape (len(lats), len(lons)), NaN where no data
+    """
+    lats = np.asarray(lats, dtype=float)
+    lons = np.asarray(lons, dtype=float)
+    rows = np.unique(np.append(np.arange(0, lats.size, coarse_step), lats.size - 1))
+    cols = np.unique(np.append(np.arange(0, lons.size, coarse_step), lons.size - 1))
+
+    coarse = sample_grid(tiles, lats[rows], lons[cols])
+    elevation = _upsample(_upsample(coarse, rows, lats.size, 0), cols, lons.size, 1)
+
+    fine_rows, fine_cols = np.nonzero(mask)
+    elevation[fine_rows, fine_cols] = sample_points(tiles, lats[fine_rows], lons[fine_cols])
+    return elevation
+
+
+def plan_grid_shape(lat_min: float, lat_max: float,
+                    lon_min: float, lon_max: float,
+                    width_px: int, height_px: int,
+                    resolution: Optional[int] = None) -> Tuple[int, int]:
+    """
+    Choose an aspect-correct sample grid for an output of a given pixel size.
+
+    The area is fitted into the output like an image, giving about one
+    sample per output pixel along the limiting axis and rows/columns in the
+    ground aspect ratio of the bounds.
+
+    Args:
+        lat_min, lat_max: Latitude bounds
+        lon_min, lon_max: Longitude bounds
+        width_px, height_px: Output size in pixels
+        resolution: Optional cap on the longest side of the grid
+
+    Returns:
+        (rows, cols) of the sample grid
+    """
+    mean_lat = np.radians((lat_min + lat_max) / 2)
+    ground_height = abs(lat_max - lat_min)
+    ground_width = abs(lon_max - lon_min) * np.cos(mean_lat)
+
+    samples_per_unit = min(width_px / ground_width, height_px / ground_height)
+    if resolution is not None:
+        samples_per_unit = min(samples_per_unit,
+                               resolution / max(ground_width, ground_height))
+
+    rows = max(int(round(ground_height * samples_per_unit)), 2)
+    cols = max(int(round(ground_width * samples_per_unit)), 2)
+    return rows, cols
+
+
+def line_row_indices(num_lines: int, height: int) -> np.ndarray:
+    """
+    Rows of an elevation grid that are drawn as ridge lines.
+
+    Args:
+        num_lines: Number of horizontal lines
+        height: Number of rows in the elevation grid
+
+    Returns:
+        Integer array of row indices, one per line
+    """
+    return ((np.arange(num_lines) / num_lines) * (height - 1)).astype(np.intp)
+
+
+def row_bands(rows: np.ndarray, halo: int, height: int) -> List[Tuple[int, int]]:
+    """
+    Merge rows and their halos into contiguous [start, stop) bands.
+
+    Args:
+        rows: Row indices that are needed
+        halo: Number of extra rows needed on each side of a row
+        height: Number of rows in the full grid
+
+    Returns:
+        Sorted list of non-overlapping (start, stop) bands
+    """
+    bands: List[Tuple[int, int]] = []
+    for row in np.unique(rows):
+        start = max(int(row) - halo, 0)
+        stop = min(int(row) + halo + 1, height)
+        if bands and start <= bands[-1][1]:
+            bands[-1] = (bands[-1][0], max(bands[-1][1], stop))
+        else:
+            bands.append((start, stop))
+    return bands
+
+
+class RowBandElevation:
+    """
+    Lazily sampled elevation grid that only fetches the rows it is asked for.
+
+    Stands in for a full elevation matrix in the ridge line renderers, which
+    only read ``num_lines`` rows. Each requested row is sampled together with
+    a halo of neighbouring rows wide enough for Gaussian smoothing to give
+    the same result as smoothing the full grid. With a cache, the sampled
+    bands are stored under their own key, so re-styling skips sampling.
+    """
+
+    def __init__(self, tiles, lats: np.ndarray, lons: np.ndarray,
+                 cache=None, cache_key: str = ""):
+        """
+        Initialize the lazy grid.
+
+        Args:
+            tiles: Tile source providing ``get_tile(tile_lat, tile_lon)``
+            lats: 1D array of latitudes (one per grid row)
+            lons: 1D array of longitudes (one per grid column)
+            cache: Optional ElevationCache storing the sampled bands
+            cache_key: Key of the full grid, which band keys are derived from
+        """
+        self.tiles = tiles
+        self.lats = np.asarray(lats, dtype=float)
+        self.lons = np.asarray(lons, dtype=float)
+        self.shape = (self.lats.size, self.lons.size)
+        self.cache = cache
+        self.cache_key = cache_key
+        self.samples_fetched = 0
+
+    def _sample_bands(self, bands: List[Tuple[int, int]]) -> List[np.ndarray]:
+        """Sample row bands, through the cache if there is one."""
+        key = None
+        if self.cache is not None:
+            key = self.cache.make_key(grid=self.cache_key, bands=[list(b) for b in bands])
+            cached = self.cache.get(key)
+            if cached is not None:
+                heights = [stop - start for start, stop in bands]
+                return np.split(np.array(cached), np.cumsum(heights)[:-1])
+
+        blocks = [sample_grid(self.tiles, self.lats[start:stop], self.lons)
+                  for start, stop in bands]
+        self.samples_fetched += sum(block.size for block in blocks)
+        if key is not None:
+            self.cache.put(key, np.concatenate(blocks))
+        return blocks
+
+    def smoothed_rows(self, rows: np.ndarray, sigma: float = 0.0,
+                      truncate: float = 4.0) -> Tuple[np.ndarray, float, float]:
+        """
+        Sample, NaN-fill and smooth the requested rows.
+
+        Missing values are filled with the mean of the sampled data, as
+        ``get_elevation_matrix`` does for the full grid.
+
+        Args:
+            rows: Row indices to return
+            sigma: Gaussian smoothing parameter (0 disables smoothing)
+            truncate: Kernel radius in standard deviations (as in scipy)
+
+        Returns:
+            Tuple of (values for the requested rows, min, max), where min and
+            max are taken over every sampled row, halos included
+        """
+        rows = np.asarray(rows, dtype=np.intp)
+        halo = int(truncate * sigma + 0.5) if sigma > 0 else 0
+        bands = row_bands(rows, halo, self.shape[0])
+
+        blocks = self._sample_bands(bands)
+
+        valid_mean = np.nanmean(np.concatenate([block.ravel() for block in blocks]))
+        fill_value = valid_mean if not np.isnan(valid_mean) else 0
+        for block in blocks:
+            block[np.isnan(block)] = fill_value
+
+        if sigma > 0:
+            blocks = [gaussian_filter(block, sigma=sigma, truncate=truncate)
+                      for block in blocks]
+
+        values = np.empty((rows.size, self.shape[1]))
+        for (start, stop), block in zip(bands, blocks):
+            in_band = (rows >= start) & (rows < stop)
+            values[in_band] = block[rows[in_band] - start]
+
+        elevation_min = min(float(block.min()) for block in blocks)
+        elevation_max = max(float(block.max()) for block in blocks)
+        return values, elevation_min, elevation_max
+
+
+def rotated_lattice(shape: Tuple[int, int], angle: float,
+                    reshape: bool = True) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Source coordinates of an image rotated like ``scipy.ndimage.rotate``.
+
+    For each pixel of the rotated output, gives the fractional (row, col)
+    position it is read from in the unrotated grid, so the rotated image can
+    be sampled directly instead of being resampled after the fact.
+
+    Args:
+        shape: (rows, cols) of the unrotated grid
+        angle: Rotation angle in degrees
+        reshape: Grow the output so the whole rotated grid fits in it
+
+    Returns:
+        Tuple of (rows, cols, inside) arrays with the output shape, where
+        inside flags the pixels that fall within the unrotated grid
+    """
+    theta = np.radians(angle)
+    c, s = np.cos(theta), np.sin(theta)
+    rot_matrix = np.array([[c, s], [-s, c]])
+
+    in_shape = np.asarray(shape)
+    if reshape:
+        corners = rot_matrix @ [[0, 0, in_shape[0], in_shape[0]],
+                                [0, in_shape[1], 0, in_shape[1]]]
+        out_shape = (np.ptp(corners, axis=1) + 0.5).astype(int)
+    else:
+        out_shape = in_shape
+
+    offset = (in_shape - 1) / 2 - rot_matrix @ ((out_shape - 1) / 2)
+    out_rows, out_cols = np.indices(tuple(out_shape), dtype=float)
+    rows = rot_matrix[0, 0] * out_rows + rot_matrix[0, 1] * out_cols + offset[0]
+    cols = rot_matrix[1, 0] * out_rows + rot_matrix[1, 1] * out_cols + offset[1]
+
+    inside = ((rows > -0.5) & (rows < in_shape[0] - 0.5)
+              & (cols > -0.5) & (cols < in_shape[1] - 0.5))
+    return rows, cols, inside
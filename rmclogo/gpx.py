@@ -0,0 +1,321 @@
+"""
+Streaming GPX Reader
+
+Parses GPX track points with ``xml.etree.ElementTree.iterparse`` straight
+into growing float64 arrays, clearing every element once it is read, so no
+per-point Python objects outlive the parse. Files the fast reader cannot
+handle (malformed XML, timestamps with UTC offsets, no track points found)
+fall back to gpxpy.
+"""
+
+from typing import IO, List, NamedTuple, Tuple, Union
+from xml.etree.ElementTree import ParseError, iterparse
+
+import gpxpy
+import numpy as np
+
+
+# Bump whenever parsing results change, so cached tracks are invalidated
+READER_VERSION = 2
+
+# Initial capacity of the point buffers, doubled whenever they fill up
+INITIAL_CAPACITY = 4096
+
+# Track samples binned per pass when accumulating a density grid
+DENSITY_CHUNK = 1 << 20
+
+
+class GPXTrack(NamedTuple):
+    """
+    Track points of a GPX file as flat arrays.
+
+    Points of segment i are ``lat[offsets[i]:offsets[i + 1]]`` (and likewise
+    for lon, ele, time), in file order across all tracks. Missing
+    elevations and timestamps are NaN; times are seconds since the epoch (UTC).
+    """
+    lat: np.ndarray
+    lon: np.ndarray
+    ele: np.ndarray
+    time: np.ndarray
+    offsets: np.ndarray
+
+    def __len__(self) -> int:
+        return len(self.lat)
+
+    def segment(self, i: int) -> np.ndarray:
+        """(n, 2) array of the (lat, lon) points of segment i."""
+        lo, hi = self.offsets[i], self.offsets[i + 1]
+        return np.column_stack([self.lat[lo:hi], self.lon[lo:hi]])
+
+
+def _parse_times(text: np.ndarray) -> np.ndarray:
+    """Convert ISO 8601 UTC timestamps ('' when missing) to epoch seconds."""
+    seconds = np.full(len(text), np.nan)
+    present = text != ""
+    if present.any():
+        stamps = np.char.rstrip(text[present], "Z")
+        if np.any(np.char.find(stamps, "+") >= 0) or np.any(np.char.count(stamps, "-") > 2):
+            raise ValueError("GPX timestamps with UTC offsets")
+        seconds[present] = stamps.astype("datetime64[ms]").astype(np.int64) / 1000.0
+    return seconds
+
+
+def _read_fast(source: Union[str, IO]) -> GPXTrack:
+    """Parse track points with iterparse into preallocated arrays."""
+    capacity = INITIAL_CAPACITY
+    values = np.full((3, capacity), np.nan)
+    times = np.zeros(capacity, dtype="U32")
+    offsets = [0]
+    n = 0
+
+    # Tags are compared by local name, whatever namespace declared them
+    for _, elem in iterparse(source, events=("end",)):
+        tag = elem.tag.rpartition("}")[2]
+        if tag == "trkpt":
+            if n == capacity:
+                capacity *= 2
+                values = np.concatenate([values, np.full_like(values, np.nan)], axis=1)
+                times = np.concatenate([times, np.zeros_like(times)])
+            values[0, n] = float(elem.get("lat"))
+            values[1, n] = float(elem.get("lon"))
+            for child in elem:
+                child_tag = child.tag.rpartition("}")[2]
+                if child_tag == "ele" and child.text:
+                    values[2, n] = float(child.text)
+                elif child_tag == "time" and child.text:
+                    times[n] = child.text.strip()
+            n += 1
+            elem.clear()
+        elif tag == "trkseg":
+            if n > offsets[-1]:
+                offsets.append(n)
+            elem.clear()
+
+    lat, lon, ele = values[:, :n]
+    return GPXTrack(lat, lon, ele, _parse_times(times[:n]),
+                    np.array(offsets, dtype=np.int64))
+
+
+def _read_gpxpy(source: Union[str, IO]) -> GPXTrack:
+    """Parse a GPX file through gpxpy's object model."""
+    if isinstance(source, str):
+        with open(source, "r") as f:
+            gpx = gpxpy.parse(f)
+    else:
+        gpx = gpxpy.parse(source)
+
+    columns = ([], [], [], [])
+    offsets = [0]
+    for track in gpx.tracks:
+        for segment in track.segments:
+            for point in segment.points:
+                columns[0].append(point.latitude)
+                columns[1].append(point.longitude)
+                columns[2].append(np.nan if point.elevation is None else point.elevation)
+                columns[3].append(np.nan if point.time is None else point.time.timestamp())
+            if len(columns[0]) > offsets[-1]:
+                offsets.append(len(columns[0]))
+
+    lat, lon, ele, time = (np.array(c, dtype=np.float64) for c in columns)
+    return GPXTrack(lat, lon, ele, time, np.array(offsets, dtype=np.int64))
+
+
+def read_gpx(source: Union[str, IO], fast: bool = True) -> GPXTrack:
+    """
+    Read the track points of a GPX file.
+
+    Args:
+        source: Path to a GPX file, or an open binary file object
+        fast: Use the streaming parser, falling back to gpxpy for files it
+            cannot handle or finds no points in; False always parses with gpxpy
+
+    Returns:
+        GPXTrack of flat float64 arrays
+    """
+    if fast:
+        start = None if isinstance(source, str) else source.tell()
+        try:
+            track = _read_fast(source)
+            if len(track):
+                return track
+        except (ParseError, ValueError):
+            pass
+        if start is not None:
+            source.seek(start)
+    return _read_gpxpy(source)
+
+
+def clip_track(x: np.ndarray, y: np.ndarray, offsets: np.ndarray,
+               x_range: Tuple[float, float],
+               y_range: Tuple[float, float]) -> List[np.ndarray]:
+    """
+    Clip a projected track to a rectangle, splitting it into visible runs.
+
+    Every step between consecutive points of a segment is clipped at once
+    with the Liang–Barsky parameters; steps leaving the rectangle end a run
+    at the boundary, and steps entering it start a new one there, so the
+    track is never joined across the outside of the rectangle.
+
+    Args:
+        x, y: Projected point coordinates
+        offsets: Segment offsets, as in GPXTrack
+        x_range: (x_min, x_max) of the rectangle
+        y_range: (y_min, y_max) of the rectangle
+
+    Returns:
+        List of (n, 2) point arrays, one per visible run
+    """
+    x = np.asarray(x, dtype=float)
+    y = np.asarray(y, dtype=float)
+    if len(x) < 2:
+        return []
+
+    # Steps between consecutive points, skipping those across segments
+    start = np.ones(len(x) - 1, dtype=bool)
+    start[offsets[(offsets > 0) & (offsets < len(x))] - 1] = False
+    i = np.flatnonzero(start)
+    x0, y0 = x[i], y[i]
+    dx, dy = x[i + 1] - x0, y[i + 1] - y0
+
+    # Entry (t0) and exit (t1) parameters of every step, against the four
+    # edges as p * t <= q
+    t0 = np.zeros(len(i))
+    t1 = np.ones(len(i))
+    visible = np.ones(len(i), dtype=bool)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        for p, q in ((-dx, x0 - x_range[0]), (dx, x_range[1] - x0),
+                     (-dy, y0 - y_range[0]), (dy, y_range[1] - y0)):
+            t = q / p
+            visible &= (p != 0) | (q >= 0)
+            t0 = np.where(p < 0, np.maximum(t0, t), t0)
+            t1 = np.where(p > 0, np.minimum(t1, t), t1)
+    visible &= t0 < t1
+    i, x0, y0, dx, dy, t0, t1 = (a[visible] for a in (i, x0, y0, dx, dy, t0, t1))
+    if len(i) == 0:
+        return []
+
+    # A step continues the previous run only if it directly follows it
+    # and neither is clipped where they meet
+    follows = np.concatenate([[False], (i[1:] == i[:-1] + 1) & (t1[:-1] == 1) & (t0[1:] == 0)])
+    new_run = ~follows
+
+    # Each step adds its (clipped) end point; a run's first step also adds
+    # its (clipped) start point
+    position = np.cumsum(1 + new_run) - 1
+    points = np.empty((position[-1] + 1, 2))
+    points[position] = np.column_stack([x0 + t1 * dx, y0 + t1 * dy])
+    first = position[new_run] - 1
+    points[first] = np.column_stack([x0 + t0 * dx, y0 + t0 * dy])[new_run]
+    return np.split(points, first[1:])
+
+
+def simplify_track(runs: List[np.ndarray], tolerance: float) -> List[np.ndarray]:
+    """
+    Ramer-Douglas-Peucker simplification of every run of a track at once.
+
+    Unlike the ridge simplifier, distances are measured to the chord
+    segment rather than to its line, so spurs doubling back along the
+    chord and closed loops (whose chord has zero length) are kept. All
+    runs are refined together, one subdivision level per pass.
+
+    Args:
+        runs: (n, 2) point arrays, e.g. from clip_track()
+        tolerance: Largest allowed distance between a dropped point and the
+            simplified run, in the units of the points
+
+    Returns:
+        Simplified runs, each keeping its first and last point
+    """
+    if tolerance <= 0 or not runs:
+        return runs
+    points = np.concatenate(runs)
+    lengths = np.array([len(run) for run in runs])
+    stop = np.cumsum(lengths)
+
+    keep = np.zeros(len(points), dtype=bool)
+    keep[stop - lengths] = True
+    keep[stop - 1] = True
+
+    # Open intervals (lo, hi) whose interior points are still undecided
+    lo, hi = stop - lengths, stop - 1
+    while len(lo):
+        interior = hi - lo - 1
+        pending = interior > 0
+        lo, hi, interior = lo[pending], hi[pending], interior[pending]
+        if not len(lo):
+            break
+
+        interval = np.repeat(np.arange(len(lo)), interior)
+        starts_at = np.cumsum(interior) - interior
+        index = lo[interval] + 1 + np.arange(interval.size) - starts_at[interval]
+
+        # Distance of every interior point to its interval's chord segment
+        p0 = points[lo][interval]
+        chord = (points[hi] - points[lo])[interval]
+        offset = points[index] - p0
+        length2 = np.einsum("ij,ij->i", chord, chord)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            t = np.where(length2 > 0, np.einsum("ij,ij->i", offset, chord) / length2, 0.0)
+        t = np.clip(t, 0.0, 1.0)
+        dist = np.hypot(*(offset - t[:, None] * chord).T)
+
+        # Split every interval at its farthest point if that is out of tolerance
+        farthest = np.maximum.reduceat(dist, starts_at)
+        first = np.flatnonzero(dist == farthest[interval])
+        first = first[np.concatenate([[True], interval[first][1:] != interval[first][:-1]])]
+        split_at = index[first]
+
+        split = farthest > tolerance
+        lo, hi, split_at = lo[split], hi[split], split_at[split]
+        keep[split_at] = True
+        lo, hi = np.concatenate([lo, split_at]), np.concatenate([split_at, hi])
+
+    return np.split(points[keep], np.cumsum(np.add.reduceat(keep, stop - lengths))[:-1])
+
+
+def accumulate_density(counts: np.ndarray, runs: List[np.ndarray],
+                       chunk_size: int = DENSITY_CHUNK) -> np.ndarray:
+    """
+    Add the cells crossed by track runs to a density grid, in place.
+
+    Runs are sampled at most one cell apart and every sample adds one to
+    the cell it falls in, so a cell counts roughly the length of track
+    through it. Samples are binned with ``np.bincount`` a chunk at a
+    time, so memory is bounded by the grid, not by the number of points.
+
+    Args:
+        counts: C-contiguous (rows, cols) grid; cell (r, c) covers
+            x in [c, c + 1) and y in [r, r + 1)
+        runs: (n, 2) point arrays in grid units, e.g. from clip_track()
+        chunk_size: Samples binned per pass
+
+    Returns:
+        counts
+    """
+    if not runs:
+        return counts
+    rows, cols = counts.shape
+    flat = counts.reshape(-1)
+
+    def add(points):
+        col = np.clip(np.floor(points[:, 0]).astype(np.intp), 0, cols - 1)
+        row = np.clip(np.floor(points[:, 1]).astype(np.intp), 0, rows - 1)
+        flat[:] += np.bincount(row * cols + col, minlength=rows * cols)
+
+    # Each step adds its start and the samples up to its end; the last
+    # point of every run is added on its own
+    p0 = np.concatenate([run[:-1] for run in runs])
+    delta = np.concatenate([run[1:] for run in runs]) - p0
+    steps = np.maximum(np.ceil(np.hypot(delta[:, 0], delta[:, 1])).astype(np.intp), 1)
+    ends = np.cumsum(steps)
+    bounds = np.concatenate([[0], np.searchsorted(ends, np.arange(chunk_size, ends[-1], chunk_size)),
+                             [len(steps)]])
+    for lo, hi in zip(bounds[:-1], bounds[1:]):
+        if hi == lo:
+            continue
+        n = steps[lo:hi]
+        step = np.repeat(np.arange(lo, hi), n)
+        t = (np.arange(step.size) - np.repeat(np.cumsum(n) - n, n)) / steps[step]
+        add(p0[step] + t[:, None] * delta[step])
+    add(np.array([run[-1] for run in runs]))
+    return counts
@@ -0,0 +1,199 @@
+"""
+Staged Render Pipeline
+
+Memoized counterpart of ``TopomapGenerator.generate()`` for workflows that
+re-render the same area while tweaking parameters. Rendering is split into
+explicit stages (fetch → process → ridges → render → encode) and each stage's result
+is cached under a key made of exactly the parameters it consumes plus the
+key of the stage it depends on, so only the stages downstream of a changed
+parameter are rerun.
+"""
+
+import os
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, List, Optional, Tuple, Union
+
+import matplotlib.pyplot as plt
+import numpy as np
+
+from .point_map import ProcessedElevation, TopomapGenerator
+
+
+STAGES = ('fetch', 'process', 'ridges', 'render', 'encode')
+
+# Stages keeping fewer results than max_entries: rendered figures and canvases
+# hold full-size buffers, so only the latest one is kept for re-encoding
+STAGE_LIMITS = {'render': 1}
+
+# Parameters consumed by the process stage; everything else left in the
+# keyword arguments is a rendering parameter
+PROCESS_PARAMS = ('smoothing', 'sigma')
+
+
+def _freeze(value: Any) -> Hashable:
+    """Turn lists, arrays and dicts into hashable tuples for stage keys."""
+    if isinstance(value, dict):
+        return tuple(sorted((k, _freeze(v)) for k, v in value.items()))
+    if isinstance(value, (list, tuple, np.ndarray)):
+        return tuple(_freeze(v) for v in value)
+    return value
+
+
+class RenderPipeline:
+    """
+    Runs generate()-style renders with per-stage memoization.
+
+    Example:
+        pipeline = RenderPipeline(TopomapGenerator())
+        pipeline.run(43.29, 5.37, size_km=15, line_color='white')
+        pipeline.run(43.29, 5.37, size_km=15, line_color='gold')   # render only
+        pipeline.run(43.29, 5.37, size_km=15, sigma=3.0)            # process onwards
+    """
+
+    def __init__(self, generator: Optional[TopomapGenerator] = None,
+                 max_entries: int = 4):
+        """
+        Initialize the pipeline.
+
+        Args:
+            generator: Generator doing the actual work (created if None)
+            max_entries: Number of results kept per stage (the render stage
+                keeps only its latest figure)
+        """
+        self.generator = generator if generator is not None else TopomapGenerator()
+        self.max_entries = max_entries
+        self._memo: Dict[str, "OrderedDict[Hashable, Any]"] = {
+            stage: OrderedDict() for stage in STAGES
+        }
+        # Key of the render or encode result last written to each output path
+        self._written: Dict[str, Hashable] = {}
+        self.runs = {stage: 0 for stage in STAGES}
+
+    def _stage(self, stage: str, key: Hashable, compute):
+        """Return the memoized result of a stage, computing it on a miss."""
+        memo = self._memo[stage]
+        if key in memo:
+            memo.move_to_end(key)
+            return memo[key]
+
+        result = compute()
+        self.runs[stage] += 1
+        memo[key] = result
+        while len(memo) > min(self.max_entries, STAGE_LIMITS.get(stage, self.max_entries)):
+            _, evicted = memo.popitem(last=False)
+            if isinstance(evicted, plt.Figure):
+                plt.close(evicted)
+        return result
+
+    def _is_stale(self, output_path: str, key: Hashable) -> bool:
+        """Whether output_path is missing or was last written by another result."""
+        return not os.path.exists(output_path) or self._written.get(output_path) != key
+
+    def clear(self) -> None:
+        """Drop every memoized result and reset the run counters."""
+        for memo in self._memo.values():
+            for result in memo.values():
+                if isinstance(result, plt.Figure):
+                    plt.close(result)
+            memo.clear()
+        self._written.clear()
+        self.runs = {stage: 0 for stage in STAGES}
+
+    def run(self, latitude: Optional[float] = None, longitude: Optional[float] = None,
+            size_km: float = 10,
+            resolution: Union[int, Tuple[int, int], str] = 100,
+            num_lines: int = 80,
+            exaggeration: float = 3.0,
+            scaling_factors: Optional[List[float]] = None,
+            output_filename: str = "topomap.png",
+            title: Optional[str] = None,
+            format: str = 'png',
+            backend: str = 'matplotlib',
+            **kwargs) -> str:
+        """
+        Render like TopomapGenerator.generate(), reusing unchanged stages.
+
+        Args:
+            Same as TopomapGenerator.generate(); ``sigma`` sets the smoothing
+            strength
+
+        Returns:
+            Path to saved file
+        """
+        gen = self.generator
+        format = format.lower()
+        line_mode = format != 'halftone'
+        row_band = kwargs.pop('row_band', True)
+        smoothing = kwargs.get('smoothing', True)
+        sigma = kwargs.get('sigma', 1.5)
+        output_path = os.path.join(gen.output_dir, output_filename)
+
+        # Fetch: keyed on the area and the planned grid, not the raw size params
+        bounds = gen._resolve_bounds(latitude, longitude, size_km, **kwargs)
+        grid = gen.plan_grid(*bounds, resolution, format, **kwargs)
+        corridor = kwargs.get('gpx_file') and kwargs.get('gpx_corridor_km')
+        fetch_key = (_freeze(bounds), grid, line_mode and row_band,
+                     (kwargs['gpx_file'], kwargs['gpx_corridor_km'],
+                      kwargs.get('gpx_coarse_step', 8)) if corridor else None)
+        elevation_data = self._stage(
+            'fetch', fetch_key,
+            lambda: gen._fetch_elevation(bounds, grid, format, row_band, **kwargs)
+        )
+
+        # Process: smoothing and normalization (of the drawn rows for ridge lines)
+        process_key = (fetch_key, num_lines if line_mode else None, smoothing, sigma)
+
+        def process():
+            if line_mode:
+                normalized, raw = gen._line_rows(elevation_data, num_lines, smoothing, sigma)
+            else:
+                normalized, raw, _, _ = gen.process_elevation_data(elevation_data, smoothing, sigma)
+            return ProcessedElevation(normalized, raw, tuple(elevation_data.shape))
+
+        processed = self._stage('process', process_key, process)
+
+        # Ridges: line geometry shared by the PNG and SVG renderers
+        if line_mode:
+            skip_zero = kwargs.get('skip_zero_elevation', True)
+            ridges_key = (process_key, num_lines, exaggeration,
+                          _freeze(scaling_factors), skip_zero)
+            processed = self._stage(
+                'ridges', ridges_key,
+                lambda: gen.build_ridges(processed, num_lines, exaggeration,
+                                         scaling_factors, skip_zero_elevation=skip_zero)
+            )
+
+        # Render: every remaining style parameter; dpi only matters when encoding,
+        # except for the raster backend that draws at the final pixel size,
+        # halftone SVG output, laid out in pixels, and the simplify tolerances
+        # of ridge lines and GPX tracks, given in output pixels
+        writes_svg = gen._writes_svg(format, output_path)
+        pixel_sized = (backend == 'raster' or writes_svg or bool(kwargs.get('gpx_file'))
+                       or (line_mode and kwargs.get('simplify', 0.25) > 0))
+        style = {k: v for k, v in kwargs.items()
+                 if k not in PROCESS_PARAMS and (k != 'dpi' or pixel_sized)}
+        render_key = (process_key, format, backend, num_lines, exaggeration,
+                      _freeze(scaling_factors), title, _freeze(style),
+                      output_path if writes_svg else None)
+        if writes_svg and self._is_stale(output_path, render_key):
+            self._memo['render'].pop(render_key, None)
+        fig = self._stage(
+            'render', render_key,
+            lambda: gen._render(processed, bounds, output_path, num_lines, exaggeration,
+                                scaling_factors, title, format, backend, **kwargs)
+        )
+        if writes_svg:
+            self._written[output_path] = render_key
+
+        # Encode: SVG is written by the render stage
+        if fig is not None:
+            dpi = kwargs.get('dpi', 300)
+            encode_key = (render_key, output_path, dpi)
+            if self._is_stale(output_path, encode_key):
+                self._memo['encode'].pop(encode_key, None)
+            self._stage('encode', encode_key,
+                        lambda: gen._save_figure(fig, output_path, dpi) or output_path)
+            self._written[output_path] = encode_key
+
+        print(f"\n✅ Topographic art saved to: {output_path}\n")
+        return output_path
@@ -7,15 +7,46 @@ with support for PNG and SVG output, custom scaling, and advanced styling.
 
 import numpy as np
 import matplotlib.pyplot as plt
+from matplotlib.collections import LineCollection, PathCollection
+from matplotlib.colors import LogNorm
 from matplotlib.path import Path
 import matplotlib.patches as patches
-import srtm
 import os
-from scipy.ndimage import gaussian_filter
-import svgwrite
-import gpxpy
-import gpxpy.gpx
-from typing import Optional, Tuple, List
+from concurrent.futures import ProcessPoolExecutor
+from itertools import repeat
+from scipy.ndimage import distance_transform_edt, gaussian_filter
+from typing import IO, NamedTuple, Optional, Sequence, Tuple, List, Union
+
+from .cache import ElevationCache, GPXCache, tile_source_id
+from .elevation import (RowBandElevation, line_row_indices, plan_grid_shape, sample_corridor,
+                        sample_grid)
+from .gpx import GPXTrack, accumulate_density, clip_track, read_gpx, simplify_track
+from .raster import DOT_LEVELS, RasterCanvas, figure_layout, quantize_radii, rgba, save_png
+from .ridges import (RidgeSet, fill_polygons, find_runs, horizon_clip, line_segments,
+                     simplify_runs)
+from .svg import SVGWriter
+from .tile_store import get_default_tile_store
+
+
+class ProcessedElevation(NamedTuple):
+    """
+    Smoothed and normalized elevation data, reusable across renders.
+    
+    Holds either the full grid or only the rows drawn as ridge lines; shape
+    is always the shape of the full grid the data comes from.
+    """
+    normalized: np.ndarray
+    raw: np.ndarray
+    shape: Tuple[int, int]
+
+
+# Keyword arguments of generate() consumed by the GPX overlay
+GPX_PARAMS = ['gpx_file', 'gpx_color', 'gpx_width', 'gpx_style', 'gpx_alpha', 'gpx_zorder',
+              'gpx_simplify', 'gpx_files', 'gpx_cmap', 'gpx_heatmap_shape', 'gpx_processes',
+              'gpx_margin_km', 'gpx_corridor_km', 'gpx_coarse_step']
+
+# The subset the SVG writers draw (as a single <path>)
+SVG_GPX_PARAMS = ['gpx_file', 'gpx_color', 'gpx_width', 'gpx_alpha', 'gpx_simplify']
 
 
 class TopomapGenerator:
@@ -29,22 +60,31 @@ class TopomapGenerator:
     - High-resolution output support
     """
     
-    def __init__(self, output_dir: str = "output", cache_data: bool = True):
+    def __init__(self, output_dir: str = "output", cache_data: bool = True,
+                 tile_store=None):
         """
         Initialize the generator.
         
         Args:
             output_dir: Directory to save output files
-            cache_data: Whether to cache downloaded elevation data
+            cache_data: Whether to cache sampled elevation matrices and
+                parsed GPX tracks on disk
+            tile_store: Tile source used for sampling (defaults to the shared
+                memory-mapped tile store; SRTMTileSource reads an srtm.py
+                handler's in-memory tiles instead)
         """
         self.output_dir = output_dir
         os.makedirs(output_dir, exist_ok=True)
-        self.elevation_data_handler = srtm.get_data()
+        self.tile_source = tile_store if tile_store is not None else get_default_tile_store()
         self.cache_data = cache_data
+        self.elevation_cache = ElevationCache() if cache_data else None
+        self.gpx_cache = GPXCache() if cache_data else None
         
     def get_elevation_matrix(self, lat_min: float, lat_max: float, 
                             lon_min: float, lon_max: float, 
-                            resolution: int = 100) -> np.ndarray:
+                            resolution: int = 100,
+                            rows: Optional[int] = None,
+                            cols: Optional[int] = None) -> np.ndarray:
         """
         Fetch elevation data for the specified bounds.
         
@@ -52,37 +92,127 @@ class TopomapGenerator:
             lat_min, lat_max: Latitude bounds
             lon_min, lon_max: Longitude bounds
             resolution: Number of sample points per dimension
+            rows: Number of latitude samples (overrides resolution)
+            cols: Number of longitude samples (overrides resolution)
             
         Returns:
             2D numpy array of elevation values in meters
         """
+        rows = rows or resolution
+        cols = cols or resolution
         print(f"Fetching elevation data...")
         print(f"Bounds: lat [{lat_min:.4f}, {lat_max:.4f}], lon [{lon_min:.4f}, {lon_max:.4f}]")
         
-        lats = np.linspace(lat_min, lat_max, resolution)
-        lons = np.linspace(lon_min, lon_max, resolution)
+        cache_key = None
+        if self.elevation_cache is not None:
+            cache_key = self.elevation_cache.key(lat_min, lat_max, lon_min, lon_max,
+                                                 (rows, cols), tile_source_id(self.tile_source))
+            cached = self.elevation_cache.get(cache_key)
+            if cached is not None:
+                print(f"Loaded elevation data from cache: {cached.shape}")
+                return cached
+        
+        lats = np.linspace(lat_min, lat_max, rows)
+        lons = np.linspace(lon_min, lon_max, cols)
         
-        elevation_matrix = np.zeros((resolution, resolution))
+        # One vectorized gather per SRTM tile instead of one call per point
+        elevation_matrix = self._fill_missing(sample_grid(self.tile_source, lats, lons))
+        
+        print(f"Elevation data shape: {elevation_matrix.shape}")
+        print(f"Elevation range: {np.nanmin(elevation_matrix):.1f}m to {np.nanmax(elevation_matrix):.1f}m")
         
-        for i, lat in enumerate(lats):
-            for j, lon in enumerate(lons):
-                try:
-                    elev = self.elevation_data_handler.get_elevation(lat, lon)
-                    elevation_matrix[i, j] = elev if elev is not None else np.nan
-                except:
-                    elevation_matrix[i, j] = np.nan
+        if cache_key is not None:
+            self.elevation_cache.put(cache_key, elevation_matrix)
         
-        # Fill nan values with mean of valid data
+        return elevation_matrix
+    
+    @staticmethod
+    def _fill_missing(elevation_matrix: np.ndarray) -> np.ndarray:
+        """Fill nan values with the mean of the valid data (0 if there is none)."""
         mask = np.isnan(elevation_matrix)
         if mask.any():
             valid_mean = np.nanmean(elevation_matrix)
             elevation_matrix[mask] = valid_mean if not np.isnan(valid_mean) else 0
+        return elevation_matrix
+    
+    def get_elevation_corridor(self, lat_min: float, lat_max: float,
+                               lon_min: float, lon_max: float,
+                               rows: int, cols: int,
+                               gpx_file: str,
+                               corridor_km: float = 2.0,
+                               coarse_step: int = 8) -> np.ndarray:
+        """
+        Fetch elevation at full resolution only in a corridor around a GPX track.
         
-        print(f"Elevation data shape: {elevation_matrix.shape}")
-        print(f"Elevation range: {np.nanmin(elevation_matrix):.1f}m to {np.nanmax(elevation_matrix):.1f}m")
+        Cells farther than corridor_km from the track are interpolated from
+        a grid coarse_step times sparser, so a long linear route costs
+        about as many samples as the area around it.
         
+        Args:
+            lat_min, lat_max: Latitude bounds
+            lon_min, lon_max: Longitude bounds
+            rows, cols: Shape of the sample grid
+            gpx_file: Path to GPX file
+            corridor_km: Half-width of the full-resolution corridor
+            coarse_step: Spacing of the coarse grid in samples
+            
+        Returns:
+            2D numpy array of elevation values in meters
+        """
+        print(f"Fetching elevation data (corridor of {corridor_km} km around the track)...")
+        lats = np.linspace(lat_min, lat_max, rows)
+        lons = np.linspace(lon_min, lon_max, cols)
+        
+        mask = self.corridor_mask(gpx_file, (lat_min, lat_max, lon_min, lon_max),
+                                  (rows, cols), corridor_km)
+        elevation_matrix = self._fill_missing(
+            sample_corridor(self.tile_source, lats, lons, mask, coarse_step)
+        )
+        
+        print(f"Elevation data shape: {elevation_matrix.shape} "
+              f"({mask.mean():.0%} at full resolution)")
         return elevation_matrix
     
+    def get_elevation_rows(self, lat_min: float, lat_max: float,
+                           lon_min: float, lon_max: float,
+                           resolution: int = 100,
+                           rows: Optional[int] = None,
+                           cols: Optional[int] = None):
+        """
+        Prepare row-band elevation data for the ridge line renderers.
+        
+        Nothing is sampled until ``create_png`` or ``create_svg`` asks for the
+        rows they draw, so the cost scales with num_lines × resolution rather
+        than resolution². A full matrix already in the cache is returned as is;
+        otherwise the sampled row bands are cached on their own.
+        
+        Args:
+            lat_min, lat_max: Latitude bounds
+            lon_min, lon_max: Longitude bounds
+            resolution: Number of sample points per dimension
+            rows: Number of latitude samples (overrides resolution)
+            cols: Number of longitude samples (overrides resolution)
+            
+        Returns:
+            RowBandElevation, or a cached 2D numpy array
+        """
+        rows = rows or resolution
+        cols = cols or resolution
+        print(f"Preparing row-band elevation data...")
+        cache_key = ""
+        if self.elevation_cache is not None:
+            cache_key = self.elevation_cache.key(lat_min, lat_max, lon_min, lon_max,
+                                                 (rows, cols), tile_source_id(self.tile_source))
+            cached = self.elevation_cache.get(cache_key)
+            if cached is not None:
+                print(f"Loaded elevation data from cache: {cached.shape}")
+                return cached
+        
+        print(f"Bounds: lat [{lat_min:.4f}, {lat_max:.4f}], lon [{lon_min:.4f}, {lon_max:.4f}]")
+        lats = np.linspace(lat_min, lat_max, rows)
+        lons = np.linspace(lon_min, lon_max, cols)
+        return RowBandElevation(self.tile_source, lats, lons, self.elevation_cache, cache_key)
+    
     def process_elevation_data(self, elevation_data: np.ndarray, 
                               smoothing: bool = True,
                               sigma: float = 1.5) -> Tuple[np.ndarray, np.ndarray, float, float]:
@@ -112,6 +242,78 @@ class TopomapGenerator:
         
         return elevation_normalized, raw_smoothed, elevation_min, elevation_max
     
+    def _line_rows(self, elevation_data, num_lines: int,
+                   smoothing: bool = True,
+                   sigma: float = 1.5) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Get the processed elevation rows drawn as ridge lines.
+        
+        Args:
+            elevation_data: 2D elevation array, RowBandElevation or
+                ProcessedElevation
+            num_lines: Number of horizontal lines
+            smoothing: Apply Gaussian smoothing
+            sigma: Smoothing parameter
+            
+        Returns:
+            Tuple of (normalized_rows, raw_smoothed_rows), one row per line
+        """
+        rows = line_row_indices(num_lines, elevation_data.shape[0])
+        
+        if isinstance(elevation_data, ProcessedElevation):
+            if elevation_data.normalized.shape == tuple(elevation_data.shape):
+                return elevation_data.normalized[rows], elevation_data.raw[rows]
+            if len(elevation_data.normalized) != num_lines:
+                raise ValueError(f"Processed rows ({len(elevation_data.normalized)}) "
+                                 f"must match num_lines ({num_lines})")
+            return elevation_data.normalized, elevation_data.raw
+        
+        if isinstance(elevation_data, RowBandElevation):
+            raw_rows, elevation_min, elevation_max = elevation_data.smoothed_rows(
+                rows, sigma if smoothing else 0.0
+            )
+            elevation_range = elevation_max - elevation_min
+            if elevation_range == 0:
+                elevation_range = 1
+            return (raw_rows - elevation_min) / elevation_range, raw_rows
+        
+        elevation_normalized, raw_elevation, _, _ = self.process_elevation_data(
+            elevation_data, smoothing, sigma
+        )
+        return elevation_normalized[rows], raw_elevation[rows]
+    
+    def build_ridges(self, elevation_data, num_lines: int = 80,
+                     exaggeration: float = 3.0,
+                     scaling_factors: Optional[List[float]] = None,
+                     smoothing: bool = True,
+                     sigma: float = 1.5,
+                     skip_zero_elevation: bool = True) -> RidgeSet:
+        """
+        Compute the ridge lines of a render once, for any line backend.
+        
+        Args:
+            elevation_data: 2D elevation array, RowBandElevation,
+                ProcessedElevation or an existing RidgeSet (returned as is)
+            num_lines: Number of horizontal lines
+            exaggeration: Vertical exaggeration factor
+            scaling_factors: Optional per-line scaling factors
+            smoothing: Apply smoothing
+            sigma: Smoothing parameter
+            skip_zero_elevation: Drop segments where elevation <= 0 (e.g., sea)
+            
+        Returns:
+            RidgeSet
+        """
+        if isinstance(elevation_data, RidgeSet):
+            if elevation_data.num_lines != num_lines:
+                raise ValueError(f"RidgeSet lines ({elevation_data.num_lines}) "
+                                 f"must match num_lines ({num_lines})")
+            return elevation_data
+        
+        profiles, raw_profiles = self._line_rows(elevation_data, num_lines, smoothing, sigma)
+        return RidgeSet.from_profiles(profiles, raw_profiles, elevation_data.shape,
+                                      exaggeration, scaling_factors, skip_zero_elevation)
+    
     def generate_line_profiles(self, elevation_normalized: np.ndarray,
                               num_lines: int,
                               exaggeration: float = 3.0,
@@ -129,7 +331,6 @@ class TopomapGenerator:
             List of (x, y) coordinate arrays for each line
         """
         height, width = elevation_normalized.shape
-        lines = []
         
         # Default scaling factors (1.0 for all lines)
         if scaling_factors is None:
@@ -137,16 +338,10 @@ class TopomapGenerator:
         elif len(scaling_factors) != num_lines:
             raise ValueError(f"scaling_factors length ({len(scaling_factors)}) must match num_lines ({num_lines})")
         
-        for i in range(num_lines):
-            row_idx = int((i / num_lines) * (height - 1))
-            profile = elevation_normalized[row_idx, :]
-            
-            x = np.linspace(0, width, width)
-            y = profile * exaggeration * scaling_factors[i]
-            
-            lines.append((x, y))
-        
-        return lines
+        # All lines at once, in float64; the renderers use the float32 RidgeSet
+        profiles = elevation_normalized[line_row_indices(num_lines, height)]
+        y = profiles * (exaggeration * np.asarray(scaling_factors, dtype=float)[:, None])
+        return [(np.linspace(0, width, width), row) for row in y]
     
     def create_png(self, elevation_data: np.ndarray, 
                    num_lines: int = 80,
@@ -160,12 +355,16 @@ class TopomapGenerator:
                    smoothing: bool = True,
                    skip_zero_elevation: bool = True,
                    figsize: Tuple[int, int] = (12, 16),
-                   dpi: int = 300) -> plt.Figure:
+                   dpi: int = 300,
+                   sigma: float = 1.5,
+                   simplify: float = 0.25,
+                   hidden_line_removal: bool = False) -> plt.Figure:
         """
         Create PNG visualization of topographic data.
         
         Args:
-            elevation_data: 2D elevation array
+            elevation_data: 2D elevation array, RowBandElevation,
+                ProcessedElevation or RidgeSet (see build_ridges)
             num_lines: Number of horizontal lines
             exaggeration: Vertical exaggeration factor
             scaling_factors: Optional per-line scaling factors
@@ -178,94 +377,58 @@ class TopomapGenerator:
             skip_zero_elevation: Skip drawing lines where elevation <= 0 (e.g., sea)
             figsize: Figure size in inches
             dpi: Dots per inch
+            sigma: Smoothing parameter
+            simplify: Drop samples closer than this many output pixels to the
+                simplified line (0 draws every sample)
+            hidden_line_removal: Draw only the visible parts of each line,
+                clipped against the lines in front, instead of filling
+                below them (fill_below is then ignored)
             
         Returns:
             matplotlib Figure object
         """
-        elevation_normalized, raw_elevation, _, _ = self.process_elevation_data(elevation_data, smoothing)
-        height, width = elevation_data.shape
+        ridges = self.build_ridges(elevation_data, num_lines, exaggeration, scaling_factors,
+                                   smoothing, sigma, skip_zero_elevation)
+        height, width = ridges.shape
         
         # Create figure
         fig, ax = plt.subplots(figsize=figsize, facecolor=bg_color)
         ax.set_facecolor(bg_color)
         
-        # Calculate line positions
+        # Place every line on its baseline at once
         y_positions = np.linspace(0, num_lines * line_spacing, num_lines)
-        
-        # Default scaling factors
-        if scaling_factors is None:
-            scaling_factors = [1.0] * num_lines
-        
-        # Draw each line
-        for i, y_pos in enumerate(y_positions):
-            row_idx = int((i / num_lines) * (height - 1))
-            profile = elevation_normalized[row_idx, :]
-            raw_profile = raw_elevation[row_idx, :]
-            
-            x = np.linspace(0, width, width)
-            y = y_pos - profile * exaggeration * line_spacing * scaling_factors[i]
-            
-            if skip_zero_elevation:
-                # Split into segments where elevation > 0
-                segments = self._split_line_by_elevation(x, y, raw_profile)
-                
-                if fill_below:
-                    for seg_x, seg_y in segments:
-                        if len(seg_x) < 2:
-                            continue
-                        vertices = []
-                        codes = []
-                        
-                        vertices.append([seg_x[0], y_pos + line_spacing])
-                        codes.append(Path.MOVETO)
-                        
-                        for xi, yi in zip(seg_x, seg_y):
-                            vertices.append([xi, yi])
-                            codes.append(Path.LINETO)
-                        
-                        vertices.append([seg_x[-1], y_pos + line_spacing])
-                        codes.append(Path.LINETO)
-                        vertices.append([seg_x[0], y_pos + line_spacing])
-                        codes.append(Path.CLOSEPOLY)
-                        
-                        path = Path(vertices, codes)
-                        patch = patches.PathPatch(path, facecolor=bg_color, 
-                                                 edgecolor=line_color, 
-                                                 linewidth=line_width,
-                                                 zorder=num_lines - i)
-                        ax.add_patch(patch)
-                else:
-                    for seg_x, seg_y in segments:
-                        if len(seg_x) >= 2:
-                            ax.plot(seg_x, seg_y, color=line_color, linewidth=line_width, 
-                                   zorder=num_lines - i)
-            else:
-                # Draw continuous line (original behavior)
-                if fill_below:
-                    vertices = []
-                    codes = []
-                    
-                    vertices.append([x[0], y_pos + line_spacing])
-                    codes.append(Path.MOVETO)
-                    
-                    for xi, yi in zip(x, y):
-                        vertices.append([xi, yi])
-                        codes.append(Path.LINETO)
-                    
-                    vertices.append([x[-1], y_pos + line_spacing])
-                    codes.append(Path.LINETO)
-                    vertices.append([x[0], y_pos + line_spacing])
-                    codes.append(Path.CLOSEPOLY)
-                    
-                    path = Path(vertices, codes)
-                    patch = patches.PathPatch(path, facecolor=bg_color, 
-                                             edgecolor=line_color, 
-                                             linewidth=line_width,
-                                             zorder=num_lines - i)
-                    ax.add_patch(patch)
-                else:
-                    ax.plot(x, y, color=line_color, linewidth=line_width, 
-                           zorder=num_lines - i)
+        x = ridges.x
+        y = ridges.place(y_positions, line_spacing)
+        baselines = y_positions + line_spacing
+        runs = ridges.runs
+        endpoints = None
+        if hidden_line_removal:
+            # Line 0 is drawn on top of the others, so it is the nearest;
+            # fills stop at each line's baseline
+            visible = horizon_clip(x, y, runs, range(num_lines), baselines)
+            runs, endpoints = visible.runs, (visible.first, visible.last)
+        
+        # Simplify in output pixels: the equal-aspect axes fit the tighter of
+        # the figure's width and height
+        keep = None
+        if simplify > 0:
+            px_per_unit = min(figsize[0] * dpi / width,
+                              figsize[1] * dpi / ((num_lines + 2) * line_spacing))
+            keep = simplify_runs(x * px_per_unit, y * px_per_unit, runs, simplify)
+        
+        if fill_below and not hidden_line_removal:
+            # One compound path per line, drawn back to front inside a single
+            # collection so nearer lines still hide the ones behind them
+            vertices, codes, offsets = fill_polygons(x, y, baselines, runs, keep)
+            paths = [Path(vertices[offsets[i]:offsets[i + 1]], codes[offsets[i]:offsets[i + 1]])
+                     for i in reversed(range(num_lines)) if offsets[i + 1] > offsets[i]]
+            ax.add_collection(PathCollection(paths, facecolors=bg_color,
+                                             edgecolors=line_color,
+                                             linewidths=line_width, zorder=1))
+        else:
+            segments = line_segments(x, y, runs, keep, endpoints)
+            ax.add_collection(LineCollection(segments, colors=line_color,
+                                             linewidths=line_width, zorder=1))
         
         ax.set_xlim(0, width)
         ax.set_ylim(-line_spacing, num_lines * line_spacing + line_spacing)
@@ -275,6 +438,81 @@ class TopomapGenerator:
         
         return fig
     
+    def create_raster(self, elevation_data: np.ndarray,
+                      num_lines: int = 80,
+                      exaggeration: float = 3.0,
+                      scaling_factors: Optional[List[float]] = None,
+                      line_spacing: float = 1.0,
+                      bg_color: str = '#2B1B4D',
+                      line_color: str = 'white',
+                      line_width: float = 1.5,
+                      fill_below: bool = True,
+                      smoothing: bool = True,
+                      skip_zero_elevation: bool = True,
+                      figsize: Tuple[int, int] = (12, 16),
+                      dpi: int = 300,
+                      sigma: float = 1.5,
+                      simplify: float = 0.25,
+                      hidden_line_removal: bool = False,
+                      antialias: bool = True) -> RasterCanvas:
+        """
+        Draw the PNG visualization straight into an RGBA array, without matplotlib.
+        
+        Takes the same arguments as create_png() and lays the lines out the
+        same way: the data is fitted into a figsize * dpi pixel canvas with
+        equal aspect, and line_width is in points.
+        
+        Args:
+            elevation_data: 2D elevation array, RowBandElevation,
+                ProcessedElevation or RidgeSet (see build_ridges)
+            num_lines ... hidden_line_removal: See create_png()
+            antialias: Smooth the line edges
+        
+        Returns:
+            RasterCanvas holding the image in its ``pixels`` array
+        """
+        ridges = self.build_ridges(elevation_data, num_lines, exaggeration, scaling_factors,
+                                   smoothing, sigma, skip_zero_elevation)
+        height, width = ridges.shape
+        
+        canvas = RasterCanvas.for_figure((0, width),
+                                         (-line_spacing, (num_lines + 1) * line_spacing),
+                                         figsize, dpi, bg_color)
+        px_per_unit = canvas.scale_x
+        
+        y_positions = np.linspace(0, num_lines * line_spacing, num_lines)
+        x = ridges.x
+        y = ridges.place(y_positions, line_spacing)
+        baselines = y_positions + line_spacing
+        runs = ridges.runs
+        endpoints = None
+        if hidden_line_removal:
+            visible = horizon_clip(x, y, runs, range(num_lines), baselines)
+            runs, endpoints = visible.runs, (visible.first, visible.last)
+        
+        keep = None
+        if simplify > 0:
+            keep = simplify_runs(x * px_per_unit, y * px_per_unit, runs, simplify)
+        
+        stroke_px = line_width * dpi / 72.0
+        segments = line_segments(x, y, runs, keep, endpoints)
+        ink = canvas.layer()
+        if not fill_below or hidden_line_removal:
+            canvas.stroke(ink, segments, stroke_px, antialias)
+        else:
+            # Painter's order: fill and outline each line back to front, so
+            # the fill of a nearer line erases the strokes behind it
+            for i in reversed(range(num_lines)):
+                outlines = []
+                for profile in segments[runs.offsets[i]:runs.offsets[i + 1]]:
+                    canvas.fill_between(ink, profile[:, 0], profile[:, 1], baselines[i])
+                    base = [[profile[-1, 0], baselines[i]], [profile[0, 0], baselines[i]]]
+                    outlines.append(np.vstack([profile, base, profile[:1]]))
+                canvas.stroke(ink, outlines, stroke_px, antialias)
+        canvas.composite(ink, line_color)
+        
+        return canvas
+    
     def _split_line_by_elevation(self, x: np.ndarray, y: np.ndarray, 
                                   raw_elevation: np.ndarray, 
                                   threshold: float = 0.0) -> List[Tuple[np.ndarray, np.ndarray]]:
@@ -290,28 +528,11 @@ class TopomapGenerator:
         Returns:
             List of (x, y) segment tuples
         """
-        segments = []
-        current_x = []
-        current_y = []
-        
-        for i, elev in enumerate(raw_elevation):
-            if elev > threshold:
-                current_x.append(x[i])
-                current_y.append(y[i])
-            else:
-                if len(current_x) >= 2:
-                    segments.append((np.array(current_x), np.array(current_y)))
-                current_x = []
-                current_y = []
-        
-        # Add final segment if exists
-        if len(current_x) >= 2:
-            segments.append((np.array(current_x), np.array(current_y)))
-        
-        return segments
+        runs = find_runs(raw_elevation, threshold)
+        return [(x[start:stop], y[start:stop]) for start, stop in runs.segments(0)]
     
     def create_svg(self, elevation_data: np.ndarray,
-                   output_path: str,
+                   output_path: Union[str, IO],
                    num_lines: int = 80,
                    exaggeration: float = 3.0,
                    scaling_factors: Optional[List[float]] = None,
@@ -322,13 +543,26 @@ class TopomapGenerator:
                    smoothing: bool = True,
                    skip_zero_elevation: bool = True,
                    width: int = 1200,
-                   height: int = 1600) -> str:
+                   height: int = 1600,
+                   sigma: float = 1.5,
+                   precision: int = 2,
+                   compress: Optional[bool] = None,
+                   simplify: float = 0.25,
+                   hidden_line_removal: bool = False,
+                   gpx_file: Optional[str] = None,
+                   gpx_bounds: Optional[Tuple[float, float, float, float]] = None,
+                   gpx_color: str = '#000000',
+                   gpx_width: float = 2.0,
+                   gpx_alpha: float = 1.0,
+                   gpx_simplify: float = 0.25) -> str:
         """
         Create SVG visualization (vector format, perfect for logos).
         
         Args:
-            elevation_data: 2D elevation array
-            output_path: Path to save SVG file
+            elevation_data: 2D elevation array, RowBandElevation,
+                ProcessedElevation or RidgeSet (see build_ridges)
+            output_path: Path to save SVG file, or an open file object
+                (e.g. io.BytesIO) to stream it to
             num_lines: Number of horizontal lines
             exaggeration: Vertical exaggeration factor
             scaling_factors: Optional per-line scaling factors
@@ -340,63 +574,68 @@ class TopomapGenerator:
             skip_zero_elevation: Skip drawing lines where elevation <= 0 (e.g., sea)
             width: SVG width in pixels
             height: SVG height in pixels
+            sigma: Smoothing parameter
+            precision: Decimals kept for coordinates (2 = 1/100 px)
+            compress: Gzip the output (default: only for .svgz paths)
+            simplify: Drop samples closer than this many pixels to the
+                simplified line (0 draws every sample)
+            hidden_line_removal: Only write the parts of each line not hidden
+                behind the lines below it
+            gpx_file: Optional GPX track drawn over the lines as one <path>,
+                each latitude on the baseline of the rows it crosses
+            gpx_bounds: (lat_min, lat_max, lon_min, lon_max) of the map,
+                required with gpx_file
+            gpx_color, gpx_width, gpx_alpha: Track stroke (width in pixels)
+            gpx_simplify: Drop track points closer than this many pixels to
+                the simplified track
             
         Returns:
-            Path to saved SVG file
+            Path to saved SVG file (or the file object it was streamed to)
         """
-        elevation_normalized, raw_elevation, _, _ = self.process_elevation_data(elevation_data, smoothing)
-        data_height, data_width = elevation_data.shape
-        
-        # Create SVG drawing
-        dwg = svgwrite.Drawing(output_path, size=(width, height), profile='full')
-        dwg.add(dwg.rect(insert=(0, 0), size=(width, height), fill=bg_color))
+        ridges = self.build_ridges(elevation_data, num_lines, exaggeration, scaling_factors,
+                                   smoothing, sigma, skip_zero_elevation)
+        data_height, data_width = ridges.shape
         
         # Calculate scaling
         scale_x = width / data_width
         scale_y = height / (num_lines * line_spacing + 2 * line_spacing)
         
-        # Default scaling factors
-        if scaling_factors is None:
-            scaling_factors = [1.0] * num_lines
+        # Place every line on its baseline at once
+        y_base = (np.arange(num_lines) * line_spacing + line_spacing) * scale_y
+        x = ridges.x * scale_x
+        y = ridges.place(y_base, line_spacing * scale_y)
+        
+        runs = ridges.runs
+        endpoints = None
+        if hidden_line_removal:
+            # The bottom line is the nearest
+            visible = horizon_clip(x, y, runs, range(num_lines - 1, -1, -1))
+            runs, endpoints = visible.runs, (visible.first, visible.last)
+        keep = simplify_runs(x, y, runs, simplify) if simplify > 0 else None
+        segments = line_segments(x, y, runs, keep, endpoints)
+        
+        # Stream one path per line, with a subpath per drawn segment; the
+        # stroke style is set once on the enclosing group
+        with SVGWriter(output_path, width, height, precision=precision, compress=compress) as svg:
+            svg.rect(0, 0, width, height, fill=bg_color)
+            with svg.group(stroke=line_color, stroke_width=line_width, fill='none'):
+                for i in range(num_lines):
+                    subpaths = segments[runs.offsets[i]:runs.offsets[i + 1]]
+                    if subpaths:
+                        svg.path(subpaths)
+            
+            if gpx_file:
+                # Track y is lat_norm * rows, i.e. grid row r at r * rows / (rows - 1);
+                # row r is drawn on the baseline of line r / (rows - 1) * num_lines
+                row_scale = num_lines * line_spacing * scale_y / data_height
+                self._write_svg_track(
+                    svg, gpx_file, gpx_bounds, ridges.shape,
+                    lambda x, y: (x * scale_x, y * row_scale + line_spacing * scale_y),
+                    gpx_color, gpx_width, gpx_alpha, gpx_simplify
+                )
         
-        # Draw each line
-        for i in range(num_lines):
-            row_idx = int((i / num_lines) * (data_height - 1))
-            profile = elevation_normalized[row_idx, :]
-            raw_profile = raw_elevation[row_idx, :]
-            
-            y_base = (i * line_spacing + line_spacing) * scale_y
-            
-            points = []
-            for j, elev in enumerate(profile):
-                x = j * scale_x
-                y = y_base - elev * exaggeration * line_spacing * scale_y * scaling_factors[i]
-                points.append((x, y, raw_profile[j]))
-            
-            if skip_zero_elevation:
-                # Split into segments where elevation > 0
-                segments = self._split_svg_points_by_elevation(points)
-                
-                for segment in segments:
-                    if len(segment) >= 2:
-                        # Create polyline for this segment
-                        seg_points = [(p[0], p[1]) for p in segment]
-                        polyline = dwg.polyline(points=seg_points, 
-                                               stroke=line_color,
-                                               stroke_width=line_width,
-                                               fill='none')
-                        dwg.add(polyline)
-            else:
-                # Draw continuous line (original behavior)
-                line_points = [(p[0], p[1]) for p in points]
-                polyline = dwg.polyline(points=line_points, 
-                                       stroke=line_color,
-                                       stroke_width=line_width,
-                                       fill='none')
-                dwg.add(polyline)
-        
-        dwg.save()
-        print(f"SVG saved to: {output_path}")
+        if isinstance(output_path, str):
+            print(f"SVG saved to: {output_path}")
         return output_path
     
     def _split_svg_points_by_elevation(self, points: List[Tuple[float, float, float]], 
@@ -411,153 +650,354 @@ class TopomapGenerator:
         Returns:
             List of point segment lists
         """
-        segments = []
-        current_segment = []
+        runs = find_runs(np.array([p[2] for p in points]), threshold)
+        return [points[start:stop] for start, stop in runs.segments(0)]
+    
+    def plan_grid(self, lat_min: float, lat_max: float,
+                  lon_min: float, lon_max: float,
+                  resolution: Union[int, Tuple[int, int], str] = 100,
+                  format: str = 'png',
+                  **kwargs) -> Tuple[int, int]:
+        """
+        Work out the (rows, cols) sample grid for an output.
         
-        for point in points:
-            x, y, elev = point
-            if elev > threshold:
-                current_segment.append(point)
-            else:
-                if len(current_segment) >= 2:
-                    segments.append(current_segment)
-                current_segment = []
+        The output size in pixels comes from ``width``/``height`` for SVG and
+        from ``figsize`` × ``dpi`` otherwise, so no samples are spent on
+        detail that never reaches a pixel.
+        
+        Args:
+            lat_min, lat_max: Latitude bounds
+            lon_min, lon_max: Longitude bounds
+            resolution: (rows, cols) to use as is, an int capping the longest
+                side of the grid, or 'auto' for one sample per output pixel
+            format: Output format ('png', 'svg' or 'halftone')
+            **kwargs: Output size arguments (width, height, figsize, dpi)
+            
+        Returns:
+            (rows, cols) of the sample grid
+        """
+        if isinstance(resolution, (tuple, list)):
+            rows, cols = resolution
+            return int(rows), int(cols)
         
-        # Add final segment if exists
-        if len(current_segment) >= 2:
-            segments.append(current_segment)
+        if format.lower() == 'svg':
+            width_px = kwargs.get('width', 1200)
+            height_px = kwargs.get('height', 1600)
+        else:
+            fig_w, fig_h = kwargs.get('figsize', (12, 16))
+            dpi = kwargs.get('dpi', 300)
+            width_px, height_px = fig_w * dpi, fig_h * dpi
         
-        return segments
+        cap = None if resolution == 'auto' else int(resolution)
+        return plan_grid_shape(lat_min, lat_max, lon_min, lon_max,
+                               width_px, height_px, resolution=cap)
     
-    def generate(self, latitude: float, longitude: float,
+    def generate(self, latitude: Optional[float] = None, longitude: Optional[float] = None,
                 size_km: float = 10,
-                resolution: int = 100,
+                resolution: Union[int, Tuple[int, int], str] = 100,
                 num_lines: int = 80,
                 exaggeration: float = 3.0,
                 scaling_factors: Optional[List[float]] = None,
                 output_filename: str = "topomap.png",
                 title: Optional[str] = None,
                 format: str = 'png',
+                backend: str = 'matplotlib',
                 **kwargs) -> str:
         """
         Generate a topographic line art image.
         
         Args:
-            latitude: Center latitude
+            latitude: Center latitude; leave latitude and longitude out to
+                frame ``gpx_file`` with ``gpx_margin_km`` (default 1 km) around it
             longitude: Center longitude
             size_km: Square area size in kilometers
-            resolution: Elevation sample points per dimension
+            resolution: Elevation sample points along the longest side,
+                a (rows, cols) tuple, or 'auto' to match the output pixels
             num_lines: Number of horizontal lines
             exaggeration: Vertical exaggeration factor
             scaling_factors: Optional per-line scaling factors
             output_filename: Output file name
             title: Optional title text
-            format: Output format ('png' or 'svg')
-            **kwargs: Additional format-specific arguments
+            format: Output format ('png', 'svg' or 'halftone'); halftones
+                are written as SVG when output_filename ends in .svg or .svgz
+            backend: 'matplotlib', or 'raster' to draw PNG and halftone output
+                straight into a NumPy array without building a figure
+            **kwargs: Additional format-specific arguments. ``row_band=False``
+                samples the full grid for PNG/SVG instead of only the drawn rows;
+                ``gpx_corridor_km`` samples at full resolution only within
+                that distance of ``gpx_file``
             
         Returns:
             Path to saved file
         """
-        # Calculate bounds
-        lat_offset = (size_km / 111.0) / 2
-        lon_offset = (size_km / (111.0 * np.cos(np.radians(latitude)))) / 2
-        
-        lat_min = latitude - lat_offset
-        lat_max = latitude + lat_offset
-        lon_min = longitude - lon_offset
-        lon_max = longitude + lon_offset
+        lat_min, lat_max, lon_min, lon_max = self._resolve_bounds(latitude, longitude,
+                                                                  size_km, **kwargs)
         
         print(f"\n{'='*60}")
-        print(f"Generating topographic art for: {latitude:.4f}, {longitude:.4f}")
-        print(f"Area: {size_km}km × {size_km}km")
+        print(f"Generating topographic art for: {(lat_min + lat_max) / 2:.4f}, "
+              f"{(lon_min + lon_max) / 2:.4f}")
+        print(f"Area: {(lat_max - lat_min) * 111.0:.1f}km (N-S) × "
+              f"{(lon_max - lon_min) * 111.0 * np.cos(np.radians((lat_min + lat_max) / 2)):.1f}km (E-W)")
         print(f"Format: {format.upper()}")
         print(f"{'='*60}\n")
         
-        # Get elevation data
-        elevation_data = self.get_elevation_matrix(lat_min, lat_max, lon_min, lon_max, resolution)
+        row_band = kwargs.pop('row_band', True)
+        elevation_data = self._fetch_elevation((lat_min, lat_max, lon_min, lon_max),
+                                               resolution, format, row_band, **kwargs)
         
         # Generate output
         output_path = os.path.join(self.output_dir, output_filename)
+        fig = self._render(elevation_data, (lat_min, lat_max, lon_min, lon_max),
+                           output_path, num_lines, exaggeration, scaling_factors,
+                           title, format, backend, **kwargs)
+        if fig is not None:
+            self._save_figure(fig, output_path, kwargs.get('dpi', 300))
+            if isinstance(fig, plt.Figure):
+                plt.close(fig)
         
-        if format.lower() == 'svg':
-            print("\nCreating SVG visualization...")
-            self.create_svg(elevation_data, output_path, num_lines, exaggeration,
-                          scaling_factors, **kwargs)
-        elif format.lower() == 'halftone':
-            print("\nCreating halftone visualization...")
+        print(f"\n✅ Topographic art saved to: {output_path}\n")
+        return output_path
+    
+    def _resolve_bounds(self, latitude: Optional[float], longitude: Optional[float],
+                        size_km: float, **kwargs) -> Tuple[float, float, float, float]:
+        """
+        Map bounds from a center and size, or framing gpx_file if no center is given.
+        
+        Args:
+            latitude, longitude, size_km: See generate()
+            **kwargs: gpx_file and gpx_margin_km
             
-            # Separate GPX parameters from halftone parameters
-            gpx_params = ['gpx_file', 'gpx_color', 'gpx_width', 'gpx_style', 'gpx_alpha', 'gpx_zorder']
-            halftone_kwargs = {k: v for k, v in kwargs.items() if k not in gpx_params}
+        Returns:
+            (lat_min, lat_max, lon_min, lon_max)
+        """
+        if latitude is not None and longitude is not None:
+            return self._area_bounds(latitude, longitude, size_km)
+        if not kwargs.get('gpx_file'):
+            raise ValueError("latitude and longitude are required without a gpx_file to frame")
+        return self.frame_gpx_track(kwargs['gpx_file'], kwargs.get('gpx_margin_km', 1.0))
+    
+    @staticmethod
+    def _area_bounds(latitude: float, longitude: float,
+                     size_km: float) -> Tuple[float, float, float, float]:
+        """
+        Compute the bounds of a square area around a center point.
+        
+        Args:
+            latitude: Center latitude
+            longitude: Center longitude
+            size_km: Square area size in kilometers
             
-            fig = self.create_halftone(elevation_data, **halftone_kwargs)
+        Returns:
+            (lat_min, lat_max, lon_min, lon_max)
+        """
+        lat_offset = (size_km / 111.0) / 2
+        lon_offset = (size_km / (111.0 * np.cos(np.radians(latitude)))) / 2
+        
+        return (latitude - lat_offset, latitude + lat_offset,
+                longitude - lon_offset, longitude + lon_offset)
+    
+    def _fetch_elevation(self, bounds: Tuple[float, float, float, float],
+                         resolution: Union[int, Tuple[int, int], str],
+                         format: str, row_band: bool = True, **kwargs):
+        """
+        Fetch the elevation data an output format needs.
+        
+        Args:
+            bounds: (lat_min, lat_max, lon_min, lon_max)
+            resolution: See generate()
+            format: Output format ('png', 'svg' or 'halftone')
+            row_band: Let ridge line formats sample only the rows they draw
+            **kwargs: Output size arguments used to plan the sample grid, and
+                gpx_corridor_km (with gpx_file) to sample at full resolution
+                only around the track
             
-            # Get axes for overlay
-            ax = fig.axes[0] if fig.axes else None
-            height, width = elevation_data.shape
+        Returns:
+            2D numpy array or RowBandElevation
+        """
+        rows, cols = self.plan_grid(*bounds, resolution, format, **kwargs)
+        
+        if kwargs.get('gpx_corridor_km') and kwargs.get('gpx_file'):
+            return self.get_elevation_corridor(*bounds, rows, cols, kwargs['gpx_file'],
+                                               kwargs['gpx_corridor_km'],
+                                               kwargs.get('gpx_coarse_step', 8))
+        if format.lower() != 'halftone' and row_band:
+            return self.get_elevation_rows(*bounds, rows=rows, cols=cols)
+        return self.get_elevation_matrix(*bounds, rows=rows, cols=cols)
+    
+    def _render(self, elevation_data, bounds: Tuple[float, float, float, float],
+                output_path: str,
+                num_lines: int = 80,
+                exaggeration: float = 3.0,
+                scaling_factors: Optional[List[float]] = None,
+                title: Optional[str] = None,
+                format: str = 'png',
+                backend: str = 'matplotlib',
+                **kwargs) -> Optional[Union[plt.Figure, RasterCanvas]]:
+        """
+        Render elevation data in the requested format.
+        
+        SVG output, and halftone output to a .svg or .svgz path, is written
+        straight to output_path; PNG and halftone output is returned as a
+        figure (or a RasterCanvas for the raster backend), with GPX overlay
+        and title applied.
+        
+        Args:
+            elevation_data: Elevation data accepted by the create_* methods
+            bounds: (lat_min, lat_max, lon_min, lon_max), for the GPX overlay
+            output_path: Path of the output file
+            num_lines, exaggeration, scaling_factors, title: See generate()
+            format: Output format ('png', 'svg' or 'halftone')
+            backend: See generate()
+            **kwargs: Format-specific and GPX overlay arguments
             
-            # Add GPX overlay if specified
-            if 'gpx_file' in kwargs and kwargs['gpx_file'] and ax:
-                print("\nAdding GPX track overlay...")
-                self.overlay_gpx_track(
-                    fig, ax, kwargs['gpx_file'],
-                    lat_min, lat_max, lon_min, lon_max,
+        Returns:
+            matplotlib Figure, RasterCanvas, or None for SVG
+        """
+        if backend not in ('matplotlib', 'raster'):
+            raise ValueError(f"Unknown backend: {backend!r}")
+        if backend == 'raster' and self._writes_svg(format, output_path):
+            raise ValueError("The raster backend cannot render SVG output")
+        
+        # Separate GPX parameters from rendering parameters
+        render_kwargs = {k: v for k, v in kwargs.items() if k not in GPX_PARAMS}
+        
+        if self._writes_svg(format, output_path):
+            # The track is written into the SVG as it is streamed
+            svg_kwargs = {k: v for k, v in kwargs.items() if k in SVG_GPX_PARAMS}
+            if kwargs.get('gpx_file'):
+                svg_kwargs['gpx_bounds'] = bounds
+            if kwargs.get('gpx_files'):
+                print("Warning: GPX heatmaps are not drawn in SVG output")
+            if format.lower() == 'svg':
+                print("\nCreating SVG visualization...")
+                self.create_svg(elevation_data, output_path, num_lines, exaggeration,
+                              scaling_factors, **render_kwargs, **svg_kwargs)
+            else:
+                print("\nCreating halftone SVG visualization...")
+                render_kwargs.pop('fast_render', None)
+                self.create_halftone_svg(elevation_data, output_path, **render_kwargs,
+                                         **svg_kwargs, title=title)
+            return None
+        
+        if backend == 'raster':
+            if format.lower() == 'halftone':
+                print("\nCreating halftone visualization (raster backend)...")
+                render_kwargs.pop('fast_render', None)
+                canvas = self.create_halftone_raster(elevation_data, **render_kwargs)
+                title_color = kwargs.get('dot_color', '#000000')
+            else:
+                print("\nCreating PNG visualization (raster backend)...")
+                canvas = self.create_raster(elevation_data, num_lines, exaggeration,
+                                            scaling_factors, **render_kwargs)
+                title_color = 'white'
+            height, width = elevation_data.shape
+            if kwargs.get('gpx_files'):
+                print("\nAdding GPX heatmap overlay...")
+                self.overlay_gpx_heatmap_raster(
+                    canvas, kwargs['gpx_files'],
+                    *bounds,
                     height, width,
-                    line_color=kwargs.get('gpx_color', '#000000'),
-                    line_width=kwargs.get('gpx_width', 2.0),
-                    line_style=kwargs.get('gpx_style', '-'),
+                    cmap=kwargs.get('gpx_cmap', 'inferno'),
                     alpha=kwargs.get('gpx_alpha', 1.0),
-                    zorder=kwargs.get('gpx_zorder', 10)
+                    shape=kwargs.get('gpx_heatmap_shape'),
+                    processes=kwargs.get('gpx_processes')
                 )
-            
-            if title:
-                fig.text(0.5, 0.98, title, ha='center', va='top',
-                        color=kwargs.get('dot_color', '#000000'), 
-                        fontsize=16, weight='bold')
-            
-            fig.savefig(output_path, dpi=kwargs.get('dpi', 300),
-                       bbox_inches='tight', facecolor=fig.get_facecolor(),
-                       edgecolor='none')
-            plt.close(fig)
-        else:  # png
-            print("\nCreating PNG visualization...")
-            
-            # Separate GPX parameters from PNG parameters
-            gpx_params = ['gpx_file', 'gpx_color', 'gpx_width', 'gpx_style', 'gpx_alpha', 'gpx_zorder']
-            png_kwargs = {k: v for k, v in kwargs.items() if k not in gpx_params}
-            
-            fig = self.create_png(elevation_data, num_lines, exaggeration,
-                                scaling_factors, **png_kwargs)
-            
-            # Get axes for overlay
-            ax = fig.axes[0] if fig.axes else None
-            height, width = elevation_data.shape
-            
-            # Add GPX overlay if specified
-            if 'gpx_file' in kwargs and kwargs['gpx_file'] and ax:
+            if kwargs.get('gpx_file'):
                 print("\nAdding GPX track overlay...")
-                self.overlay_gpx_track(
-                    fig, ax, kwargs['gpx_file'],
-                    lat_min, lat_max, lon_min, lon_max,
+                self.overlay_gpx_track_raster(
+                    canvas, kwargs['gpx_file'],
+                    *bounds,
                     height, width,
                     line_color=kwargs.get('gpx_color', '#000000'),
-                    line_width=kwargs.get('gpx_width', 2.0),
-                    line_style=kwargs.get('gpx_style', '-'),
+                    line_width=kwargs.get('gpx_width', 2.0) * kwargs.get('dpi', 300) / 72.0,
                     alpha=kwargs.get('gpx_alpha', 1.0),
-                    zorder=kwargs.get('gpx_zorder', 10)
+                    simplify=kwargs.get('gpx_simplify', 0.25)
                 )
-            
             if title:
-                fig.text(0.5, 0.98, title, ha='center', va='top',
-                        color='white', fontsize=16, weight='bold')
-            
-            fig.savefig(output_path, dpi=kwargs.get('dpi', 300),
-                       bbox_inches='tight', facecolor=fig.get_facecolor(),
-                       edgecolor='none')
-            plt.close(fig)
+                self._draw_raster_title(canvas, title, title_color, kwargs.get('dpi', 300))
+            return canvas
         
-        print(f"\n✅ Topographic art saved to: {output_path}\n")
-        return output_path
+        if format.lower() == 'halftone':
+            print("\nCreating halftone visualization...")
+            fig = self.create_halftone(elevation_data, **render_kwargs)
+            title_color = kwargs.get('dot_color', '#000000')
+        else:  # png
+            print("\nCreating PNG visualization...")
+            fig = self.create_png(elevation_data, num_lines, exaggeration,
+                                scaling_factors, **render_kwargs)
+            title_color = 'white'
+        
+        # Get axes for overlay
+        ax = fig.axes[0] if fig.axes else None
+        height, width = elevation_data.shape
+        
+        # Add GPX overlays if specified
+        if kwargs.get('gpx_files') and ax:
+            print("\nAdding GPX heatmap overlay...")
+            self.overlay_gpx_heatmap(
+                fig, ax, kwargs['gpx_files'],
+                *bounds,
+                height, width,
+                cmap=kwargs.get('gpx_cmap', 'inferno'),
+                alpha=kwargs.get('gpx_alpha', 1.0),
+                zorder=kwargs.get('gpx_zorder', 10),
+                shape=kwargs.get('gpx_heatmap_shape'),
+                processes=kwargs.get('gpx_processes')
+            )
+        
+        if kwargs.get('gpx_file') and ax:
+            print("\nAdding GPX track overlay...")
+            self.overlay_gpx_track(
+                fig, ax, kwargs['gpx_file'],
+                *bounds,
+                height, width,
+                line_color=kwargs.get('gpx_color', '#000000'),
+                line_width=kwargs.get('gpx_width', 2.0),
+                line_style=kwargs.get('gpx_style', '-'),
+                alpha=kwargs.get('gpx_alpha', 1.0),
+                zorder=kwargs.get('gpx_zorder', 10),
+                simplify=kwargs.get('gpx_simplify', 0.25),
+                dpi=kwargs.get('dpi', 300)
+            )
+        
+        if title:
+            fig.text(0.5, 0.98, title, ha='center', va='top',
+                    color=title_color, fontsize=16, weight='bold')
+        
+        return fig
+    
+    @staticmethod
+    def _writes_svg(format: str, output_path: str) -> bool:
+        """Whether a render writes SVG straight to output_path instead of returning a figure."""
+        return (format.lower() == 'svg'
+                or format.lower() == 'halftone'
+                and output_path.lower().endswith(('.svg', '.svgz')))
+    
+    @staticmethod
+    def _draw_raster_title(canvas: RasterCanvas, title: str, color: str,
+                           dpi: int = 300) -> None:
+        """Draw a title at the top of a raster canvas, like the figure title."""
+        from PIL import Image, ImageDraw, ImageFont
+        
+        # 16 pt bold, centered near the top edge
+        font = ImageFont.load_default(size=16 * dpi / 72.0)
+        image = Image.fromarray(canvas.pixels, mode="RGBA")
+        draw = ImageDraw.Draw(image)
+        draw.text((canvas.width / 2, canvas.height * 0.02), title, anchor="mt",
+                  fill=tuple(int(c) for c in np.round(rgba(color))), font=font,
+                  stroke_width=max(1, round(dpi / 300)), stroke_fill=color)
+        canvas.pixels[:] = np.asarray(image)
+    
+    @staticmethod
+    def _save_figure(fig: Union[plt.Figure, RasterCanvas], output_path: str,
+                     dpi: int = 300) -> None:
+        """Encode a rendered figure or raster canvas to disk."""
+        if isinstance(fig, RasterCanvas):
+            save_png(fig.pixels, output_path, dpi)
+            return
+        fig.savefig(output_path, dpi=dpi,
+                   bbox_inches='tight', facecolor=fig.get_facecolor(),
+                   edgecolor='none')
     
     def create_halftone(self, elevation_data: np.ndarray,
                        dot_size_range: Tuple[float, float] = (0.5, 8.0),
@@ -569,7 +1009,9 @@ class TopomapGenerator:
                        skip_zero_elevation: bool = True,
                        figsize: Tuple[int, int] = (12, 16),
                        dpi: int = 300,
-                       fast_render: bool = True) -> plt.Figure:
+                       fast_render: bool = True,
+                       sigma: float = 1.5,
+                       sampling: str = 'point') -> plt.Figure:
         """
         Create halftone visualization of topographic data.
         
@@ -577,7 +1019,7 @@ class TopomapGenerator:
         higher elevations, creating a newspaper/print-style artistic effect.
         
         Args:
-            elevation_data: 2D elevation array
+            elevation_data: 2D elevation array or full-grid ProcessedElevation
             dot_size_range: Tuple of (min_size, max_size) for dots
             grid_spacing: Spacing between dot centers in pixels
             bg_color: Background color
@@ -588,13 +1030,20 @@ class TopomapGenerator:
             figsize: Figure size in inches
             dpi: Dots per inch
             fast_render: Use optimized vectorized rendering (recommended)
+            sigma: Smoothing parameter
+            sampling: How each dot reads the elevation: 'point' at its
+                center, or the 'mean' or 'max' of the grid_spacing ×
+                grid_spacing cell around it (less aliasing at large spacings)
             
         Returns:
             matplotlib Figure object
         """
-        elevation_normalized, raw_elevation, _, _ = self.process_elevation_data(
-            elevation_data, smoothing
-        )
+        if isinstance(elevation_data, ProcessedElevation):
+            elevation_normalized, raw_elevation = elevation_data.normalized, elevation_data.raw
+        else:
+            elevation_normalized, raw_elevation, _, _ = self.process_elevation_data(
+                elevation_data, smoothing, sigma
+            )
         
         height, width = elevation_data.shape
         
@@ -614,32 +1063,10 @@ class TopomapGenerator:
         
         if fast_render:
             # OPTIMIZED: Vectorized approach (10-50x faster!)
-            # Create meshgrid of all dot positions at once
-            xx, yy = np.meshgrid(x_positions, y_positions)
-            
-            # Flatten to 1D arrays
-            x_flat = xx.ravel()
-            y_flat = yy.ravel()
-            
-            # Get elevation values at all positions (vectorized)
-            y_indices = np.clip(y_flat.astype(int), 0, height - 1)
-            x_indices = np.clip(x_flat.astype(int), 0, width - 1)
-            
-            elevation_norm_flat = elevation_normalized[y_indices, x_indices]
-            elevation_raw_flat = raw_elevation[y_indices, x_indices]
-            
-            # Apply masking if needed (vectorized)
-            if skip_zero_elevation:
-                mask = elevation_raw_flat > 0
-                x_flat = x_flat[mask]
-                y_flat = y_flat[mask]
-                elevation_norm_flat = elevation_norm_flat[mask]
-            
-            # Calculate all dot sizes at once (vectorized)
-            if invert:
-                dot_sizes = min_dot_size + (1 - elevation_norm_flat) * (max_dot_size - min_dot_size)
-            else:
-                dot_sizes = min_dot_size + elevation_norm_flat * (max_dot_size - min_dot_size)
+            x_flat, y_flat, dot_sizes = self._halftone_dots(
+                elevation_normalized, raw_elevation, grid_spacing, dot_size_range,
+                invert, skip_zero_elevation, sampling
+            )
             
             # Draw all dots at once using scatter (much faster than individual patches)
             # Note: scatter size is area, so we square the radius
@@ -647,32 +1074,267 @@ class TopomapGenerator:
                       alpha=1.0, edgecolors='none', zorder=1)
         else:
             # LEGACY: Original loop-based approach (slower but more precise)
+            cell_normalized, cell_raw = self._halftone_cells(
+                elevation_normalized, raw_elevation, grid_spacing, sampling
+            )
+            
+            # Skip zero elevation (sea level) a whole run at a time
+            threshold = 0 if skip_zero_elevation else -np.inf
+            runs = find_runs(cell_raw, threshold, min_length=1)
+            
             for y_idx, y in enumerate(y_positions):
-                for x_idx, x in enumerate(x_positions):
-                    # Get elevation at this position
-                    y_data = min(int(y), height - 1)
-                    x_data = min(int(x), width - 1)
-                    
-                    elevation_norm = elevation_normalized[y_data, x_data]
-                    elevation_raw = raw_elevation[y_data, x_data]
-                    
-                    # Skip if elevation is zero or below (sea level)
-                    if skip_zero_elevation and elevation_raw <= 0:
-                        continue
-                    
-                    # Calculate dot size based on elevation
-                    if invert:
-                        dot_size = min_dot_size + (1 - elevation_norm) * (max_dot_size - min_dot_size)
-                    else:
-                        dot_size = min_dot_size + elevation_norm * (max_dot_size - min_dot_size)
-                    
-                    # Draw dot
-                    circle = plt.Circle((x, y), dot_size, color=dot_color, zorder=1)
-                    ax.add_patch(circle)
+                for start, stop in runs.segments(y_idx):
+                    for x_idx in range(start, stop):
+                        x = x_positions[x_idx]
+                        elevation_norm = cell_normalized[y_idx, x_idx]
+                        
+                        # Calculate dot size based on elevation
+                        if invert:
+                            dot_size = min_dot_size + (1 - elevation_norm) * (max_dot_size - min_dot_size)
+                        else:
+                            dot_size = min_dot_size + elevation_norm * (max_dot_size - min_dot_size)
+                        
+                        # Draw dot
+                        circle = plt.Circle((x, y), dot_size, color=dot_color, zorder=1)
+                        ax.add_patch(circle)
         
         plt.tight_layout(pad=0)
         return fig
     
+    @staticmethod
+    def _halftone_cells(elevation_normalized: np.ndarray, raw_elevation: np.ndarray,
+                        grid_spacing: int,
+                        sampling: str = 'point') -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Elevation of every halftone dot, one row of the result per dot row.
+        
+        Args:
+            elevation_normalized: Normalized elevation grid
+            raw_elevation: Smoothed elevation grid in meters
+            grid_spacing: Spacing between dot centers in grid samples
+            sampling: 'point' samples the grid at each dot center; 'mean' and
+                'max' reduce the grid_spacing × grid_spacing cell around it
+            
+        Returns:
+            Tuple of (normalized, raw) arrays of shape (dot rows, dot columns)
+        """
+        if sampling == 'point':
+            height, width = elevation_normalized.shape
+            rows = np.arange(0, height, grid_spacing).astype(int)[:, None]
+            cols = np.arange(0, width, grid_spacing).astype(int)
+            return elevation_normalized[rows, cols], raw_elevation[rows, cols]
+        if sampling not in ('mean', 'max'):
+            raise ValueError(f"Unknown halftone sampling: {sampling!r}")
+        return (_cell_reduce(elevation_normalized, grid_spacing, sampling),
+                _cell_reduce(raw_elevation, grid_spacing, sampling))
+    
+    @classmethod
+    def _halftone_dots(cls, elevation_normalized: np.ndarray, raw_elevation: np.ndarray,
+                       grid_spacing: int,
+                       dot_size_range: Tuple[float, float],
+                       invert: bool = False,
+                       skip_zero_elevation: bool = True,
+                       sampling: str = 'point') -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """
+        Compute the position and size of every halftone dot.
+        
+        Args:
+            elevation_normalized: Normalized elevation grid
+            raw_elevation: Smoothed elevation grid in meters
+            grid_spacing, dot_size_range, invert, skip_zero_elevation, sampling:
+                See create_halftone()
+            
+        Returns:
+            Tuple of (x, y, dot_sizes) flat arrays
+        """
+        height, width = elevation_normalized.shape
+        
+        # Create meshgrid of all dot positions at once
+        xx, yy = np.meshgrid(np.arange(0, width, grid_spacing),
+                             np.arange(0, height, grid_spacing))
+        
+        # Flatten to 1D arrays
+        x_flat = xx.ravel()
+        y_flat = yy.ravel()
+        
+        # Get elevation values at all positions (vectorized)
+        elevation_norm, elevation_raw = cls._halftone_cells(
+            elevation_normalized, raw_elevation, grid_spacing, sampling
+        )
+        elevation_norm_flat = elevation_norm.ravel()
+        elevation_raw_flat = elevation_raw.ravel()
+        
+        # Apply masking if needed (vectorized)
+        if skip_zero_elevation:
+            mask = elevation_raw_flat > 0
+            x_flat = x_flat[mask]
+            y_flat = y_flat[mask]
+            elevation_norm_flat = elevation_norm_flat[mask]
+        
+        # Calculate all dot sizes at once (vectorized)
+        min_dot_size, max_dot_size = dot_size_range
+        if invert:
+            dot_sizes = min_dot_size + (1 - elevation_norm_flat) * (max_dot_size - min_dot_size)
+        else:
+            dot_sizes = min_dot_size + elevation_norm_flat * (max_dot_size - min_dot_size)
+        
+        return x_flat, y_flat, dot_sizes
+    
+    def create_halftone_raster(self, elevation_data: np.ndarray,
+                               dot_size_range: Tuple[float, float] = (0.5, 8.0),
+                               grid_spacing: int = 10,
+                               bg_color: str = '#ffffff',
+                               dot_color: str = '#000000',
+                               invert: bool = False,
+                               smoothing: bool = True,
+                               skip_zero_elevation: bool = True,
+                               figsize: Tuple[int, int] = (12, 16),
+                               dpi: int = 300,
+                               sigma: float = 1.5,
+                               sampling: str = 'point',
+                               antialias: bool = True) -> RasterCanvas:
+        """
+        Draw the halftone visualization straight into an RGBA array, without matplotlib.
+        
+        Takes the same arguments as create_halftone() and lays the dots out
+        the same way (dot sizes are radii in points). Dot radii are quantized
+        to a set of precomputed sprites, so millions of dots render in
+        seconds with memory proportional to the canvas.
+        
+        Args:
+            elevation_data: 2D elevation array or full-grid ProcessedElevation
+            dot_size_range ... sampling: See create_halftone()
+            antialias: Smooth the dot edges
+            
+        Returns:
+            RasterCanvas holding the image in its ``pixels`` array
+        """
+        if isinstance(elevation_data, ProcessedElevation):
+            elevation_normalized, raw_elevation = elevation_data.normalized, elevation_data.raw
+        else:
+            elevation_normalized, raw_elevation, _, _ = self.process_elevation_data(
+                elevation_data, smoothing, sigma
+            )
+        
+        height, width = elevation_data.shape
+        canvas = RasterCanvas.for_figure((0, width), (0, height), figsize, dpi, bg_color)
+        
+        x, y, dot_sizes = self._halftone_dots(elevation_normalized, raw_elevation,
+                                              grid_spacing, dot_size_range, invert,
+                                              skip_zero_elevation, sampling)
+        ink = canvas.layer()
+        canvas.stamp_dots(ink, x, y, dot_sizes * dpi / 72.0, antialias)
+        canvas.clip(ink, (0, width), (0, height))
+        canvas.composite(ink, dot_color)
+        
+        return canvas
+    
+    def create_halftone_svg(self, elevation_data: np.ndarray,
+                            output_path: Union[str, IO],
+                            dot_size_range: Tuple[float, float] = (0.5, 8.0),
+                            grid_spacing: int = 10,
+                            bg_color: str = '#ffffff',
+                            dot_color: str = '#000000',
+                            invert: bool = False,
+                            smoothing: bool = True,
+                            skip_zero_elevation: bool = True,
+                            figsize: Tuple[int, int] = (12, 16),
+                            dpi: int = 300,
+                            sigma: float = 1.5,
+                            sampling: str = 'point',
+                            precision: int = 2,
+                            compress: Optional[bool] = None,
+                            levels: int = DOT_LEVELS,
+                            gpx_file: Optional[str] = None,
+                            gpx_bounds: Optional[Tuple[float, float, float, float]] = None,
+                            gpx_color: str = '#000000',
+                            gpx_width: float = 2.0,
+                            gpx_alpha: float = 1.0,
+                            gpx_simplify: float = 0.25,
+                            title: Optional[str] = None) -> Union[str, IO]:
+        """
+        Stream the halftone visualization to an SVG file.
+        
+        Takes the same arguments as create_halftone() and lays the dots out
+        the same way, in pixels of a figsize × dpi image. Dot radii are
+        quantized to ``levels`` sizes; each size is defined once as a
+        <symbol> and every dot is a short <use> of it, so files stay
+        compact at hundreds of thousands of dots.
+        
+        Args:
+            elevation_data: 2D elevation array or full-grid ProcessedElevation
+            output_path: Path to save SVG file, or an open file object
+            dot_size_range ... sampling: See create_halftone()
+            precision: Decimals kept for coordinates
+            compress: Gzip the output (default: only for .svgz paths)
+            levels: Number of distinct dot sizes
+            gpx_file, gpx_bounds, gpx_color, gpx_alpha, gpx_simplify: See
+                create_svg()
+            gpx_width: Track width in points, like the PNG overlay
+            title: Optional title text, drawn like the figure title
+            
+        Returns:
+            Path to saved SVG file (or the file object it was streamed to)
+        """
+        if isinstance(elevation_data, ProcessedElevation):
+            elevation_normalized, raw_elevation = elevation_data.normalized, elevation_data.raw
+        else:
+            elevation_normalized, raw_elevation, _, _ = self.process_elevation_data(
+                elevation_data, smoothing, sigma
+            )
+        
+        height, width = elevation_data.shape
+        svg_width, svg_height, x_range, y_range = figure_layout((0, width), (0, height),
+                                                                figsize, dpi)
+        scale = svg_width / (x_range[1] - x_range[0])
+        
+        x, y, dot_sizes = self._halftone_dots(elevation_normalized, raw_elevation,
+                                              grid_spacing, dot_size_range, invert,
+                                              skip_zero_elevation, sampling)
+        points = np.column_stack([(x - x_range[0]) * scale, (y_range[1] - y) * scale])
+        
+        with SVGWriter(output_path, svg_width, svg_height, precision=precision,
+                       compress=compress) as svg:
+            svg.rect(0, 0, svg_width, svg_height, fill=bg_color)
+            
+            # Group the dots by size, one symbol per size in use
+            bucket, sizes = quantize_radii(dot_sizes * dpi / 72.0, levels)
+            order = np.argsort(bucket, kind='stable')
+            used, starts = np.unique(bucket[order], return_index=True)
+            bounds = np.append(starts, len(order))
+            
+            with svg.defs():
+                for level in used:
+                    with svg.symbol(f"d{level}"):
+                        svg.circle(0, 0, sizes[level])
+                # Dots are clipped to the axes, like matplotlib does
+                with svg.clip_path("axes"):
+                    svg.rect(*np.round([-x_range[0] * scale, (y_range[1] - height) * scale,
+                                        width * scale, height * scale], precision).tolist())
+            
+            with svg.group(fill=dot_color, clip_path="url(#axes)"):
+                for level, lo, hi in zip(used, bounds[:-1], bounds[1:]):
+                    svg.uses(f"d{level}", points[order[lo:hi]])
+            
+            if gpx_file:
+                self._write_svg_track(
+                    svg, gpx_file, gpx_bounds, (height, width),
+                    lambda x, y: ((x - x_range[0]) * scale, (y_range[1] - y) * scale),
+                    gpx_color, gpx_width * dpi / 72.0, gpx_alpha, gpx_simplify
+                )
+            
+            if title:
+                # 16 pt bold, centered near the top edge
+                svg.text(title, round(svg_width / 2, precision),
+                         round(svg_height * 0.02, precision),
+                         fill=dot_color, font_size=round(16 * dpi / 72.0, precision),
+                         font_weight='bold', font_family='sans-serif',
+                         text_anchor='middle', dominant_baseline='hanging')
+        
+        if isinstance(output_path, str):
+            print(f"SVG saved to: {output_path}")
+        return output_path
+    
     def load_gpx_track(self, gpx_file: str) -> List[Tuple[float, float]]:
         """
         Load GPS track from GPX file.
@@ -683,16 +1345,24 @@ class TopomapGenerator:
         Returns:
             List of (latitude, longitude) tuples
         """
-        with open(gpx_file, 'r') as f:
-            gpx = gpxpy.parse(f)
+        track = self.load_gpx_arrays(gpx_file)
+        return list(zip(track.lat.tolist(), track.lon.tolist()))
+    
+    def load_gpx_arrays(self, gpx_file: str, use_cache: bool = True) -> GPXTrack:
+        """
+        Load GPS track from GPX file as NumPy arrays.
         
-        points = []
-        for track in gpx.tracks:
-            for segment in track.segments:
-                for point in segment.points:
-                    points.append((point.latitude, point.longitude))
+        Parsed tracks are kept in the GPX cache, so overlaying the same
+        file again skips the XML parse.
         
-        return points
+        Args:
+            gpx_file: Path to GPX file
+            use_cache: Read and write the GPX cache (False always parses)
+            
+        Returns:
+            GPXTrack with lat, lon, ele and time arrays
+        """
+        return _load_track(gpx_file, self.gpx_cache if use_cache else None)
     
     def latlon_to_image_coords(self, lat: float, lon: float,
                               lat_min: float, lat_max: float,
@@ -702,7 +1372,7 @@ class TopomapGenerator:
         Convert latitude/longitude to image coordinates.
         
         Args:
-            lat, lon: Point coordinates
+            lat, lon: Point coordinates (scalars or arrays)
             lat_min, lat_max: Map latitude bounds
             lon_min, lon_max: Map longitude bounds
             height, width: Image dimensions
@@ -721,6 +1391,130 @@ class TopomapGenerator:
         
         return x, y
     
+    def gpx_track_runs(self, gpx_file: str,
+                       lat_min: float, lat_max: float,
+                       lon_min: float, lon_max: float,
+                       height: int, width: int,
+                       tolerance: float = 0.0) -> Optional[List[np.ndarray]]:
+        """
+        Project a GPX track to image coordinates and clip it to the map.
+        
+        All points are projected at once, and the track is cut where it
+        leaves the map bounds, so parts outside are never joined by
+        straight lines across the map.
+        
+        Args:
+            gpx_file: Path to GPX file
+            lat_min, lat_max: Map latitude bounds
+            lon_min, lon_max: Map longitude bounds
+            height, width: Image dimensions
+            tolerance: Drop points closer than this (in image coordinates)
+                to the simplified track (0 keeps every point)
+            
+        Returns:
+            List of (n, 2) arrays of (x, y) image coordinates, one per
+            visible run, or None (with a warning) if nothing is visible
+        """
+        track = self.load_gpx_arrays(gpx_file)
+        
+        if not len(track):
+            print("Warning: No GPS points found in GPX file")
+            return None
+        
+        x, y = self.latlon_to_image_coords(track.lat, track.lon, lat_min, lat_max,
+                                           lon_min, lon_max, height, width)
+        runs = clip_track(x, y, track.offsets, (0, width), (0, height))
+        if not runs:
+            print("Warning: Not enough points in map bounds to draw track")
+            return None
+        return simplify_track(runs, tolerance)
+    
+    def frame_gpx_track(self, gpx_file: str,
+                        margin_km: float = 1.0) -> Tuple[float, float, float, float]:
+        """
+        Map bounds framing a GPX track.
+        
+        Args:
+            gpx_file: Path to GPX file
+            margin_km: Space left around the track extents on every side
+            
+        Returns:
+            (lat_min, lat_max, lon_min, lon_max)
+        """
+        track = self.load_gpx_arrays(gpx_file)
+        if not len(track):
+            raise ValueError(f"No GPS points found in {gpx_file}")
+        
+        lat_min, lat_max = np.nanmin(track.lat), np.nanmax(track.lat)
+        lon_min, lon_max = np.nanmin(track.lon), np.nanmax(track.lon)
+        lat_margin = margin_km / 111.0
+        lon_margin = margin_km / (111.0 * np.cos(np.radians((lat_min + lat_max) / 2)))
+        return (float(lat_min - lat_margin), float(lat_max + lat_margin),
+                float(lon_min - lon_margin), float(lon_max + lon_margin))
+    
+    def corridor_mask(self, gpx_file: str, bounds: Tuple[float, float, float, float],
+                      shape: Tuple[int, int], corridor_km: float) -> np.ndarray:
+        """
+        Cells of a sample grid within a distance of a GPX track.
+        
+        Args:
+            gpx_file: Path to GPX file
+            bounds: (lat_min, lat_max, lon_min, lon_max) of the grid
+            shape: (rows, cols) of the grid; row 0 is lat_min
+            corridor_km: Largest distance from the track
+            
+        Returns:
+            Boolean (rows, cols) array
+        """
+        lat_min, lat_max, lon_min, lon_max = bounds
+        rows, cols = shape
+        track = self.load_gpx_arrays(gpx_file)
+        
+        # Cells crossed by the track, with sample i at the center of cell i
+        x = (track.lon - lon_min) / (lon_max - lon_min) * (cols - 1) + 0.5
+        y = (track.lat - lat_min) / (lat_max - lat_min) * (rows - 1) + 0.5
+        runs = clip_track(x, y, track.offsets, (0, cols), (0, rows))
+        crossed = accumulate_density(np.zeros(shape), runs) > 0
+        if not crossed.any():
+            return crossed
+        
+        # Ground distance to the nearest crossed cell
+        km_per_row = (lat_max - lat_min) * 111.0 / max(rows - 1, 1)
+        km_per_col = ((lon_max - lon_min) * 111.0 * np.cos(np.radians((lat_min + lat_max) / 2))
+                      / max(cols - 1, 1))
+        distance = distance_transform_edt(~crossed, sampling=(km_per_row, km_per_col))
+        return distance <= corridor_km
+    
+    def _write_svg_track(self, svg: SVGWriter, gpx_file: str,
+                         bounds: Tuple[float, float, float, float],
+                         shape: Tuple[int, int], to_svg,
+                         color: str, width: float, alpha: float,
+                         simplify: float) -> None:
+        """
+        Write a GPX track as a single SVG path.
+        
+        Args:
+            svg: Open SVGWriter
+            gpx_file: Path to GPX file
+            bounds: (lat_min, lat_max, lon_min, lon_max) of the map
+            shape: (height, width) of the elevation grid
+            to_svg: Maps image coordinate arrays (x, y) to SVG pixels
+            color, width, alpha: Stroke style
+            simplify: Tolerance in SVG pixels
+        """
+        if bounds is None:
+            raise ValueError("gpx_bounds is required to place gpx_file")
+        runs = self.gpx_track_runs(gpx_file, *bounds, *shape)
+        if runs is None:
+            return
+        runs = simplify_track([np.column_stack(to_svg(run[:, 0], run[:, 1])) for run in runs],
+                              simplify)
+        svg.path(runs, fill='none', stroke=color, stroke_width=width,
+                 stroke_opacity=None if alpha == 1 else alpha,
+                 stroke_linecap='round', stroke_linejoin='round')
+        print(f"✅ GPX track written: {sum(len(run) for run in runs)} points "
+              f"in {len(runs)} runs")
+    
     def overlay_gpx_track(self, fig: plt.Figure, ax: plt.Axes,
                          gpx_file: str,
                          lat_min: float, lat_max: float,
@@ -730,10 +1524,15 @@ class TopomapGenerator:
                          line_width: float = 2.0,
                          line_style: str = '-',
                          alpha: float = 1.0,
-                         zorder: int = 10) -> None:
+                         zorder: int = 10,
+                         simplify: float = 0.25,
+                         dpi: Optional[int] = None) -> None:
         """
         Overlay GPX track on existing figure.
         
+        The track is simplified to the resolution it will be saved at, so
+        points falling in the same output pixel are not drawn.
+        
         Args:
             fig: Matplotlib figure
             ax: Matplotlib axes
@@ -746,44 +1545,274 @@ class TopomapGenerator:
             line_style: Line style ('-', '--', ':', '-.')
             alpha: Line transparency (0-1)
             zorder: Drawing order (higher = on top)
+            simplify: Drop points closer than this many output pixels to
+                the simplified track (0 draws every point)
+            dpi: Resolution the figure will be saved at (default: the
+                figure's own dpi)
+        """
+        # Output pixels per data unit once the equal-aspect axes are laid out
+        ax.apply_aspect()
+        origin, unit = ax.transData.transform([(0, 0), (1, 0)])
+        px_per_unit = (unit[0] - origin[0]) * (dpi or fig.dpi) / fig.dpi
+        
+        runs = self.gpx_track_runs(gpx_file, lat_min, lat_max, lon_min, lon_max,
+                                   height, width, simplify / px_per_unit)
+        if runs is None:
+            return
+        
+        # Draw every visible run at once
+        ax.add_collection(LineCollection(
+            runs,
+            colors=line_color,
+            linewidths=line_width,
+            linestyles=line_style,
+            alpha=alpha,
+            zorder=zorder,
+            capstyle='round',
+            joinstyle='round'
+        ))
+        
+        print(f"✅ GPX track overlaid: {sum(len(run) for run in runs)} points plotted "
+              f"in {len(runs)} runs")
+    
+    def overlay_gpx_track_raster(self, canvas: RasterCanvas,
+                                 gpx_file: str,
+                                 lat_min: float, lat_max: float,
+                                 lon_min: float, lon_max: float,
+                                 height: int, width: int,
+                                 line_color: str = '#000000',
+                                 line_width: float = 2.0,
+                                 alpha: float = 1.0,
+                                 simplify: float = 0.25) -> None:
         """
-        # Load GPX track
-        points = self.load_gpx_track(gpx_file)
+        Overlay GPX track on a raster canvas.
         
-        if not points:
-            print("Warning: No GPS points found in GPX file")
+        Same placement and simplification as overlay_gpx_track(); the track
+        is always drawn solid, on top of everything else.
+        
+        Args:
+            canvas: RasterCanvas from create_raster()
+            gpx_file: Path to GPX file
+            lat_min, lat_max: Map latitude bounds
+            lon_min, lon_max: Map longitude bounds
+            height, width: Image dimensions
+            line_color: Track color
+            line_width: Track width in pixels
+            alpha: Line transparency (0-1)
+            simplify: Drop points closer than this many pixels to the
+                simplified track (0 draws every point)
+        """
+        runs = self.gpx_track_runs(gpx_file, lat_min, lat_max, lon_min, lon_max,
+                                   height, width, simplify / canvas.scale_x)
+        if runs is None:
             return
         
-        # Convert to image coordinates
-        x_coords = []
-        y_coords = []
+        canvas.draw_polylines(runs, line_color, line_width, alpha=alpha)
+        
+        print(f"✅ GPX track overlaid: {sum(len(run) for run in runs)} points plotted "
+              f"in {len(runs)} runs")
+    
+    def gpx_heatmap(self, gpx_files: Union[str, Sequence[str]],
+                    lat_min: float, lat_max: float,
+                    lon_min: float, lon_max: float,
+                    shape: Tuple[int, int],
+                    processes: Optional[int] = None) -> np.ndarray:
+        """
+        Accumulate many GPX tracks into a density grid over the map.
         
-        for lat, lon in points:
-            # Skip points outside the map bounds
-            if not (lat_min <= lat <= lat_max and lon_min <= lon <= lon_max):
-                continue
+        Files are split into one batch per worker process, and every worker
+        parses and rasterizes its batch into a single grid, so memory
+        depends on the grid size and the number of workers, not on the
+        number of files or points. Files that cannot be read are skipped
+        with a warning.
+        
+        Args:
+            gpx_files: Paths to GPX files, or a directory holding them
+            lat_min, lat_max: Map latitude bounds
+            lon_min, lon_max: Map longitude bounds
+            shape: (rows, cols) of the density grid; row 0 is the south edge
+            processes: Worker processes (default: one per CPU; 1 parses
+                in this process)
             
-            x, y = self.latlon_to_image_coords(
-                lat, lon, lat_min, lat_max, lon_min, lon_max, height, width
-            )
-            x_coords.append(x)
-            y_coords.append(y)
+        Returns:
+            (rows, cols) float64 array of track lengths per cell, in cells
+        """
+        paths = _gpx_paths(gpx_files)
+        bounds = (lat_min, lat_max, lon_min, lon_max)
+        shape = tuple(int(n) for n in shape)
+        
+        # One batch of files per worker, each summed into a single grid
+        workers = min(processes or os.cpu_count() or 1, max(len(paths), 1))
+        batches = [paths[i::workers] for i in range(workers)]
+        if workers == 1:
+            density, accumulated = _batch_density(paths, bounds, shape, self.gpx_cache)
+        else:
+            density, accumulated = np.zeros(shape), 0
+            with ProcessPoolExecutor(workers) as pool:
+                for grid, count in pool.map(_batch_density, batches, repeat(bounds),
+                                            repeat(shape), repeat(self.gpx_cache)):
+                    density += grid
+                    accumulated += count
+        
+        print(f"✅ GPX heatmap: {accumulated} of {len(paths)} tracks accumulated")
+        return density
+    
+    @staticmethod
+    def _heatmap_image(density: np.ndarray, cmap: str = 'inferno') -> np.ndarray:
+        """Color a density grid on a log scale; empty cells are transparent."""
+        colormap = plt.get_cmap(cmap).with_extremes(bad=(0, 0, 0, 0))
+        norm = LogNorm(vmin=1, vmax=max(density.max(), 1), clip=True)
+        return colormap(norm(np.ma.masked_less_equal(density, 0)), bytes=True)
+    
+    def overlay_gpx_heatmap(self, fig: plt.Figure, ax: plt.Axes,
+                            gpx_files: Union[str, Sequence[str]],
+                            lat_min: float, lat_max: float,
+                            lon_min: float, lon_max: float,
+                            height: int, width: int,
+                            cmap: str = 'inferno',
+                            alpha: float = 1.0,
+                            zorder: float = 10,
+                            shape: Optional[Tuple[int, int]] = None,
+                            processes: Optional[int] = None) -> None:
+        """
+        Overlay the density of many GPX tracks as a color-mapped layer.
         
-        if len(x_coords) < 2:
-            print("Warning: Not enough points in map bounds to draw track")
-            return
+        Args:
+            fig: Matplotlib figure
+            ax: Matplotlib axes
+            gpx_files: Paths to GPX files, or a directory holding them
+            lat_min, lat_max: Map latitude bounds
+            lon_min, lon_max: Map longitude bounds
+            height, width: Image dimensions
+            cmap: Matplotlib colormap name
+            alpha: Layer transparency (0-1)
+            zorder: Drawing order; the ridges are drawn at 1, so e.g. 0.5
+                puts the heatmap under them
+            shape: (rows, cols) of the density grid (default: height, width)
+            processes: See gpx_heatmap()
+        """
+        density = self.gpx_heatmap(gpx_files, lat_min, lat_max, lon_min, lon_max,
+                                   shape or (height, width), processes)
+        ax.imshow(self._heatmap_image(density, cmap), extent=(0, width, 0, height),
+                  origin='lower', interpolation='nearest', alpha=alpha, zorder=zorder,
+                  aspect='auto')
+    
+    def overlay_gpx_heatmap_raster(self, canvas: RasterCanvas,
+                                   gpx_files: Union[str, Sequence[str]],
+                                   lat_min: float, lat_max: float,
+                                   lon_min: float, lon_max: float,
+                                   height: int, width: int,
+                                   cmap: str = 'inferno',
+                                   alpha: float = 1.0,
+                                   shape: Optional[Tuple[int, int]] = None,
+                                   processes: Optional[int] = None) -> None:
+        """
+        Overlay the density of many GPX tracks on a raster canvas.
+        
+        Same layer as overlay_gpx_heatmap(), always blended on top of the
+        ridges.
+        
+        Args:
+            canvas: RasterCanvas from create_raster()
+            gpx_files ... processes: See overlay_gpx_heatmap()
+        """
+        density = self.gpx_heatmap(gpx_files, lat_min, lat_max, lon_min, lon_max,
+                                   shape or (height, width), processes)
+        canvas.draw_image(self._heatmap_image(density, cmap), (0, width), (0, height),
+                          alpha=alpha)
+
+
+def _gpx_paths(gpx_files: Union[str, Sequence[str]]) -> List[str]:
+    """GPX file paths, expanding a directory to the .gpx files it holds."""
+    if isinstance(gpx_files, str):
+        if not os.path.isdir(gpx_files):
+            return [gpx_files]
+        return sorted(os.path.join(gpx_files, name) for name in os.listdir(gpx_files)
+                      if name.lower().endswith('.gpx'))
+    return list(gpx_files)
+
+
+def _load_track(gpx_file: str, cache: Optional[GPXCache] = None) -> GPXTrack:
+    """Parse a GPX file, through the cache if one is given."""
+    if cache is None:
+        return read_gpx(gpx_file)
+    cache_key = cache.key(gpx_file)
+    track = cache.get(cache_key)
+    if track is None:
+        track = read_gpx(gpx_file)
+        cache.put(cache_key, track)
+    return track
+
+
+def _density_runs(gpx_file: str, bounds: Tuple[float, float, float, float],
+                  shape: Tuple[int, int], cache: Optional[GPXCache] = None) -> List[np.ndarray]:
+    """Runs of one GPX file in the cell units of a density grid."""
+    track = _load_track(gpx_file, cache)
+    lat_min, lat_max, lon_min, lon_max = bounds
+    rows, cols = shape
+    x = (track.lon - lon_min) / (lon_max - lon_min) * cols
+    y = (track.lat - lat_min) / (lat_max - lat_min) * rows
+    return clip_track(x, y, track.offsets, (0, cols), (0, rows))
+
+
+def _batch_density(gpx_files: Sequence[str], bounds: Tuple[float, float, float, float],
+                   shape: Tuple[int, int],
+                   cache: Optional[GPXCache] = None) -> Tuple[np.ndarray, int]:
+    """
+    Summed density grid of a batch of GPX files (run in worker processes by gpx_heatmap).
+    
+    Returns:
+        (grid, number of files accumulated); unreadable files are skipped
+    """
+    density = np.zeros(shape)
+    accumulated = 0
+    for gpx_file in gpx_files:
+        try:
+            runs = _density_runs(gpx_file, bounds, shape, cache)
+        except Exception as e:
+            print(f"Warning: Skipping {gpx_file}: {e}")
+            continue
+        accumulate_density(density, runs)
+        accumulated += 1
+    return density, accumulated
+
+
+def _cell_reduce(values: np.ndarray, spacing: int, reduction: str) -> np.ndarray:
+    """
+    Reduce a grid over the spacing × spacing cell around every halftone dot.
+    
+    Dots sit at multiples of spacing, so each cell starts half a cell
+    before its dot. The grid is laid out as (rows, spacing, cols, spacing)
+    blocks and reduced over the block axes; cells overhanging the grid
+    edges only count the samples inside it.
+    
+    Args:
+        values: 2D grid
+        spacing: Dot spacing in grid samples
+        reduction: 'mean' or 'max'
         
-        # Draw the track
-        ax.plot(x_coords, y_coords,
-               color=line_color,
-               linewidth=line_width,
-               linestyle=line_style,
-               alpha=alpha,
-               zorder=zorder,
-               solid_capstyle='round',
-               solid_joinstyle='round')
-        
-        print(f"✅ GPX track overlaid: {len(x_coords)} points plotted")
+    Returns:
+        Array of shape (ceil(height / spacing), ceil(width / spacing))
+    """
+    height, width = values.shape
+    rows, cols = -(-height // spacing), -(-width // spacing)
+    
+    # Grid index of every block sample, and whether it falls inside the grid
+    row_index = np.arange(rows * spacing) - spacing // 2
+    col_index = np.arange(cols * spacing) - spacing // 2
+    row_valid = (row_index >= 0) & (row_index < height)
+    col_valid = (col_index >= 0) & (col_index < width)
+    blocks = values[np.clip(row_index, 0, height - 1)[:, None],
+                    np.clip(col_index, 0, width - 1)]
+    valid = (row_valid[:, None] & col_valid).reshape(rows, spacing, cols, spacing)
+    blocks = blocks.reshape(rows, spacing, cols, spacing)
+    
+    if reduction == 'mean':
+        total = np.where(valid, blocks, 0).sum(axis=(1, 3))
+        return total / valid.sum(axis=(1, 3))
+    if reduction == 'max':
+        return np.where(valid, blocks, -np.inf).max(axis=(1, 3))
+    raise ValueError(f"Unknown reduction: {reduction!r}")
 
 
 def create_gradient_scaling(num_lines: int, start: float = 0.5,
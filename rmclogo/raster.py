@@ -0,0 +1,424 @@
+"""
+NumPy Raster Backend
+
+Draws ridge lines straight into a preallocated uint8 RGBA array, without
+building a matplotlib figure.
+
+Drawing happens on float32 coverage layers, one per color: strokes are
+anti-aliased by splatting discs along each polyline, and fills in the
+background color simply erase coverage. Drawing lines back to front on a
+layer therefore gives painter's-order occlusion, and the layer is blended
+into the RGBA pixels once at the end.
+"""
+
+from functools import lru_cache
+from typing import Iterable, Optional, Sequence, Tuple
+
+import numpy as np
+from matplotlib.colors import to_rgba
+
+
+# Smallest distance between the points splatted along a polyline, in pixels
+SAMPLE_SPACING = 0.5
+
+# Splatted points are rounded to 1 / STENCIL_PHASES of a pixel
+STENCIL_PHASES = 16
+
+# Number of sprites a range of dot radii is quantized to
+DOT_LEVELS = 64
+
+# Canvas rows blended per pass by draw_image()
+IMAGE_BAND = 256
+
+# Sprite cells stamped per vectorized pass, bounding the index arrays
+STAMP_CHUNK = 1 << 22
+
+
+def rgba(color, alpha: Optional[float] = None) -> np.ndarray:
+    """Any matplotlib color as a float RGBA array in [0, 255]."""
+    return np.array(to_rgba(color, alpha)) * 255.0
+
+
+def figure_layout(x_range: Sequence[float], y_range: Sequence[float],
+                  figsize: Tuple[float, float], dpi: int):
+    """
+    Pixel size and padded data ranges of a tight savefig() of equal-aspect axes.
+
+    The data is scaled to fit figsize * dpi pixels, and the image is
+    cropped to it with savefig's 0.1 inch margin.
+
+    Returns:
+        Tuple of (width, height, x_range, y_range)
+    """
+    data_width = x_range[1] - x_range[0]
+    data_height = y_range[1] - y_range[0]
+    px_per_unit = min(figsize[0] * dpi / data_width, figsize[1] * dpi / data_height)
+    pad = 0.1 * dpi / px_per_unit
+    return (round((data_width + 2 * pad) * px_per_unit),
+            round((data_height + 2 * pad) * px_per_unit),
+            (x_range[0] - pad, x_range[1] + pad),
+            (y_range[0] - pad, y_range[1] + pad))
+
+
+def quantize_radii(radii: np.ndarray, levels: int = DOT_LEVELS) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Round dot radii to ``levels`` evenly spaced sizes spanning their range.
+
+    Returns:
+        Tuple of (size index of every dot, sizes)
+    """
+    radii = np.asarray(radii, dtype=float)
+    if len(radii) == 0:
+        return np.zeros(0, dtype=np.intp), np.zeros(0)
+    low, high = radii.min(), radii.max()
+    if high > low and levels > 1:
+        bucket = np.rint((radii - low) / (high - low) * (levels - 1)).astype(np.intp)
+        return bucket, low + np.arange(levels) * (high - low) / (levels - 1)
+    return np.zeros(len(radii), dtype=np.intp), np.array([low])
+
+
+@lru_cache(maxsize=16)
+def _stencil(radius: float, antialias: bool) -> np.ndarray:
+    """
+    Coverage of a disc around a point, for every sub-pixel phase of the point.
+
+    Returns:
+        Array of shape (cells, cells, (phases + 1) ** 2): coverage of the
+        pixel at offset (row - reach, col - reach) from the point's pixel,
+        for the point at ``(row_phase, col_phase) / phases`` within its pixel
+        (phase ``row_phase * (phases + 1) + col_phase``)
+    """
+    reach = int(np.ceil(radius + 0.5))
+    centers = np.arange(STENCIL_PHASES + 1) / STENCIL_PHASES
+    offsets = np.arange(-reach, reach + 1) + 0.5
+    dy = offsets[:, None, None, None] - centers[None, None, :, None]
+    dx = offsets[None, :, None, None] - centers[None, None, None, :]
+    dist = np.hypot(dx, dy).reshape(2 * reach + 1, 2 * reach + 1, -1)
+    if antialias:
+        return np.clip(radius + 0.5 - dist, 0.0, 1.0).astype(np.float32)
+    return (dist <= radius).astype(np.float32)
+
+
+@lru_cache(maxsize=256)
+def _dot_sprite(radius: float, antialias: bool) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Coverage of a disc centered on a pixel center.
+
+    Returns:
+        Tuple of (row offsets, column offsets, coverage) of the covered cells
+    """
+    reach = int(np.ceil(radius + 0.5))
+    d_row, d_col = np.mgrid[-reach:reach + 1, -reach:reach + 1]
+    dist = np.hypot(d_row, d_col)
+    if antialias:
+        coverage = np.clip(radius + 0.5 - dist, 0.0, 1.0)
+    else:
+        coverage = (dist <= radius).astype(float)
+    covered = coverage > 0
+    return d_row[covered], d_col[covered], coverage[covered].astype(np.float32)
+
+
+class RasterCanvas:
+    """
+    RGBA canvas with a data-space transform.
+
+    Data coordinates follow matplotlib's convention (y up); pixel row 0 is
+    the top of the image.
+
+    Example:
+        canvas = RasterCanvas(400, 300, 'black', x_range=(0, 4), y_range=(0, 3))
+        ink = canvas.layer()
+        canvas.stroke(ink, [np.array([[0, 0], [4, 3]])], line_width=2)
+        canvas.composite(ink, 'white')
+    """
+
+    def __init__(self, width: int, height: int, bg_color='white',
+                 x_range: Optional[Sequence[float]] = None,
+                 y_range: Optional[Sequence[float]] = None):
+        """
+        Initialize the canvas.
+
+        Args:
+            width: Width in pixels
+            height: Height in pixels
+            bg_color: Background color
+            x_range: (x_min, x_max) data range across the width (default: pixels)
+            y_range: (y_min, y_max) data range across the height (default: pixels)
+        """
+        self.width = int(width)
+        self.height = int(height)
+        self.pixels = np.empty((self.height, self.width, 4), dtype=np.uint8)
+        # Fill whole pixels at once through a 32-bit view
+        fill = np.round(rgba(bg_color)).astype(np.uint8).view(np.uint32)
+        self.pixels.view(np.uint32)[:] = fill
+
+        self.x_range = tuple(x_range) if x_range is not None else (0, self.width)
+        self.y_range = tuple(y_range) if y_range is not None else (0, self.height)
+        self.scale_x = self.width / (self.x_range[1] - self.x_range[0])
+        self.scale_y = self.height / (self.y_range[1] - self.y_range[0])
+
+    @classmethod
+    def for_figure(cls, x_range: Sequence[float], y_range: Sequence[float],
+                   figsize: Tuple[float, float], dpi: int,
+                   bg_color='white') -> "RasterCanvas":
+        """
+        Canvas laid out like a tight savefig() of equal-aspect matplotlib
+        axes (see figure_layout()).
+
+        Args:
+            x_range: (x_min, x_max) data range of the axes
+            y_range: (y_min, y_max) data range of the axes
+            figsize: Figure size in inches
+            dpi: Dots per inch
+            bg_color: Background color
+        """
+        width, height, x_range, y_range = figure_layout(x_range, y_range, figsize, dpi)
+        return cls(width, height, bg_color, x_range=x_range, y_range=y_range)
+
+    def to_pixels(self, x: np.ndarray, y: np.ndarray):
+        """Convert data coordinates to (column, row) pixel coordinates."""
+        px = (np.asarray(x, dtype=float) - self.x_range[0]) * self.scale_x
+        py = (self.y_range[1] - np.asarray(y, dtype=float)) * self.scale_y
+        return px, py
+
+    def layer(self) -> np.ndarray:
+        """Empty coverage layer the size of the canvas."""
+        return np.zeros((self.height, self.width), dtype=np.float32)
+
+    def composite(self, layer: np.ndarray, color, alpha: Optional[float] = None) -> None:
+        """Blend a color into the pixels, weighted by a coverage layer."""
+        color = rgba(color, alpha)
+        touched = np.flatnonzero(layer)
+        weight = layer.ravel()[touched] * np.float32(color[3] / 255.0)
+        pixels = self.pixels.reshape(-1, 4)
+
+        # Fully covered pixels take the color as is
+        solid = weight == 1.0
+        pixels[touched[solid]] = np.round(color).astype(np.uint8)
+
+        touched, weight = touched[~solid], weight[~solid, None]
+        under = pixels[touched].astype(np.float32)
+        under[:, :3] += weight * (color[:3] - under[:, :3])
+        under[:, 3:] += weight * (255.0 - under[:, 3:])
+        pixels[touched] = np.round(under).astype(np.uint8)
+
+    def fill_between(self, layer: np.ndarray, x: np.ndarray, y: np.ndarray,
+                     edge: float) -> None:
+        """
+        Erase the coverage between a polyline and a horizontal edge.
+
+        This is a fill in the background color: whatever was drawn on the
+        layer underneath disappears.
+
+        Args:
+            layer: Coverage layer (see layer())
+            x: Increasing x coordinates of the polyline (data units)
+            y: y coordinates of the polyline
+            edge: y of the horizontal edge closing the area
+        """
+        px, py = self.to_pixels(x, y)
+        _, edge_py = self.to_pixels(0, edge)
+        c0 = max(int(np.ceil(px[0] - 0.5)), 0)
+        c1 = min(int(np.floor(px[-1] - 0.5)) + 1, self.width)
+        if c1 <= c0:
+            return
+
+        # Polyline row at every pixel center, then one span per column
+        centers = np.arange(c0, c1) + 0.5
+        line_py = np.interp(centers, px, py)
+        top = np.minimum(line_py, edge_py)
+        bottom = np.maximum(line_py, edge_py)
+        r0 = max(int(np.floor(top.min())), 0)
+        r1 = min(int(np.ceil(bottom.max())) + 1, self.height)
+        if r1 <= r0:
+            return
+
+        rows = np.arange(r0, r1)[:, None] + 0.5
+        layer[r0:r1, c0:c1] *= (rows < top) | (rows > bottom)
+
+    def stroke(self, layer: np.ndarray, polylines: Iterable[np.ndarray],
+               line_width: float = 1.0, antialias: bool = True) -> None:
+        """
+        Stroke polylines with round joins and caps onto a coverage layer.
+
+        The polylines of one call are merged before blending, so where they
+        overlap they are not blended twice.
+
+        Args:
+            layer: Coverage layer (see layer())
+            polylines: (n, 2) arrays in data coordinates
+            line_width: Line width in pixels
+            antialias: Smooth the line edges
+        """
+        radius = max(line_width, 1.0) / 2.0
+        # Discs this far apart leave scallops of a few hundredths of a
+        # pixel along the stroke edges
+        spacing = max(SAMPLE_SPACING, radius / 4)
+        samples = [self._sample(points, spacing) for points in polylines if len(points)]
+        if not samples:
+            return
+        sx = np.concatenate([s[0] for s in samples])
+        sy = np.concatenate([s[1] for s in samples])
+
+        stencil = _stencil(radius, antialias)
+        reach = (stencil.shape[0] - 1) // 2
+        base_col, base_row = np.floor(sx).astype(np.intp), np.floor(sy).astype(np.intp)
+        col_min, row_min = base_col.min() - reach, base_row.min() - reach
+        span_w = base_col.max() + reach + 1 - col_min
+        span_h = base_row.max() + reach + 1 - row_min
+
+        # Splat the stencil of every sample's sub-pixel phase into a buffer
+        # padded by the stencil reach, one vectorized pass per stencil cell
+        coverage = np.zeros(span_h * span_w, dtype=np.float32)
+        origin = (base_row - row_min) * span_w + (base_col - col_min)
+        phase_row = np.rint((sy - base_row) * STENCIL_PHASES).astype(np.intp)
+        phase_col = np.rint((sx - base_col) * STENCIL_PHASES).astype(np.intp)
+        phase = phase_row * (STENCIL_PHASES + 1) + phase_col
+        for d_row, d_col in zip(*np.nonzero(stencil.any(axis=2))):
+            np.maximum.at(coverage, origin + ((d_row - reach) * span_w + d_col - reach),
+                          stencil[d_row, d_col][phase])
+        coverage = coverage.reshape(span_h, span_w)
+
+        # Crop to the canvas and blend over what the layer already holds
+        c0, r0 = max(col_min, 0), max(row_min, 0)
+        c1, r1 = min(col_min + span_w, self.width), min(row_min + span_h, self.height)
+        if c1 <= c0 or r1 <= r0:
+            return
+        coverage = coverage[r0 - row_min:r1 - row_min, c0 - col_min:c1 - col_min]
+        region = layer[r0:r1, c0:c1]
+        region += coverage * (1.0 - region)
+
+    def stamp_dots(self, layer: np.ndarray, x: np.ndarray, y: np.ndarray,
+                   radii: np.ndarray, antialias: bool = True,
+                   levels: int = DOT_LEVELS) -> None:
+        """
+        Draw filled dots onto a coverage layer.
+
+        Radii are quantized to ``levels`` sizes and dot centers to pixel
+        centers, so every dot of a size is the same precomputed sprite. Each
+        size is then stamped for all its dots at once; anti-aliased edges are
+        merged with a scatter-max so that overlapping rims do not add up.
+
+        Args:
+            layer: Coverage layer (see layer())
+            x, y: Dot centers in data coordinates
+            radii: Dot radii in pixels
+            antialias: Smooth the dot edges
+            levels: Number of distinct dot sizes
+        """
+        px, py = self.to_pixels(x, y)
+        radii = np.asarray(radii, dtype=float)
+        if len(radii) == 0:
+            return
+        bucket, sizes = quantize_radii(radii, levels)
+        high = sizes[-1]
+
+        # Stamp into a buffer padded by twice the largest sprite reach, so
+        # the sprite of any dot less than one reach off the canvas fits
+        reach = int(np.ceil(high + 0.5))
+        padded_width = self.width + 4 * reach
+        buffer = np.zeros((self.height + 4 * reach) * padded_width, dtype=np.float32)
+        col = np.floor(px).astype(np.intp)
+        row = np.floor(py).astype(np.intp)
+        onscreen = ((col >= -reach) & (col < self.width + reach)
+                    & (row >= -reach) & (row < self.height + reach))
+        origin = (row + 2 * reach) * padded_width + col + 2 * reach
+
+        for level in np.unique(bucket[onscreen]):
+            dots = origin[onscreen & (bucket == level)]
+            d_row, d_col, coverage = _dot_sprite(float(sizes[level]), antialias)
+            offsets = d_row * padded_width + d_col
+            # Fully covered cells can simply be set, whatever overlaps them;
+            # only the anti-aliased rim needs the scatter-max
+            solid = coverage == 1.0
+            rim, rim_coverage = offsets[~solid], coverage[~solid]
+            step = max(STAMP_CHUNK // len(offsets), 1)
+            for lo in range(0, len(dots), step):
+                chunk = dots[lo:lo + step, None]
+                buffer[(chunk + offsets[solid]).ravel()] = 1.0
+                if len(rim):
+                    np.maximum.at(buffer, (chunk + rim).ravel(),
+                                  np.tile(rim_coverage, len(chunk)))
+
+        stamped = buffer.reshape(-1, padded_width)[2 * reach:2 * reach + self.height,
+                                                   2 * reach:2 * reach + self.width]
+        np.maximum(layer, stamped, out=layer)
+
+    def clip(self, layer: np.ndarray, x_range: Sequence[float],
+             y_range: Sequence[float]) -> None:
+        """Erase a layer outside a data rectangle, like axes clipping."""
+        (left, right), (bottom, top) = self.to_pixels(x_range, y_range)
+        c0, c1 = max(int(round(left)), 0), min(int(round(right)), self.width)
+        r0, r1 = max(int(round(top)), 0), min(int(round(bottom)), self.height)
+        layer[:r0] = 0
+        layer[r1:] = 0
+        layer[:, :c0] = 0
+        layer[:, c1:] = 0
+
+    def draw_image(self, image: np.ndarray, x_range: Sequence[float],
+                   y_range: Sequence[float], alpha: Optional[float] = None) -> None:
+        """
+        Blend an RGBA image spanning a data rectangle onto the pixels.
+
+        The image is sampled nearest-neighbour at the pixel centers, a band
+        of rows at a time; its first row is at the bottom (y_range[0]).
+
+        Args:
+            image: (rows, cols, 4) uint8 RGBA image with straight alpha
+            x_range: (x_min, x_max) covered by the image
+            y_range: (y_min, y_max) covered by the image
+            alpha: Extra opacity applied to the whole image
+        """
+        rows, cols = image.shape[:2]
+        px, py = self.to_pixels(np.array(x_range), np.array(y_range))
+        c0, c1 = max(int(np.ceil(px[0] - 0.5)), 0), min(int(np.ceil(px[1] - 0.5)), self.width)
+        r0, r1 = max(int(np.ceil(py[1] - 0.5)), 0), min(int(np.ceil(py[0] - 0.5)), self.height)
+        if c0 >= c1 or r0 >= r1:
+            return
+
+        # Image cell under every pixel center, along each axis
+        col = ((np.arange(c0, c1) + 0.5 - px[0]) / (px[1] - px[0]) * cols).astype(np.intp)
+        row = ((py[0] - np.arange(r0, r1) - 0.5) / (py[0] - py[1]) * rows).astype(np.intp)
+        col, row = np.clip(col, 0, cols - 1), np.clip(row, 0, rows - 1)
+
+        opacity = np.float32((1.0 if alpha is None else alpha) / 255.0)
+        for lo in range(0, r1 - r0, IMAGE_BAND):
+            band = slice(r0 + lo, min(r0 + lo + IMAGE_BAND, r1))
+            source = image[row[lo:lo + IMAGE_BAND, None], col].astype(np.float32)
+            weight = source[..., 3:] * opacity
+            under = self.pixels[band, c0:c1].astype(np.float32)
+            under[..., :3] += weight * (source[..., :3] - under[..., :3])
+            under[..., 3:] += weight * (255.0 - under[..., 3:])
+            self.pixels[band, c0:c1] = np.round(under).astype(np.uint8)
+
+    def draw_polylines(self, polylines: Iterable[np.ndarray], color,
+                       line_width: float = 1.0, antialias: bool = True,
+                       alpha: Optional[float] = None) -> None:
+        """Stroke polylines in a color straight onto the pixels."""
+        layer = self.layer()
+        self.stroke(layer, polylines, line_width, antialias)
+        self.composite(layer, color, alpha)
+
+    def _sample(self, points: np.ndarray, spacing: float = SAMPLE_SPACING):
+        """Pixel positions along a polyline, at most ``spacing`` apart."""
+        px, py = self.to_pixels(points[:, 0], points[:, 1])
+        if len(px) == 1:
+            return px, py
+        lengths = np.hypot(np.diff(px), np.diff(py))
+        steps = np.maximum(np.ceil(lengths / spacing).astype(np.intp), 1)
+        segment = np.repeat(np.arange(len(steps)), steps)
+        t = (np.arange(segment.size) - np.repeat(np.cumsum(steps) - steps, steps)) / steps[segment]
+        sx = np.append(px[segment] + t * (px[segment + 1] - px[segment]), px[-1])
+        sy = np.append(py[segment] + t * (py[segment + 1] - py[segment]), py[-1])
+        return sx, sy
+
+
+def save_png(pixels: np.ndarray, output_path: str, dpi: Optional[int] = None) -> None:
+    """Encode an RGBA array as PNG."""
+    from PIL import Image
+
+    image = Image.fromarray(pixels, mode="RGBA")
+    if dpi:
+        image.save(output_path, dpi=(dpi, dpi))
+    else:
+        image.save(output_path)
@@ -11,9 +11,11 @@ from skimage.filters import rank
 from skimage.morphology import footprint_rectangle
 from skimage.util import img_as_ubyte
 from scipy.ndimage import rotate
-import svgwrite
 
-import srtm
+from .elevation import rotated_lattice, sample_grid, sample_points
+from .ridges import simplify_lines
+from .svg import SVGWriter
+from .tile_store import get_default_tile_store
 
 
 class FontManager:
@@ -63,7 +65,12 @@ class RidgeMap:
     Keeps state around so no servers are hit too often.
     """
 
-    def __init__(self, bbox=(-71.928864, 43.758201, -70.957947, 44.465151), font=None):
+    def __init__(
+        self,
+        bbox=(-71.928864, 43.758201, -70.957947, 44.465151),
+        font=None,
+        tile_store=None,
+    ):
         """Initialize RidgeMap.
 
         Parameters
@@ -74,9 +81,12 @@ class RidgeMap:
             http://bboxfinder.com is a useful way to find these tuples.
         font : matplotlib.font_manager.FontProperties
             Optional, a custom font to use. Defaults to Cinzel Regular.
+        tile_store : tile source
+            Optional, where elevation tiles are read from. Defaults to the
+            shared memory-mapped tile store.
         """
         self.bbox = bbox
-        self._srtm_data = srtm.get_data()
+        self._tiles = tile_store if tile_store is not None else get_default_tile_store()
         if font is None:
             font = FontManager().prop
         self.font = font
@@ -101,6 +111,8 @@ class RidgeMap:
         crop=False,
         interpolation=0,
         lock_resolution=False,
+        output_width=None,
+        sample_rotated=False,
     ):
         """Fetch elevation data and return a numpy array.
 
@@ -122,19 +134,51 @@ class RidgeMap:
             Locks the resolution during rotation, ensuring consistent rotation
             deltas but producing potential scaling artifacts. These artifacts
             can be reduced by setting num_lines = elevation_pts.
+        output_width : int or None
+            Width in pixels of the final image (e.g. the SVG width, or figure
+            width times dpi). If given, `elevation_pts` is capped to it, since
+            extra points along a line never reach a pixel.
+        sample_rotated : bool
+            Sample the rotated lattice directly in lat/lon space instead of
+            rotating an axis-aligned image. Elevations are read once at exactly
+            the rotated coordinates (`interpolation` is ignored) and the corners
+            outside the bounding box are NaN without being fetched.
 
         Returns
         -------
         np.ndarray
         """
+        if output_width is not None:
+            elevation_pts = min(elevation_pts, int(output_width))
+
         if (
             45 < (viewpoint_angle % 360) < 135 or 225 < (viewpoint_angle % 360) < 315
         ) and not lock_resolution:
             num_lines, elevation_pts = elevation_pts, num_lines
 
-        values = self._srtm_data.get_image(
-            (elevation_pts, num_lines), self.lats, self.longs, 5280, mode="array"
-        )
+        lat_span = self.lats[1] - self.lats[0]
+        long_span = self.longs[1] - self.longs[0]
+
+        if sample_rotated and viewpoint_angle % 360 != 0:
+            rows, cols, inside = rotated_lattice(
+                (num_lines, elevation_pts), viewpoint_angle, reshape=not crop
+            )
+            values = np.full(rows.shape, np.nan)
+            values[inside] = sample_points(
+                self._tiles,
+                self.lats[0] + rows[inside] / num_lines * lat_span,
+                self.longs[0] + cols[inside] / elevation_pts * long_span,
+            )
+            return values
+
+        # Same lattice as srtm's get_image(mode="array"): the upper edges of
+        # the bounding box are excluded
+        lats = self.lats[0] + np.arange(num_lines) / num_lines * lat_span
+        longs = self.longs[0] + np.arange(elevation_pts) / elevation_pts * long_span
+        values = sample_grid(self._tiles, lats, longs)
+        if sample_rotated:
+            return values
+
         values = rotate(
             values, angle=viewpoint_angle, reshape=not crop, order=interpolation
         )
@@ -297,6 +341,8 @@ class RidgeMap:
         background_color=(0.9255, 0.9098, 0.9255),
         size_scale=20,
         ax=None,
+        simplify=0.25,
+        dpi=None,
     ):
         """Plot the map.
 
@@ -333,6 +379,12 @@ class RidgeMap:
             If you are printing this, make this number bigger.
         ax : matplotlib Axes
             You can pass your own axes!
+        simplify : float
+            Drop points closer than this many output pixels to the simplified
+            line. Use 0 to draw every point.
+        dpi : float or None
+            Resolution the figure will be saved at, which sets the size of an
+            output pixel. Defaults to the figure's own dpi.
 
         Returns
         -------
@@ -349,11 +401,24 @@ class RidgeMap:
 
         x = np.arange(values.shape[1])
         norm = plt.Normalize(np.nanmin(values), np.nanmax(values))
+        ys = values - 6 * np.arange(len(values))[:, None]
+        keep = np.ones(values.shape, dtype=bool)
+        if simplify > 0 and np.isfinite(ys).any():
+            # Output pixels per data unit, from the axes size at the save dpi
+            # and the data extent (lines and the baselines of their fills)
+            fig = ax.figure
+            px_scale = (dpi or fig.dpi) / fig.dpi
+            y_extent = (max(np.nanmax(ys), 0)
+                        - min(np.nanmin(ys), -6 * (len(values) - 1)))
+            scale_x = ax.bbox.width * px_scale / max(values.shape[1] - 1, 1)
+            scale_y = ax.bbox.height * px_scale / max(y_extent, 1e-9)
+            keep = simplify_lines(x * scale_x, ys * scale_y, simplify)
         for idx, row in enumerate(values):
+            line_x, row = x[keep[idx]], row[keep[idx]]
             y_base = -6 * idx * np.ones_like(row)
             y = row + y_base
             if callable(line_color) and kind == "elevation":
-                points = np.array([x, y]).T.reshape((-1, 1, 2))
+                points = np.array([line_x, y]).T.reshape((-1, 1, 2))
                 segments = np.concatenate([points[:-1], points[1:]], axis=1)
                 lines = LineCollection(
                     segments, cmap=line_color, zorder=idx + 1, norm=norm
@@ -367,8 +432,8 @@ class RidgeMap:
                 else:
                     color = line_color
 
-                ax.plot(x, y, "-", color=color, zorder=idx, lw=linewidth)
-            ax.fill_between(x, y_base, y, color=background_color, zorder=idx)
+                ax.plot(line_x, y, "-", color=color, zorder=idx, lw=linewidth)
+            ax.fill_between(line_x, y_base, y, color=background_color, zorder=idx)
 
         if label_color is None:
             if callable(line_color):
@@ -413,6 +478,9 @@ class RidgeMap:
         background_color="#ebeaeb",
         width=1200,
         height=1600,
+        precision=2,
+        compress=None,
+        simplify=0.25,
     ):
         """Save the map as SVG (vector format).
 
@@ -420,8 +488,9 @@ class RidgeMap:
 
         Parameters
         ----------
-        output_path : string
-            Path to save the SVG file
+        output_path : string or file object
+            Path to save the SVG file, or an open file (e.g. io.BytesIO) to
+            stream it to
         values : np.ndarray
             Array of elevations to plot. Defaults to the elevations at the provided
             bounding box.
@@ -445,11 +514,18 @@ class RidgeMap:
             SVG width in pixels
         height : int
             SVG height in pixels
+        precision : int
+            Decimals kept for coordinates
+        compress : bool or None
+            Gzip the output. Defaults to True for paths ending in .svgz
+        simplify : float
+            Drop points closer than this many pixels to the simplified line.
+            Use 0 to write every point.
 
         Returns
         -------
-        string
-            Path to the saved SVG file
+        string or file object
+            output_path
         """
         if values is None:
             values = self.preprocess()
@@ -469,67 +545,54 @@ class RidgeMap:
         if isinstance(label_color, tuple):
             label_color = self._rgb_to_hex(label_color)
 
-        # Create SVG drawing
-        dwg = svgwrite.Drawing(output_path, size=(width, height), profile='full')
-        dwg.add(dwg.rect(insert=(0, 0), size=(width, height), fill=bg_hex))
-
         # Calculate scaling
         num_lines, num_pts = values.shape
         scale_x = width / num_pts
         scale_y = height / (num_lines * 6 + 12)  # Match the matplotlib spacing
 
-        # Draw each ridgeline
-        x = np.arange(num_pts)
-        for idx, row in enumerate(values):
-            y_base = -6 * idx
-            y = row + y_base
-
-            # Convert to SVG coordinates (flip Y axis)
-            svg_points = []
-            for i in range(len(x)):
-                if not np.isnan(y[i]):
-                    svg_x = x[i] * scale_x
-                    svg_y = height - ((y[i] - y_base.min() + 6) * scale_y)
-                    svg_points.append((svg_x, svg_y))
-
-            # Draw line
-            if len(svg_points) >= 2:
-                # Create filled polygon (line + fill)
-                fill_points = svg_points.copy()
-                # Add baseline points to close the polygon
-                fill_points.append((svg_points[-1][0], height - ((y_base - y_base.min() + 6) * scale_y)))
-                fill_points.append((svg_points[0][0], height - ((y_base - y_base.min() + 6) * scale_y)))
-                
-                polygon = dwg.polygon(
-                    points=fill_points,
-                    fill=bg_hex,
-                    stroke=line_color,
-                    stroke_width=linewidth
-                )
-                dwg.add(polygon)
-
-        # Add label
-        if label:
-            # Calculate label position
-            label_svg_x = label_x * width
-            label_svg_y = label_y * height
-            
-            # SVG text (note: multi-line support is basic)
-            lines = label.split('\n')
-            for i, line in enumerate(lines):
-                text = dwg.text(
-                    line,
-                    insert=(label_svg_x, label_svg_y + i * label_size * 1.2),
-                    fill=label_color,
-                    font_size=label_size,
-                    font_family='sans-serif',
-                    font_weight='bold',
-                    text_anchor='middle'
-                )
-                dwg.add(text)
-
-        dwg.save()
-        print(f"✅ SVG saved to: {output_path}")
+        # Line idx sits 6 units below the previous one, as in plot_map; flip
+        # Y so the lowest baseline is 6 units above the bottom edge
+        x = np.arange(num_pts) * scale_x
+        y_base = -6 * np.arange(num_lines)
+        offset = y_base.min() - 6
+        svg_y = height - (values + (y_base - offset)[:, None]) * scale_y
+        svg_base = height - (y_base - offset) * scale_y
+        drawn = ~np.isnan(svg_y)
+        if simplify > 0:
+            drawn &= simplify_lines(x, svg_y, simplify)
+
+        with SVGWriter(output_path, width, height, precision=precision,
+                       compress=compress) as svg:
+            svg.rect(0, 0, width, height, fill=bg_hex)
+
+            # Fill and stroke are shared by every line, so set them once
+            with svg.group(fill=bg_hex, stroke=line_color, stroke_width=linewidth):
+                for idx in range(num_lines):
+                    # Missing samples are skipped, joining the points around them
+                    keep = drawn[idx]
+                    if keep.sum() < 2:
+                        continue
+                    line_x = x[keep]
+
+                    # Filled polygon (line + fill), closed along the baseline
+                    points = np.column_stack([
+                        np.concatenate([line_x, line_x[[-1, 0]]]),
+                        np.concatenate([svg_y[idx, keep], [svg_base[idx]] * 2]),
+                    ])
+                    svg.path([points], closed=True)
+
+            # Add label (one text element per line of the label)
+            if label:
+                label_svg_x = label_x * width
+                label_svg_y = label_y * height
+                for i, line in enumerate(label.split('\n')):
+                    svg.text(line, label_svg_x, label_svg_y + i * label_size * 1.2,
+                             fill=label_color, font_size=label_size,
+                             font_family='sans-serif', font_weight='bold',
+                             text_anchor='middle')
+
+        if isinstance(output_path, str):
+            print(f"✅ SVG saved to: {output_path}")
         return output_path
 
     @staticmethod
@@ -0,0 +1,448 @@
+"""
+Ridge Line Geometry
+
+Array-level helpers shared by the PNG, SVG and halftone renderers.
+"""
+
+from typing import Iterator, List, NamedTuple, Optional, Sequence, Tuple
+
+import numpy as np
+
+
+class ElevationRuns(NamedTuple):
+    """
+    Runs of consecutive above-threshold samples, for every line at once.
+
+    Runs are sorted by line then position; the runs of line ``i`` are
+    ``start[offsets[i]:offsets[i + 1]]`` / ``stop[...]`` (stop exclusive).
+    """
+    line: np.ndarray
+    start: np.ndarray
+    stop: np.ndarray
+    offsets: np.ndarray
+
+    def segments(self, i: int) -> Iterator[Tuple[int, int]]:
+        """Iterate over the (start, stop) runs of line i."""
+        lo, hi = self.offsets[i], self.offsets[i + 1]
+        return zip(self.start[lo:hi].tolist(), self.stop[lo:hi].tolist())
+
+
+def find_runs(values: np.ndarray, threshold: float = 0.0,
+              min_length: int = 2) -> ElevationRuns:
+    """
+    Find all runs where values are above a threshold, row by row.
+
+    Args:
+        values: 2D array, one row per line (a 1D array is treated as one line)
+        threshold: Values must be strictly greater than this to be kept
+        min_length: Shorter runs are dropped (2 is the minimum for a line)
+
+    Returns:
+        ElevationRuns with compact start/stop offsets
+    """
+    values = np.atleast_2d(values)
+    num_lines, width = values.shape
+
+    # Pad each row with False on both sides so every run has an edge at
+    # both ends; diff then marks starts with +1 and stops with -1
+    padded = np.zeros((num_lines, width + 2), dtype=np.int8)
+    padded[:, 1:-1] = values > threshold
+    edges = np.diff(padded, axis=1)
+
+    starts = np.flatnonzero(edges == 1)
+    stops = np.flatnonzero(edges == -1)
+    line = starts // (width + 1)
+    start = starts % (width + 1)
+    stop = stops % (width + 1)
+
+    keep = (stop - start) >= min_length
+    line, start, stop = line[keep], start[keep], stop[keep]
+    offsets = np.searchsorted(line, np.arange(num_lines + 1))
+    return ElevationRuns(line, start, stop, offsets)
+
+
+class RidgeSet(NamedTuple):
+    """
+    Every ridge line of a render in one contiguous block.
+
+    ``heights[i]`` is the rise of line ``i`` above its baseline in units of
+    line spacing (normalized profile × exaggeration × scaling factor), stored
+    as one C-contiguous float32 array. All lines share the x-axis ``x`` (grid
+    columns, 0 to width), and ``runs`` holds the drawn segments of every line
+    in CSR form. ``shape`` is the shape of the full elevation grid.
+
+    Renderers only place the lines (baseline and scale), so the same set can
+    be reused for PNG, SVG and exported profiles.
+    """
+    x: np.ndarray
+    heights: np.ndarray
+    runs: ElevationRuns
+    shape: Tuple[int, int]
+
+    @classmethod
+    def from_profiles(cls, profiles: np.ndarray, raw_profiles: np.ndarray,
+                      shape: Tuple[int, int],
+                      exaggeration: float = 3.0,
+                      scaling_factors: Optional[Sequence[float]] = None,
+                      skip_zero_elevation: bool = True) -> "RidgeSet":
+        """
+        Build a ridge set from the processed rows drawn as lines.
+
+        Args:
+            profiles: Normalized (0-1) rows, one per line
+            raw_profiles: Smoothed elevation rows in meters, for sea masking
+            shape: Shape of the full elevation grid
+            exaggeration: Vertical exaggeration factor
+            scaling_factors: Optional per-line scaling factors (length must match)
+            skip_zero_elevation: Only keep runs where elevation > 0
+
+        Returns:
+            RidgeSet
+        """
+        num_lines, width = profiles.shape
+        if scaling_factors is None:
+            scaling_factors = np.ones(num_lines)
+        elif len(scaling_factors) != num_lines:
+            raise ValueError(f"scaling_factors length ({len(scaling_factors)}) "
+                             f"must match num_lines ({num_lines})")
+
+        heights = np.empty((num_lines, width), dtype=np.float32)
+        np.multiply(profiles, exaggeration * np.asarray(scaling_factors, dtype=float)[:, None],
+                    out=heights, casting='same_kind')
+
+        runs = find_runs(raw_profiles) if skip_zero_elevation else full_runs(num_lines, width)
+        x = np.linspace(0, width, width, dtype=np.float32)
+        return cls(x, heights, runs, tuple(shape))
+
+    @property
+    def num_lines(self) -> int:
+        """Number of ridge lines."""
+        return len(self.heights)
+
+    def place(self, baselines: np.ndarray, scale: float = 1.0) -> np.ndarray:
+        """
+        Absolute y of every sample, rising (decreasing y) from each baseline.
+
+        Args:
+            baselines: y of each line's baseline
+            scale: Output units per line-spacing unit
+
+        Returns:
+            2D array of y coordinates, one row per line
+        """
+        return np.asarray(baselines)[:, None] - self.heights * scale
+
+    def lines(self) -> List[Tuple[np.ndarray, np.ndarray]]:
+        """(x, heights) views of every full line."""
+        return [(self.x, row) for row in self.heights]
+
+
+def full_runs(num_lines: int, width: int) -> ElevationRuns:
+    """
+    Runs covering every line end to end (no sea masking).
+
+    Args:
+        num_lines: Number of lines
+        width: Number of samples per line
+
+    Returns:
+        ElevationRuns with one full-width run per line
+    """
+    line = np.arange(num_lines)
+    return ElevationRuns(line, np.zeros(num_lines, dtype=int),
+                         np.full(num_lines, width), np.arange(num_lines + 1))
+
+
+def run_columns(runs: ElevationRuns,
+                keep: Optional[np.ndarray] = None) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Flat column indices of the samples drawn in every run.
+
+    Args:
+        runs: Runs to expand
+        keep: Optional boolean mask (num_lines, width) of the samples to keep,
+            e.g. from simplify_runs; the first and last sample of every run
+            must be kept
+
+    Returns:
+        Tuple of (columns, run_offsets), where the columns of run k are
+        ``columns[run_offsets[k]:run_offsets[k + 1]]``
+    """
+    lengths = runs.stop - runs.start
+    run_id = np.repeat(np.arange(len(lengths)), lengths)
+    columns = np.arange(run_id.size) - np.repeat(np.cumsum(lengths) - lengths, lengths)
+    columns += runs.start[run_id]
+
+    if keep is not None:
+        kept = keep[runs.line[run_id], columns]
+        run_id, columns = run_id[kept], columns[kept]
+        lengths = np.bincount(run_id, minlength=len(lengths))
+    return columns, np.concatenate([[0], np.cumsum(lengths)])
+
+
+def simplify_runs(x: np.ndarray, y: np.ndarray, runs: ElevationRuns,
+                  tolerance: float) -> np.ndarray:
+    """
+    Ramer-Douglas-Peucker simplification of every run at once.
+
+    All runs are refined together, one subdivision level per pass, so the
+    number of Python iterations is the depth of the recursion, not the
+    number of lines.
+
+    Args:
+        x: 1D x coordinates shared by all lines, in output units (e.g. pixels)
+        y: 2D y coordinates, one row per line, in the same units
+        runs: Runs to simplify
+        tolerance: Largest allowed distance between a dropped sample and the
+            simplified line
+
+    Returns:
+        Boolean mask (num_lines, width) of the samples to keep
+    """
+    keep = np.zeros(y.shape, dtype=bool)
+    keep[runs.line, runs.start] = True
+    keep[runs.line, runs.stop - 1] = True
+
+    # Open intervals (lo, hi) whose interior samples are still undecided
+    line, lo, hi = runs.line, runs.start, runs.stop - 1
+    while len(lo):
+        interior = hi - lo - 1
+        pending = interior > 0
+        line, lo, hi, interior = line[pending], lo[pending], hi[pending], interior[pending]
+        if not len(lo):
+            break
+
+        interval = np.repeat(np.arange(len(lo)), interior)
+        starts_at = np.cumsum(interior) - interior
+        col = lo[interval] + 1 + np.arange(interval.size) - starts_at[interval]
+
+        # Distance of every interior sample to its interval's chord
+        x0, y0 = x[lo], y[line, lo]
+        dx, dy = x[hi] - x0, y[line, hi] - y0
+        chord = np.hypot(dx, dy)
+        chord[chord == 0] = 1
+        dist = np.abs(dx[interval] * (y[line[interval], col] - y0[interval])
+                      - dy[interval] * (x[col] - x0[interval])) / chord[interval]
+
+        # Split every interval at its farthest sample if that is out of tolerance
+        farthest = np.maximum.reduceat(dist, starts_at)
+        is_max = dist == farthest[interval]
+        first = np.flatnonzero(is_max)
+        first = first[np.concatenate([[True], interval[first][1:] != interval[first][:-1]])]
+        split_col = col[first]
+
+        split = farthest > tolerance
+        line, lo, hi, split_col = line[split], lo[split], hi[split], split_col[split]
+        keep[line, split_col] = True
+        line = np.concatenate([line, line])
+        lo, hi = np.concatenate([lo, split_col]), np.concatenate([split_col, hi])
+
+    return keep
+
+
+def simplify_lines(x: np.ndarray, y: np.ndarray, tolerance: float) -> np.ndarray:
+    """
+    Simplify whole lines that may contain missing (NaN) samples.
+
+    Every finite stretch is simplified on its own; NaN samples are kept so
+    plotting still breaks the line there.
+
+    Args:
+        x: 1D x coordinates shared by all lines, in output units
+        y: 2D y coordinates, one row per line, in the same units
+        tolerance: Largest allowed deviation
+
+    Returns:
+        Boolean mask of the samples to keep
+    """
+    finite = np.isfinite(y)
+    runs = find_runs(finite.astype(np.int8), threshold=0, min_length=1)
+    return simplify_runs(x, np.where(finite, y, 0.0), runs, tolerance) | ~finite
+
+
+def fill_polygons(x: np.ndarray, y: np.ndarray, base: np.ndarray,
+                  runs: ElevationRuns,
+                  keep: Optional[np.ndarray] = None) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Build closed fill polygons under every run, as flat vertex/code arrays.
+
+    Each run becomes MOVETO (start, base), LINETO along the profile, LINETO
+    (end, base) and CLOSEPOLY, matching matplotlib.path.Path codes.
+
+    Args:
+        x: 1D x coordinates shared by all lines
+        y: 2D y coordinates, one row per line
+        base: Baseline y of each line
+        runs: Runs to fill
+        keep: Optional mask of the samples to draw (see run_columns)
+
+    Returns:
+        Tuple of (vertices (N, 2), codes (N,), line_offsets), where the
+        vertices of line i are ``vertices[line_offsets[i]:line_offsets[i + 1]]``
+    """
+    from matplotlib.path import Path
+
+    columns, column_offsets = run_columns(runs, keep)
+    lengths = np.diff(column_offsets)
+    counts = lengths + 3
+    starts_at = np.concatenate([[0], np.cumsum(counts)])
+    total = int(starts_at[-1])
+
+    run_id = np.repeat(np.arange(len(lengths)), counts)
+    local = np.arange(total) - starts_at[:-1][run_id]
+    run_len = lengths[run_id]
+    run_line = runs.line[run_id]
+
+    # Vertex k of a run is its profile sample k - 1; the baseline vertices
+    # at both ends reuse the first/last sample's x
+    profile_index = column_offsets[:-1][run_id] + np.clip(local - 1, 0, run_len - 1)
+    closing = local == run_len + 2
+    profile_index[closing] = column_offsets[:-1][run_id][closing]
+    col = columns[profile_index]
+    on_profile = (local >= 1) & (local <= run_len)
+
+    vertices = np.empty((total, 2))
+    vertices[:, 0] = x[col]
+    vertices[:, 1] = np.where(on_profile, y[run_line, col], base[run_line])
+
+    codes = np.full(total, Path.LINETO, dtype=Path.code_type)
+    codes[local == 0] = Path.MOVETO
+    codes[closing] = Path.CLOSEPOLY
+
+    line_offsets = starts_at[runs.offsets]
+    return vertices, codes, line_offsets
+
+
+def line_segments(x: np.ndarray, y: np.ndarray, runs: ElevationRuns,
+                  keep: Optional[np.ndarray] = None,
+                  endpoints: Optional[Tuple[np.ndarray, np.ndarray]] = None) -> List[np.ndarray]:
+    """
+    Cut every run into an (n, 2) polyline array.
+
+    Args:
+        x: 1D x coordinates shared by all lines
+        y: 2D y coordinates, one row per line
+        runs: Runs to extract
+        keep: Optional mask of the samples to draw (see run_columns)
+        endpoints: Optional (first, last) (K, 2) arrays replacing the first
+            and last point of every run (see horizon_clip)
+
+    Returns:
+        List of polylines in run order
+    """
+    columns, offsets = run_columns(runs, keep)
+    lines = np.repeat(runs.line, np.diff(offsets))
+    points = np.column_stack([x[columns], y[lines, columns]])
+    if endpoints is not None:
+        points[offsets[:-1]] = endpoints[0]
+        points[offsets[1:] - 1] = endpoints[1]
+    return np.split(points, offsets[1:-1])
+
+
+class VisibleRuns(NamedTuple):
+    """
+    Visible parts of every ridge line after hidden-line removal.
+
+    ``runs`` index the sample grid and include the hidden sample just past
+    each visible stretch where it meets a nearer ridge; ``first`` and
+    ``last`` are the exact (x, y) crossing points that replace those
+    samples when drawing.
+    """
+    runs: ElevationRuns
+    first: np.ndarray
+    last: np.ndarray
+
+
+def horizon_clip(x: np.ndarray, y: np.ndarray, runs: ElevationRuns,
+                 front_to_back: Sequence[int],
+                 fill_edges: Optional[np.ndarray] = None) -> VisibleRuns:
+    """
+    Remove the parts of every ridge hidden behind the ridges in front of it.
+
+    Ridges rise towards smaller y and each one hides what lies between its
+    profile and its fill edge (the bottom of the drawing by default). Without
+    fill edges, lines are visited front to back while a horizon buffer keeps
+    the running maximum height of the ridges already passed, and a sample is
+    visible when it rises above that horizon. With fill edges, a sample is
+    visible when it lies outside the fill of every line in front, so it can
+    show through the gap between two fills. Only drawn runs occlude, so sea
+    gaps let the lines behind show through.
+
+    Args:
+        x: 1D x coordinates shared by all lines
+        y: 2D y coordinates, one row per line
+        runs: Drawn runs of every line
+        front_to_back: Line indices ordered from nearest to farthest
+        fill_edges: Optional y where the fill of each line stops
+
+    Returns:
+        VisibleRuns
+    """
+    order = np.asarray(front_to_back)
+    columns, offsets = run_columns(runs)
+    drawn = np.zeros(y.shape, dtype=bool)
+    drawn[np.repeat(runs.line, np.diff(offsets)), columns] = True
+
+    # Heights grow upwards; undrawn samples never occlude
+    height = np.where(drawn, -y, -np.inf)
+    if fill_edges is None:
+        # Fills reach the bottom, so the lines in front hide everything
+        # below their running maximum
+        horizon = np.full(y.shape, -np.inf)
+        horizon[order[1:]] = np.maximum.accumulate(height[order], axis=0)[:-1]
+        # Undrawn behind undrawn (e.g. a shared sea gap) gives NaN, never visible
+        with np.errstate(invalid='ignore'):
+            margin = height - horizon
+    else:
+        # Fills in front need not touch, so each one is tested on its own:
+        # cover is positive inside a fill, and the gaps between fills stay visible
+        edge_height = -np.asarray(fill_edges, dtype=float)
+        cover = np.full(y.shape, -np.inf)
+        with np.errstate(invalid='ignore'):
+            for i, front in enumerate(order[:-1]):
+                behind = order[i + 1:]
+                inside = np.minimum(height[front] - height[behind],
+                                    height[behind] - edge_height[front])
+                cover[behind] = np.fmax(cover[behind], inside)
+        margin = -cover
+
+    # Positive where visible, with a zero crossing where the line disappears
+    visible = drawn & (margin > 0)
+
+    vis = find_runs(visible.astype(np.int8), threshold=0, min_length=1)
+    line, start, stop = vis.line, vis.start.copy(), vis.stop.copy()
+
+    # Reach back to the hidden neighbour where a visible stretch meets a
+    # nearer ridge, and put the end point on the crossing
+    width = y.shape[1]
+    first = np.column_stack([x[start], y[line, start]]).astype(float)
+    last = np.column_stack([x[stop - 1], y[line, stop - 1]]).astype(float)
+
+    before = (start > 0) & drawn[line, np.maximum(start - 1, 0)]
+    b = np.flatnonzero(before)
+    start[b] -= 1
+    first[b] = _crossing(x, y, margin, line[b], start[b], start[b] + 1)
+
+    after = (stop < width) & drawn[line, np.minimum(stop, width - 1)]
+    a = np.flatnonzero(after)
+    stop[a] += 1
+    last[a] = _crossing(x, y, margin, line[a], stop[a] - 1, stop[a] - 2)
+
+    # Runs of a single visible sample are only drawable once extended
+    drawable = stop - start >= 2
+    line, start, stop = line[drawable], start[drawable], stop[drawable]
+    offsets = np.searchsorted(line, np.arange(y.shape[0] + 1))
+    return VisibleRuns(ElevationRuns(line, start, stop, offsets),
+                       first[drawable], last[drawable])
+
+
+def _crossing(x: np.ndarray, y: np.ndarray, margin: np.ndarray, line: np.ndarray,
+              hidden: np.ndarray, shown: np.ndarray) -> np.ndarray:
+    """Point between a hidden and a visible sample where the visibility margin is zero."""
+    d_hidden, d_shown = margin[line, hidden], margin[line, shown]
+    with np.errstate(invalid='ignore'):
+        t = np.nan_to_num(d_hidden / (d_hidden - d_shown), nan=0.0)
+    t = np.clip(t, 0.0, 1.0)
+    px = x[hidden] + t * (x[shown] - x[hidden])
+    py = y[line, hidden] + t * (y[line, shown] - y[line, hidden])
+    return np.column_stack([px, py])
@@ -0,0 +1,314 @@
+"""
+Streaming SVG Writer
+
+Writes SVG elements straight to a file or stream instead of building an
+in-memory document first. Point lists are formatted from NumPy arrays a
+chunk at a time, so memory stays bounded however many lines are drawn.
+
+Coordinates are quantized to a fixed number of decimals, and paths are
+encoded with relative commands (``l``, ``h``, ``v``) on the quantized grid,
+so rounding errors never accumulate along a line.
+"""
+
+import gzip
+import io
+from contextlib import contextmanager
+from functools import lru_cache
+from typing import IO, Iterable, Iterator, List, Optional, Union
+from xml.sax.saxutils import escape, quoteattr
+
+import numpy as np
+
+
+# Highest supported precision (the fraction lookup table has 10**p entries)
+MAX_PRECISION = 6
+
+
+@lru_cache(maxsize=None)
+def _fractions(precision: int) -> np.ndarray:
+    """Fractional parts '.5', '.25', ... indexed by numerator over 10**precision."""
+    return np.array([""] + [("." + f"{n:0{precision}d}").rstrip("0")
+                            for n in range(1, 10 ** precision)], dtype=object)
+
+
+def format_numbers(values: np.ndarray, precision: int) -> List[str]:
+    """
+    Format numbers with at most ``precision`` decimals, as compactly as SVG allows.
+
+    Trailing zeros, the leading zero of fractions ("0.5" -> ".5") and the
+    sign of zero are dropped.
+
+    Args:
+        values: 1D array of numbers
+        precision: Number of decimals kept (0 to MAX_PRECISION)
+
+    Returns:
+        List of number strings
+    """
+    if not 0 <= precision <= MAX_PRECISION:
+        raise ValueError(f"precision must be between 0 and {MAX_PRECISION}, got {precision}")
+    values = np.asarray(values, dtype=float).ravel()
+    if len(values) == 0:
+        return []
+
+    scale = 10 ** precision
+    quantized = np.round(values * scale).astype(np.int64)
+    whole, fraction = np.divmod(np.abs(quantized), scale)
+
+    signs = np.where(quantized < 0, "-", "").astype(object)
+    wholes = np.array((("%d " * len(whole))[:-1] % tuple(whole.tolist())).split(" "),
+                      dtype=object)
+    wholes[(whole == 0) & (fraction != 0)] = ""
+    parts = np.column_stack([signs, wholes, _fractions(precision)[fraction]])
+    return (("%s%s%s " * len(values))[:-1] % tuple(parts.ravel().tolist())).split(" ")
+
+
+def _step_templates() -> np.ndarray:
+    """
+    Format templates for relative path steps.
+
+    Indexed by ``kind * 8 + repeat * 4 + first_negative * 2 + second_negative``
+    where kind is 0 (h), 1 (v) or 2 (l). A repeated command letter is left
+    out, and no separator is needed before a minus sign.
+    """
+    templates = []
+    for kind in "hvl":
+        for repeat in (False, True):
+            for first_negative in (False, True):
+                for second_negative in (False, True):
+                    if repeat:
+                        template = ("" if first_negative else " ") + "%s"
+                    else:
+                        template = kind + "%s"
+                    if kind == "l":
+                        template += ("" if second_negative else " ") + "%s"
+                    templates.append(template)
+    return np.array(templates, dtype=object)
+
+
+_STEP_TEMPLATES = _step_templates()
+
+
+class SVGWriter:
+    """
+    Minimal streaming SVG writer.
+
+    Attribute keyword arguments follow svgwrite's convention: underscores
+    become dashes (``stroke_width`` -> ``stroke-width``). Paths ending in
+    ``.svgz`` are gzip-compressed.
+
+    Example:
+        with SVGWriter("map.svgz", 1200, 1600, precision=2) as svg:
+            svg.rect(0, 0, 1200, 1600, fill="black")
+            svg.path([points], stroke="white", fill="none")
+    """
+
+    def __init__(self, target: Union[str, IO], width: float, height: float,
+                 chunk_size: int = 4096,
+                 precision: int = 3,
+                 compress: Optional[bool] = None):
+        """
+        Initialize the writer.
+
+        Args:
+            target: Output path, or an open text or binary file object
+                (e.g. io.BytesIO); file objects are left open
+            width: Drawing width in pixels
+            height: Drawing height in pixels
+            chunk_size: Number of points formatted per write
+            precision: Decimals kept for coordinates
+            compress: Gzip the output (default: only for .svgz paths);
+                needs a binary target
+        """
+        self.target = target
+        self.width = width
+        self.height = height
+        self.chunk_size = chunk_size
+        self.precision = precision
+        if compress is None:
+            compress = isinstance(target, str) and target.lower().endswith(".svgz")
+        self.compress = compress
+        self._file = None
+        self._owns_file = False
+        self._gzip_target = None
+        self._binary = False
+
+    def __enter__(self) -> "SVGWriter":
+        self.open()
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        self.close()
+
+    def open(self) -> None:
+        """Open the target and write the document header."""
+        if isinstance(self.target, str):
+            self._file = open(self.target, "wb")
+            self._owns_file = True
+        else:
+            self._file = self.target
+        if self.compress:
+            # Closing the gzip stream flushes it without closing the target
+            self._gzip_target = self._file if self._owns_file else None
+            self._file = gzip.GzipFile(fileobj=self._file, mode="wb")
+            self._owns_file = True
+        self._binary = not isinstance(self._file, io.TextIOBase)
+
+        self._write('<?xml version="1.0" encoding="utf-8" ?>\n'
+                    '<svg xmlns="http://www.w3.org/2000/svg" '
+                    'xmlns:xlink="http://www.w3.org/1999/xlink" '
+                    f'version="1.1" baseProfile="full" '
+                    f'width="{self.width}" height="{self.height}">\n')
+
+    def close(self) -> None:
+        """Write the closing tag and close the target if it was opened here."""
+        if self._file is None:
+            return
+        self._write("</svg>\n")
+        if self._owns_file:
+            self._file.close()
+        if self._gzip_target is not None:
+            self._gzip_target.close()
+        self._file = None
+
+    def _write(self, text: str) -> None:
+        self._file.write(text.encode("utf-8") if self._binary else text)
+
+    @staticmethod
+    def _attrs(attrs: dict) -> str:
+        return "".join(f" {key.replace('_', '-')}={quoteattr(str(value))}"
+                       for key, value in attrs.items() if value is not None)
+
+    def _points(self, points: np.ndarray) -> None:
+        """Write an (n, 2) array as 'x,y x,y ...', one chunk at a time."""
+        points = np.asarray(points, dtype=float).reshape(-1, 2)
+        for lo in range(0, len(points), self.chunk_size):
+            numbers = format_numbers(points[lo:lo + self.chunk_size].ravel(), self.precision)
+            text = " ".join(f"{x},{y}" for x, y in zip(numbers[::2], numbers[1::2]))
+            self._write(text if lo == 0 else " " + text)
+
+    def _path_data(self, points: np.ndarray, closed: bool) -> Iterator[str]:
+        """
+        Encode one subpath as an absolute move followed by relative segments.
+
+        Steps are taken between quantized points, so the path ends exactly
+        where the absolute coordinates would put it.
+        """
+        scale = 10 ** self.precision
+        quantized = np.round(np.asarray(points, dtype=float).reshape(-1, 2) * scale)
+        x0, y0 = format_numbers(quantized[0] / scale, self.precision)
+        yield f"M{x0}{'' if y0[0] == '-' else ' '}{y0}"
+
+        steps = np.diff(quantized, axis=0)
+        command = -1
+        for lo in range(0, len(steps), self.chunk_size):
+            chunk = steps[lo:lo + self.chunk_size]
+            # Points that quantize onto their predecessor add nothing
+            chunk = chunk[np.any(chunk != 0, axis=1)]
+            if len(chunk) == 0:
+                continue
+
+            # h for horizontal steps, v for vertical ones, l otherwise
+            kind = np.where(chunk[:, 1] == 0, 0, np.where(chunk[:, 0] == 0, 1, 2))
+            repeat = kind == np.concatenate([[command], kind[:-1]])
+            first_negative = np.where(kind == 1, chunk[:, 1], chunk[:, 0]) < 0
+            second_negative = chunk[:, 1] < 0
+            templates = _STEP_TEMPLATES[kind * 8 + repeat * 4
+                                        + first_negative * 2 + second_negative]
+
+            numbers = np.array(format_numbers(chunk.ravel() / scale, self.precision),
+                               dtype=object).reshape(-1, 2)
+            used = np.column_stack([kind != 1, kind != 0])
+            yield "".join(templates.tolist()) % tuple(numbers[used].tolist())
+            command = kind[-1]
+        if closed:
+            yield "z"
+
+    def _poly(self, tag: str, points: np.ndarray, attrs: dict) -> None:
+        self._write(f'<{tag} points="')
+        self._points(points)
+        self._write(f'"{self._attrs(attrs)} />\n')
+
+    def rect(self, x: float, y: float, width: float, height: float, **attrs) -> None:
+        """Write a rectangle."""
+        self._write(f'<rect x="{x}" y="{y}" width="{width}" height="{height}"'
+                    f'{self._attrs(attrs)} />\n')
+
+    def polyline(self, points: np.ndarray, **attrs) -> None:
+        """Write an open polyline through an (n, 2) array of points."""
+        self._poly("polyline", points, attrs)
+
+    def polygon(self, points: np.ndarray, **attrs) -> None:
+        """Write a closed polygon through an (n, 2) array of points."""
+        self._poly("polygon", points, attrs)
+
+    def path(self, subpaths: Iterable[np.ndarray], closed: bool = False, **attrs) -> None:
+        """
+        Write one path made of several (n, 2) point arrays.
+
+        Args:
+            subpaths: Point arrays, each starting a new subpath
+            closed: Close every subpath back to its first point
+            **attrs: Element attributes
+        """
+        self._write('<path d="')
+        for subpath in subpaths:
+            for text in self._path_data(subpath, closed):
+                self._write(text)
+        self._write(f'"{self._attrs(attrs)} />\n')
+
+    @contextmanager
+    def group(self, **attrs) -> Iterator["SVGWriter"]:
+        """Write a <g> element; attributes are inherited by its children."""
+        self._write(f"<g{self._attrs(attrs)}>\n")
+        yield self
+        self._write("</g>\n")
+
+    @contextmanager
+    def defs(self) -> Iterator["SVGWriter"]:
+        """Write a <defs> element holding reusable definitions."""
+        self._write("<defs>\n")
+        yield self
+        self._write("</defs>\n")
+
+    @contextmanager
+    def symbol(self, id: str, **attrs) -> Iterator["SVGWriter"]:
+        """
+        Write a <symbol> drawn around its own origin.
+
+        Overflow is left visible, so the symbol needs no viewBox and every
+        <use> simply translates it.
+        """
+        self._write(f'<symbol id="{id}" overflow="visible"{self._attrs(attrs)}>\n')
+        yield self
+        self._write("</symbol>\n")
+
+    @contextmanager
+    def clip_path(self, id: str) -> Iterator["SVGWriter"]:
+        """Write a <clipPath>; its children are the clipping shapes."""
+        self._write(f'<clipPath id="{id}">\n')
+        yield self
+        self._write("</clipPath>\n")
+
+    def circle(self, cx: float, cy: float, r: float, **attrs) -> None:
+        """Write a circle."""
+        cx, cy, r = format_numbers(np.array([cx, cy, r]), self.precision)
+        self._write(f'<circle cx="{cx}" cy="{cy}" r="{r}"{self._attrs(attrs)} />\n')
+
+    def uses(self, id: str, points: np.ndarray) -> None:
+        """
+        Write one <use> reference to a symbol per point, a chunk at a time.
+
+        Args:
+            id: Symbol id
+            points: (n, 2) array of positions
+        """
+        points = np.asarray(points, dtype=float).reshape(-1, 2)
+        template = f'<use xlink:href="#{id}" x="%s" y="%s"/>\n'
+        for lo in range(0, len(points), self.chunk_size):
+            numbers = format_numbers(points[lo:lo + self.chunk_size].ravel(), self.precision)
+            self._write((template * (len(numbers) // 2)) % tuple(numbers))
+
+    def text(self, text: str, x: float, y: float, **attrs) -> None:
+        """Write a single line of text."""
+        self._write(f'<text x="{x}" y="{y}"{self._attrs(attrs)}>{escape(text)}</text>\n')
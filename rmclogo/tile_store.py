@@ -0,0 +1,128 @@
+"""
+Memory-Mapped SRTM Tile Store
+
+Decompresses each SRTM .hgt tile once into a raw native-endian int16 file
+and serves it through ``np.memmap``. Every process opening the same tile
+shares the operating system's page cache instead of holding a private
+decoded copy.
+"""
+
+import os
+import threading
+from collections import OrderedDict
+from typing import Optional
+
+import numpy as np
+
+from .elevation import decode_hgt
+
+
+DEFAULT_CACHE_DIR = os.environ.get(
+    "RMCLOGO_CACHE_DIR",
+    os.path.join(os.path.expanduser("~"), ".cache", "rmclogo"),
+)
+
+
+class MemmapTileStore:
+    """
+    Tile source backed by memory-mapped raw tiles on disk.
+
+    Open tiles are kept in a bounded LRU keyed by tile name; tiles evicted
+    from it are simply unmapped and reopened on the next access.
+    """
+
+    def __init__(self, data_handler=None, cache_dir: Optional[str] = None,
+                 max_open_tiles: int = 16):
+        """
+        Initialize the tile store.
+
+        Args:
+            data_handler: Object returned by ``srtm.get_data()``, used to
+                locate and download missing tiles (created lazily if None)
+            cache_dir: Root cache directory (tiles go in its ``tiles`` folder)
+            max_open_tiles: Maximum number of tiles kept mapped at once
+        """
+        self._data_handler = data_handler
+        self.tile_dir = os.path.join(cache_dir or DEFAULT_CACHE_DIR, "tiles")
+        self.max_open_tiles = max_open_tiles
+        self._open_tiles: "OrderedDict[str, Optional[np.ndarray]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    @property
+    def data_handler(self):
+        """SRTM data handler, created on first use."""
+        if self._data_handler is None:
+            import srtm
+            self._data_handler = srtm.get_data()
+        return self._data_handler
+
+    def get_tile(self, tile_lat: int, tile_lon: int) -> Optional[np.ndarray]:
+        """
+        Get the tile whose south-west corner is at (tile_lat, tile_lon).
+
+        Args:
+            tile_lat, tile_lon: Integer coordinates of the tile corner
+
+        Returns:
+            Read-only memory-mapped int16 array, or None if no tile covers
+            this area
+        """
+        file_name = self.data_handler.get_file_name(tile_lat + 0.5, tile_lon + 0.5)
+
+        with self._lock:
+            if file_name in self._open_tiles:
+                self._open_tiles.move_to_end(file_name)
+                return self._open_tiles[file_name]
+
+        tile = None
+        if file_name is not None:
+            raw_path = os.path.join(self.tile_dir, file_name.replace(".hgt", ".i16"))
+            if not os.path.exists(raw_path):
+                try:
+                    self._write_raw_tile(file_name, raw_path)
+                except Exception:
+                    # Download errors are not cached so the next call retries
+                    return None
+            tile = self._open_raw_tile(raw_path)
+
+        with self._lock:
+            self._open_tiles[file_name] = tile
+            self._open_tiles.move_to_end(file_name)
+            while len(self._open_tiles) > self.max_open_tiles:
+                self._open_tiles.popitem(last=False)
+
+        return tile
+
+    def _write_raw_tile(self, file_name: str, raw_path: str) -> None:
+        """Decompress a tile once and store it as raw native int16."""
+        data = self.data_handler.retrieve_or_load_file_data(file_name)
+        if not data:
+            raise IOError(f"Could not retrieve {file_name}")
+
+        os.makedirs(self.tile_dir, exist_ok=True)
+        # Write then rename so concurrent workers never map a partial file
+        tmp_path = f"{raw_path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        decode_hgt(data).astype(np.int16).tofile(tmp_path)
+        os.replace(tmp_path, raw_path)
+
+    @staticmethod
+    def _open_raw_tile(raw_path: str) -> np.ndarray:
+        """Map a raw tile file read-only."""
+        side = int(round(np.sqrt(os.path.getsize(raw_path) / 2)))
+        return np.memmap(raw_path, dtype=np.int16, mode="r", shape=(side, side))
+
+
+_default_store: Optional[MemmapTileStore] = None
+
+
+def get_default_tile_store() -> MemmapTileStore:
+    """
+    Get the process-wide tile store shared by all generators and maps.
+
+    Returns:
+        MemmapTileStore using the default cache directory
+    """
+    global _default_store
+    if _default_store is None:
+        _default_store = MemmapTileStore()
+    return _default_store
@@ -0,0 +1,123 @@
+"""Tests for the persistent elevation matrix and GPX caches."""
+
+import os
+
+import numpy as np
+
+from rmclogo import TopomapGenerator
+from rmclogo.cache import ElevationCache, GPXCache
+
+
+class CountingTiles:
+    """Flat synthetic terrain that counts tile requests."""
+
+    def __init__(self):
+        self.requests = 0
+
+    def get_tile(self, tile_lat, tile_lon):
+        self.requests += 1
+        return np.arange(121 * 121, dtype=np.int16).reshape(121, 121) % 1500
+
+
+def test_round_trip_and_counters(tmp_path):
+    cache = ElevationCache(str(tmp_path))
+    key = cache.key(43.0, 43.1, 5.0, 5.1, (3, 4))
+    matrix = np.arange(12, dtype=float).reshape(3, 4)
+
+    assert cache.get(key) is None
+    cache.put(key, matrix)
+    loaded = cache.get(key)
+
+    np.testing.assert_array_equal(loaded, matrix)
+    assert isinstance(loaded, np.memmap)
+    assert cache.stats()["hits"] == 1
+    assert cache.stats()["misses"] == 1
+    assert cache.key(43.0, 43.1, 5.0, 5.1, (3, 5)) != key
+
+
+def test_eviction_drops_least_recently_used(tmp_path):
+    cache = ElevationCache(str(tmp_path), max_bytes=3000)
+    keys = [cache.key(i, i + 1, 0, 1, (10, 10)) for i in range(3)]
+
+    for age, key in enumerate(keys):
+        cache.put(key, np.zeros((10, 10)))
+        os.utime(cache.path_for(key), (age, age))
+
+    cache.put(cache.key(9, 10, 0, 1, (10, 10)), np.zeros((10, 10)))
+
+    assert not os.path.exists(cache.path_for(keys[0]))
+    assert os.path.exists(cache.path_for(keys[2]))
+    assert cache.stats()["bytes"] <= 3000
+
+
+def test_generator_reuses_cached_matrix(tmp_path):
+    tiles = CountingTiles()
+    generator = TopomapGenerator(output_dir=str(tmp_path / "out"), tile_store=tiles)
+    generator.elevation_cache = ElevationCache(str(tmp_path / "cache"))
+
+    first = generator.get_elevation_matrix(43.1, 43.2, 5.1, 5.2, resolution=20)
+    requests = tiles.requests
+    second = generator.get_elevation_matrix(43.1, 43.2, 5.1, 5.2, resolution=20)
+
+    np.testing.assert_array_equal(first, second)
+    assert tiles.requests == requests
+    assert generator.elevation_cache.hits == 1
+
+
+def test_row_band_renders_hit_the_cache(tmp_path):
+    tiles = CountingTiles()
+    generator = TopomapGenerator(output_dir=str(tmp_path / "out"), tile_store=tiles)
+    generator.elevation_cache = ElevationCache(str(tmp_path / "cache"))
+
+    params = dict(size_km=10, resolution=60, num_lines=12, figsize=(2, 2), dpi=30)
+    generator.generate(43.5, 5.5, output_filename="a.png", **params)
+    requests = tiles.requests
+    generator.generate(43.5, 5.5, output_filename="b.png", line_color='gold', **params)
+
+    assert tiles.requests == requests
+    assert generator.elevation_cache.hits == 1
+
+    # Cached bands draw exactly what freshly sampled ones did
+    generator.generate(43.5, 5.5, output_filename="c.png", **params)
+    with open(tmp_path / "out" / "a.png", "rb") as a, open(tmp_path / "out" / "c.png", "rb") as c:
+        assert a.read() == c.read()
+
+
+def test_tile_sources_do_not_share_entries(tmp_path):
+    class OtherTiles(CountingTiles):
+        def get_tile(self, tile_lat, tile_lon):
+            return super().get_tile(tile_lat, tile_lon) + 100
+
+    matrices = []
+    for tiles in (CountingTiles(), OtherTiles()):
+        generator = TopomapGenerator(output_dir=str(tmp_path / "out"), tile_store=tiles)
+        generator.elevation_cache = ElevationCache(str(tmp_path / "cache"))
+        matrices.append(generator.get_elevation_matrix(43.1, 43.2, 5.1, 5.2, resolution=20))
+        assert tiles.requests > 0
+
+    np.testing.assert_array_equal(matrices[1], matrices[0] + 100)
+
+
+def test_gpx_cache_round_trip_and_invalidation(tmp_path):
+    gpx = tmp_path / "track.gpx"
+    gpx.write_text('<gpx><trk><trkseg><trkpt lat="43.1" lon="5.1"><ele>3</ele></trkpt>'
+                   '<trkpt lat="43.2" lon="5.2"/></trkseg></trk></gpx>')
+    generator = TopomapGenerator(output_dir=str(tmp_path / "out"), tile_store=CountingTiles())
+    generator.elevation_cache = None
+    generator.gpx_cache = GPXCache(str(tmp_path / "cache"))
+
+    first = generator.load_gpx_arrays(str(gpx))
+    second = generator.load_gpx_arrays(str(gpx))
+    for a, b in zip(first, second):
+        np.testing.assert_array_equal(a, b)
+    assert generator.gpx_cache.stats()["hits"] == 1
+
+    # Bypassing the cache neither reads nor writes it
+    generator.load_gpx_arrays(str(gpx), use_cache=False)
+    assert generator.gpx_cache.stats()["hits"] == 1
+
+    # Editing the file changes its key
+    key = generator.gpx_cache.key(str(gpx))
+    gpx.write_text(gpx.read_text().replace("43.2", "43.3"))
+    assert generator.gpx_cache.key(str(gpx)) != key
+    assert generator.load_gpx_track(str(gpx))[-1] == (43.3, 5.2)
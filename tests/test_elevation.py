@@ -0,0 +1,142 @@
+"""Tests for the vectorized elevation samplers."""
+
+import numpy as np
+import srtm.data
+from scipy.ndimage import gaussian_filter
+
+from rmclogo.elevation import (
+    RowBandElevation,
+    SRTMTileSource,
+    decode_hgt,
+    line_row_indices,
+    plan_grid_shape,
+    row_bands,
+    sample_corridor,
+    sample_grid,
+    sample_points,
+)
+
+
+class FakeHandler:
+    """Minimal stand-in for srtm.get_data() backed by synthetic tiles."""
+
+    def __init__(self, tiles):
+        self.files = {
+            name: srtm.data.GeoElevationFile(name, data, self)
+            for name, data in tiles.items()
+        }
+
+    def get_file(self, latitude, longitude):
+        lat = int(np.floor(latitude))
+        lon = int(np.floor(longitude))
+        name = f"N{lat:02d}E{lon:03d}.hgt"
+        return self.files.get(name)
+
+    def get_elevation(self, latitude, longitude):
+        geo_file = self.get_file(latitude, longitude)
+        if geo_file is None:
+            return None
+        return geo_file.get_elevation(latitude, longitude)
+
+
+def make_tile(side=121, seed=0):
+    rng = np.random.default_rng(seed)
+    values = rng.integers(-50, 3000, size=(side, side)).astype('>i2')
+    values[5, 5] = -32768  # SRTM void
+    return values.tobytes()
+
+
+def reference_grid(handler, lats, lons):
+    expected = np.full((len(lats), len(lons)), np.nan)
+    for i, lat in enumerate(lats):
+        for j, lon in enumerate(lons):
+            elev = handler.get_elevation(lat, lon)
+            if elev is not None:
+                expected[i, j] = elev
+    return expected
+
+
+def test_decode_hgt_is_big_endian_square():
+    tile = decode_hgt(np.array([[1, 2], [3, 258]], dtype='>i2').tobytes())
+    assert tile.shape == (2, 2)
+    assert tile[1, 1] == 258
+
+
+def test_sample_grid_matches_srtm_across_tiles():
+    handler = FakeHandler({
+        "N43E005.hgt": make_tile(seed=1),
+        "N43E006.hgt": make_tile(seed=2),
+    })
+    lats = np.linspace(43.01, 43.99, 37)
+    lons = np.linspace(5.5, 7.5, 41)  # E007 tile is missing -> NaN
+
+    result = sample_grid(SRTMTileSource(handler), lats, lons)
+
+    np.testing.assert_array_equal(result, reference_grid(handler, lats, lons))
+    assert np.isnan(result[:, lons >= 7]).all()
+
+
+def test_sample_points_matches_sample_grid():
+    handler = FakeHandler({"N43E005.hgt": make_tile(seed=3)})
+    tiles = SRTMTileSource(handler)
+    lats = np.linspace(43.1, 43.9, 11)
+    lons = np.linspace(5.1, 5.9, 13)
+
+    grid = sample_grid(tiles, lats, lons)
+    points = sample_points(tiles, lats[:, None], lons[None, :])
+
+    np.testing.assert_array_equal(points, grid)
+
+
+class SmoothTiles:
+    """Synthetic hilly terrain without voids."""
+
+    def get_tile(self, tile_lat, tile_lon):
+        yy, xx = np.mgrid[0:241, 0:241]
+        return (800 + 500 * np.sin(yy / 9.0) * np.cos(xx / 13.0)).astype(np.int16)
+
+
+def test_row_bands_merge_overlapping_halos():
+    assert row_bands(np.array([0, 3, 20]), 2, 22) == [(0, 6), (18, 22)]
+
+
+def test_row_band_rows_match_full_grid_smoothing():
+    tiles = SmoothTiles()
+    lats = np.linspace(43.1, 43.9, 200)
+    lons = np.linspace(5.1, 5.9, 150)
+    rows = line_row_indices(12, lats.size)
+
+    band = RowBandElevation(tiles, lats, lons)
+    band_rows, _, _ = band.smoothed_rows(rows, sigma=1.5)
+    full = gaussian_filter(sample_grid(tiles, lats, lons), sigma=1.5)
+
+    np.testing.assert_allclose(band_rows, full[rows])
+    assert band.samples_fetched < lats.size * lons.size
+
+
+def test_sample_corridor_is_exact_inside_the_mask():
+    tiles = SmoothTiles()
+    lats = np.linspace(43.1, 43.9, 90)
+    lons = np.linspace(5.1, 5.9, 70)
+    mask = np.zeros((lats.size, lons.size), dtype=bool)
+    mask[30:40, 10:60] = True
+
+    corridor = sample_corridor(tiles, lats, lons, mask, coarse_step=8)
+    full = sample_grid(tiles, lats, lons)
+
+    np.testing.assert_array_equal(corridor[mask], full[mask])
+    # Coarse rows and columns are exact too; the rest is interpolated
+    np.testing.assert_array_equal(corridor[::8, ::8], full[::8, ::8])
+    np.testing.assert_allclose(corridor[4, ::8], (full[0, ::8] + full[8, ::8]) / 2)
+
+
+def test_plan_grid_shape_follows_ground_aspect():
+    # 0.1° of latitude by 0.2° of longitude at the equator: twice as wide
+    rows, cols = plan_grid_shape(0.0, 0.1, 10.0, 10.2, 4000, 4000)
+    assert (rows, cols) == (2000, 4000)
+
+    # Capped by the resolution, still aspect-correct
+    assert plan_grid_shape(0.0, 0.1, 10.0, 10.2, 4000, 4000, resolution=300) == (150, 300)
+
+    # A square area never gets more samples than output pixels
+    assert plan_grid_shape(0.0, 0.1, 10.0, 10.1, 800, 1200, resolution=1000) == (800, 800)
@@ -0,0 +1,116 @@
+"""Tests for the streaming GPX reader."""
+
+import io
+import os
+
+import numpy as np
+import pytest
+
+from rmclogo.gpx import accumulate_density, clip_track, read_gpx, simplify_track
+
+
+DATA = os.path.join(os.path.dirname(__file__), "..", "data", "gpx-trace")
+
+TWO_SEGMENTS = b"""<?xml version="1.0"?>
+<gpx version="1.1" creator="test" xmlns="http://www.topografix.com/GPX/1/1">
+<trk><trkseg>
+<trkpt lat="43.1" lon="5.1"><ele>12.5</ele><time>2020-01-01T00:00:00Z</time></trkpt>
+<trkpt lat="43.2" lon="5.2"><time>2020-01-01T00:00:01.500Z</time></trkpt>
+</trkseg><trkseg></trkseg></trk>
+<trk><trkseg><trkpt lat="43.3" lon="5.3"><ele>7</ele></trkpt></trkseg></trk>
+</gpx>"""
+
+
+@pytest.mark.parametrize("name", ["sample_track.gpx", "marseille-cassis.gpx"])
+def test_fast_reader_matches_gpxpy(name):
+    path = os.path.join(DATA, name)
+    fast, slow = read_gpx(path), read_gpx(path, fast=False)
+
+    assert len(fast) > 0
+    for a, b in zip(fast, slow):
+        np.testing.assert_array_equal(a, b)
+
+
+def test_segments_and_missing_values():
+    track = read_gpx(io.BytesIO(TWO_SEGMENTS))
+
+    # The empty segment is dropped
+    assert track.offsets.tolist() == [0, 2, 3]
+    np.testing.assert_array_equal(track.segment(0), [[43.1, 5.1], [43.2, 5.2]])
+    np.testing.assert_array_equal(track.ele, [12.5, np.nan, 7])
+    np.testing.assert_array_equal(track.time, [1577836800, 1577836801.5, np.nan])
+
+
+def test_growth_and_unnamespaced_files():
+    points = "".join(f'<trkpt lat="{i * 1e-4}" lon="1"/>' for i in range(5000))
+    track = read_gpx(io.BytesIO(f"<gpx><trk><trkseg>{points}</trkseg></trk></gpx>".encode()))
+    assert len(track) == 5000
+    assert track.lat[-1] == pytest.approx(0.4999)
+
+
+def test_offset_timestamps_fall_back_to_gpxpy():
+    source = io.BytesIO(TWO_SEGMENTS.replace(b"00:00:00Z", b"01:00:00+01:00"))
+    assert read_gpx(source).time[0] == 1577836800
+
+
+def test_nested_default_namespaces_keep_matching():
+    # A default namespace declared inside <extensions> must not hide later points
+    points = "".join(
+        f'<trkpt lat="43.{i}" lon="5.{i}"><ele>{i}</ele><extensions>'
+        f'<hr xmlns="http://example.com/ext">120</hr></extensions></trkpt>'
+        for i in range(1, 4))
+    source = (f'<gpx version="1.1" xmlns="http://www.topografix.com/GPX/1/1">'
+              f'<trk><trkseg>{points}</trkseg></trk></gpx>').encode()
+
+    track = read_gpx(io.BytesIO(source))
+    np.testing.assert_array_equal(track.lat, [43.1, 43.2, 43.3])
+    np.testing.assert_array_equal(track.ele, [1, 2, 3])
+
+
+def test_clip_track_splits_at_the_boundary():
+    # Out through the right edge and back in; a second segment stays outside
+    x = np.array([-1.0, 1, 3, 5, 3, 1, 6, 7])
+    y = np.ones(8)
+    runs = clip_track(x, y, np.array([0, 6, 8]), (0, 4), (0, 2))
+
+    assert len(runs) == 2
+    np.testing.assert_array_equal(runs[0][:, 0], [0, 1, 3, 4])
+    np.testing.assert_array_equal(runs[1][:, 0], [4, 3, 1])
+
+    # A diagonal through the corner region is cut on both edges
+    run, = clip_track(np.array([-1.0, 5]), np.array([-1.0, 2]), np.array([0, 2]),
+                      (0, 4), (0, 2))
+    np.testing.assert_allclose(run, [[1, 0], [4, 1.5]])
+    assert clip_track(np.array([-1.0, 5]), np.array([3.0, 3]), np.array([0, 2]),
+                      (0, 4), (0, 2)) == []
+
+
+def test_simplify_track_keeps_loops_and_spurs():
+    # A closed loop has a zero-length chord
+    angle = np.linspace(0, 2 * np.pi, 200)
+    circle = np.column_stack([10 * np.cos(angle), 10 * np.sin(angle)])
+    loop, = simplify_track([circle], 0.25)
+    assert 10 < len(loop) < 200
+    np.testing.assert_array_equal(loop[[0, -1]], circle[[0, -1]])
+
+    # An out-and-back spur lies along its chord's line but not on the chord
+    x = np.concatenate([np.arange(0.0, 101), np.arange(99.0, 9, -1)])
+    spur, = simplify_track([np.column_stack([x, np.zeros_like(x)])], 0.25)
+    np.testing.assert_array_equal(spur[:, 0], [0, 100, 10])
+
+    # Straight runs still collapse to their end points
+    runs = simplify_track([np.column_stack([x[:101], x[:101] / 2]), circle], 0.25)
+    assert len(runs[0]) == 2 and len(runs[1]) == len(loop)
+
+
+def test_accumulate_density_counts_track_length():
+    runs = [np.array([[0.5, 0.5], [5.5, 0.5]]), np.array([[0.5, 0.5], [0.5, 3.5]])]
+    counts = accumulate_density(np.zeros((4, 6)), runs)
+
+    np.testing.assert_array_equal(counts[0], [2, 1, 1, 1, 1, 1])
+    np.testing.assert_array_equal(counts[1:, 0], [1, 1, 1])
+    assert counts.sum() == 6 + 4
+
+    # Chunking only bounds memory
+    np.testing.assert_array_equal(accumulate_density(np.zeros((4, 6)), runs, chunk_size=2),
+                                  counts)
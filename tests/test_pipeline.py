@@ -0,0 +1,105 @@
+"""Tests for the staged, memoized render pipeline."""
+
+import os
+
+import matplotlib
+matplotlib.use("Agg")
+
+import numpy as np
+import pytest
+
+from rmclogo import RenderPipeline, TopomapGenerator
+
+
+class CountingTiles:
+    """Synthetic terrain that counts tile requests."""
+
+    def __init__(self):
+        self.requests = 0
+
+    def get_tile(self, tile_lat, tile_lon):
+        self.requests += 1
+        yy, xx = np.mgrid[0:241, 0:241]
+        return (700 + 300 * np.sin(yy / 8.0) * np.cos(xx / 5.0)).astype(np.int16)
+
+
+@pytest.fixture
+def pipeline(tmp_path):
+    generator = TopomapGenerator(output_dir=str(tmp_path), cache_data=False,
+                                 tile_store=CountingTiles())
+    return RenderPipeline(generator)
+
+
+def render(pipeline, **overrides):
+    params = dict(latitude=43.5, longitude=5.5, size_km=20, resolution=50,
+                  num_lines=12)
+    if overrides.get('format') != 'svg':
+        params.update(figsize=(3, 4), dpi=40)
+    params.update(overrides)
+    return pipeline.run(**params)
+
+
+def test_style_change_only_reruns_render(pipeline):
+    render(pipeline)
+    path = render(pipeline, line_color='gold', output_filename="gold.png")
+
+    assert os.path.exists(path)
+    assert pipeline.runs == {'fetch': 1, 'process': 1, 'ridges': 1, 'render': 2, 'encode': 2}
+
+
+def test_sigma_change_reruns_processing_onwards(pipeline):
+    render(pipeline)
+    render(pipeline, sigma=3.0)
+
+    assert pipeline.runs == {'fetch': 1, 'process': 2, 'ridges': 2, 'render': 2, 'encode': 2}
+
+
+def test_identical_call_reuses_everything(pipeline):
+    render(pipeline, format='svg', output_filename="map.svg", width=300, height=400)
+    render(pipeline, format='svg', output_filename="map.svg", width=300, height=400)
+    render(pipeline, format='halftone', output_filename="dots.png", grid_spacing=5)
+
+    assert pipeline.runs == {'fetch': 2, 'process': 2, 'ridges': 1, 'render': 2, 'encode': 1}
+
+
+def test_exaggeration_change_reuses_processed_rows(pipeline):
+    render(pipeline)
+    render(pipeline, exaggeration=5.0)
+
+    assert pipeline.runs == {'fetch': 1, 'process': 1, 'ridges': 2, 'render': 2, 'encode': 2}
+
+
+def test_only_the_latest_figure_stays_open(pipeline):
+    import matplotlib.pyplot as plt
+
+    plt.close('all')
+    for color in ('gold', 'white', 'red'):
+        render(pipeline, line_color=color, output_filename=f"{color}.png")
+    assert len(plt.get_fignums()) == 1
+
+    pipeline.clear()
+    assert plt.get_fignums() == []
+
+
+def test_dpi_change_rerenders_pixel_tolerances(pipeline):
+    # Unsimplified lines do not depend on the dpi: only re-encode
+    render(pipeline, simplify=0)
+    render(pipeline, simplify=0, dpi=60)
+    assert pipeline.runs['render'] == 1 and pipeline.runs['encode'] == 2
+
+    # Simplified lines are decimated for the output pixel size
+    render(pipeline)
+    render(pipeline, dpi=60)
+    assert pipeline.runs['render'] == 3 and pipeline.runs['encode'] == 4
+
+
+def test_returning_to_a_style_rewrites_the_file(pipeline, tmp_path):
+    path = render(pipeline, line_color='white')
+    with open(path, 'rb') as f:
+        white = f.read()
+    render(pipeline, line_color='red')
+    render(pipeline, line_color='white')
+
+    with open(path, 'rb') as f:
+        assert f.read() == white
+    assert pipeline.runs['encode'] == 3
@@ -0,0 +1,391 @@
+"""Offline end-to-end tests for TopomapGenerator using synthetic terrain."""
+
+import gzip
+import io
+import os
+
+import matplotlib
+matplotlib.use("Agg")
+
+import numpy as np
+import pytest
+
+from rmclogo import TopomapGenerator
+
+
+class CoastTiles:
+    """Hills in the north-east, sea (0 m) in the south-west corner."""
+
+    def get_tile(self, tile_lat, tile_lon):
+        yy, xx = np.mgrid[0:241, 0:241]
+        hills = 600 + 400 * np.sin(yy / 11.0) * np.cos(xx / 7.0)
+        hills[(yy > 150) & (xx < 100)] = 0
+        return hills.astype(np.int16)
+
+
+@pytest.fixture
+def generator(tmp_path):
+    gen = TopomapGenerator(output_dir=str(tmp_path), cache_data=False,
+                           tile_store=CoastTiles())
+    return gen
+
+
+@pytest.mark.parametrize("row_band", [True, False])
+def test_generate_png_and_svg(generator, row_band):
+    png = generator.generate(43.5, 5.5, size_km=20, resolution=60, num_lines=15,
+                             output_filename="map.png", row_band=row_band,
+                             figsize=(3, 4), dpi=50)
+    svg = generator.generate(43.5, 5.5, size_km=20, resolution=60, num_lines=15,
+                             output_filename="map.svg", format='svg',
+                             row_band=row_band, width=300, height=400)
+
+    assert os.path.getsize(png) > 0
+    with open(svg) as f:
+        assert f.read().count("<path") == 15
+
+
+def test_generate_line_profiles_are_float64_per_line(generator):
+    elevation = np.linspace(0, 1, 30 * 20).reshape(30, 20)
+    lines = generator.generate_line_profiles(elevation, 5, exaggeration=2.0,
+                                             scaling_factors=[1, 1, 1, 1, 0.5])
+
+    assert len(lines) == 5
+    x, y = lines[4]
+    assert x.dtype == y.dtype == np.float64
+    np.testing.assert_array_equal(x, np.linspace(0, 20, 20))
+    np.testing.assert_allclose(y, elevation[23] * 2.0 * 0.5)
+    with pytest.raises(ValueError):
+        generator.generate_line_profiles(elevation, 5, scaling_factors=[1, 1])
+
+
+@pytest.mark.parametrize("fill_below", [True, False])
+def test_png_ridges_are_a_single_collection(generator, fill_below):
+    elevation = np.full((30, 40), 500.0)
+    elevation[:, :10] = 0
+
+    fig = generator.create_png(elevation, num_lines=25, fill_below=fill_below,
+                               smoothing=False, figsize=(2, 2))
+
+    ax = fig.axes[0]
+    assert len(ax.collections) == 1
+    assert not ax.patches and not ax.lines
+    assert len(ax.collections[0].get_paths()) == 25
+
+
+def test_create_svg_streams_to_bytes(generator):
+    elevation = np.full((30, 40), 500.0)
+    elevation[:, :10] = 0
+    buffer = io.BytesIO()
+
+    assert generator.create_svg(elevation, buffer, num_lines=12, smoothing=False,
+                                width=200, height=300) is buffer
+    assert buffer.getvalue().count(b"<path") == 12
+
+
+def test_simplify_drops_flat_samples(generator):
+    elevation = np.full((30, 200), 500.0)
+    elevation[:, 80:120] += np.hanning(40) * 300
+
+    sizes = {}
+    for tolerance in (0, 0.25):
+        buffer = io.BytesIO()
+        generator.create_svg(elevation, buffer, num_lines=10, smoothing=False,
+                             simplify=tolerance)
+        sizes[tolerance] = len(buffer.getvalue())
+
+    assert sizes[0.25] < sizes[0] / 2
+
+
+def test_hidden_line_removal_draws_only_visible_lines(generator):
+    # A tall wall near the bottom of the drawing hides the low lines behind it
+    yy, xx = np.mgrid[0:30, 0:60]
+    elevation = np.where(yy > 22, 1000 + 200 * np.sin(xx / 6.0), 200 + 50 * np.sin(xx / 4.0))
+
+    fig = generator.create_png(elevation, num_lines=20, figsize=(2, 2),
+                               hidden_line_removal=True)
+    assert [type(c).__name__ for c in fig.axes[0].collections] == ['LineCollection']
+
+    sizes = {}
+    for hidden in (False, True):
+        buffer = io.BytesIO()
+        generator.create_svg(elevation, buffer, num_lines=20, hidden_line_removal=hidden)
+        sizes[hidden] = len(buffer.getvalue())
+    assert sizes[True] < sizes[False]
+
+
+def test_create_svgz_is_gzipped(generator, tmp_path):
+    elevation = np.full((30, 40), 500.0)
+    plain = generator.create_svg(elevation, str(tmp_path / "map.svg"), num_lines=12,
+                                 width=200, height=300)
+    packed = generator.create_svg(elevation, str(tmp_path / "map.svgz"), num_lines=12,
+                                  width=200, height=300)
+
+    with gzip.open(packed) as f, open(plain, "rb") as g:
+        assert f.read() == g.read()
+
+
+def test_generate_halftone(generator):
+    path = generator.generate(43.5, 5.5, size_km=20, resolution=60,
+                              output_filename="dots.png", format='halftone',
+                              grid_spacing=6, figsize=(3, 4), dpi=50)
+    assert os.path.getsize(path) > 0
+
+
+def test_plan_grid(generator):
+    assert generator.plan_grid(43.0, 43.1, 5.0, 5.2, (30, 70)) == (30, 70)
+    # SVG output is only 200 px wide: a 500 resolution request is capped
+    rows, cols = generator.plan_grid(0.0, 0.1, 5.0, 5.1, 500, format='svg',
+                                     width=200, height=400)
+    assert (rows, cols) == (200, 200)
+
+    path = generator.generate(43.5, 5.5, size_km=20, resolution=(40, 25),
+                              output_filename="rect.png", figsize=(3, 4), dpi=50)
+    assert os.path.getsize(path) > 0
+
+
+def test_legacy_halftone_skips_sea_dots(generator):
+    elevation = np.full((40, 40), 500.0)
+    elevation[:, :20] = 0
+
+    fig = generator.create_halftone(elevation, grid_spacing=5, smoothing=False,
+                                    fast_render=False, figsize=(2, 2))
+
+    assert len(fig.axes[0].patches) == 8 * 4
+
+
+@pytest.mark.parametrize("hidden_line_removal", [False, True])
+def test_raster_backend_matches_matplotlib(generator, tmp_path, hidden_line_removal):
+    from PIL import Image
+
+    yy, xx = np.mgrid[0:40, 0:60]
+    elevation = 600 + 400 * np.sin(yy / 7.0) * np.cos(xx / 5.0)
+    options = dict(num_lines=20, figsize=(3, 4), dpi=100,
+                   hidden_line_removal=hidden_line_removal)
+
+    canvas = generator.create_raster(elevation, **options)
+    generator._save_figure(generator.create_png(elevation, **options),
+                           str(tmp_path / "agg.png"), 100)
+    agg = np.asarray(Image.open(tmp_path / "agg.png")).astype(int)
+
+    # Same layout; only antialiasing differs along the strokes
+    assert canvas.pixels.shape == agg.shape
+    difference = np.abs(canvas.pixels - agg).max(axis=2)
+    assert (difference > 128).mean() < 0.05
+    assert canvas.pixels.mean() == pytest.approx(agg.mean(), rel=0.1)
+
+
+def test_generate_raster_backend(generator, tmp_path):
+    from PIL import Image
+
+    gpx = tmp_path / "track.gpx"
+    gpx.write_text(
+        '<?xml version="1.0"?><gpx version="1.1" creator="test"><trk><trkseg>'
+        '<trkpt lat="43.45" lon="5.45"></trkpt><trkpt lat="43.55" lon="5.55"></trkpt>'
+        '</trkseg></trk></gpx>')
+
+    path = generator.generate(43.5, 5.5, size_km=20, resolution=60, num_lines=15,
+                              output_filename="raster.png", backend='raster',
+                              title="Test", gpx_file=str(gpx), gpx_color='red',
+                              figsize=(3, 4), dpi=50)
+    pixels = np.asarray(Image.open(path))
+    assert pixels.ndim == 3 and pixels.shape[2] == 4
+    assert np.any(np.all(pixels[..., :3] == [255, 0, 0], axis=-1))
+
+    with pytest.raises(ValueError):
+        generator.generate(43.5, 5.5, size_km=20, resolution=60,
+                           output_filename="raster.svg", format='svg', backend='raster')
+
+
+def test_raster_halftone_matches_matplotlib(generator, tmp_path):
+    from PIL import Image
+
+    yy, xx = np.mgrid[0:80, 0:80]
+    elevation = 600 + 400 * np.sin(yy / 9.0) * np.cos(xx / 13.0)
+    elevation[:20, :20] = 0
+    options = dict(grid_spacing=4, figsize=(2, 2), dpi=100)
+
+    canvas = generator.create_halftone_raster(elevation, **options)
+    generator._save_figure(generator.create_halftone(elevation, **options),
+                           str(tmp_path / "agg.png"), 100)
+    agg = np.asarray(Image.open(tmp_path / "agg.png")).astype(int)
+
+    assert canvas.pixels.shape == agg.shape
+    assert canvas.pixels.mean() == pytest.approx(agg.mean(), rel=0.02)
+
+    path = generator.generate(43.5, 5.5, size_km=20, resolution=60,
+                              output_filename="dots.png", format='halftone',
+                              backend='raster', grid_spacing=6, figsize=(3, 4), dpi=50)
+    assert Image.open(path).size[0] > 0
+
+
+def test_halftone_cell_sampling_avoids_aliasing(generator):
+    # Thin ridges every 4 samples: point sampling at a 4 sample spacing lands
+    # on every one of them, cell averages see mostly flat ground
+    elevation = np.full((40, 40), 100.0)
+    elevation[:, ::4] = 1100.0
+    normalized = (elevation - 100) / 1000
+
+    sizes = {}
+    for sampling in ('point', 'mean', 'max'):
+        _, _, sizes[sampling] = generator._halftone_dots(normalized, elevation, 4, (0, 8),
+                                                         sampling=sampling)
+    assert np.all(sizes['point'] == 8)
+    assert np.all(sizes['max'] == 8)
+    assert np.all(sizes['mean'] <= 4)
+
+    # The legacy renderer reads the same cells
+    fig = generator.create_halftone(elevation, grid_spacing=4, smoothing=False,
+                                    fast_render=False, sampling='mean', figsize=(2, 2))
+    assert len(fig.axes[0].patches) == 100
+
+
+def test_halftone_svg_reuses_dot_symbols(generator, tmp_path):
+    yy, xx = np.mgrid[0:80, 0:80]
+    elevation = 600 + 400 * np.sin(yy / 9.0) * np.cos(xx / 13.0)
+    elevation[:20, :20] = 0
+    buffer = io.BytesIO()
+
+    generator.create_halftone_svg(elevation, buffer, grid_spacing=2, smoothing=False,
+                                  figsize=(2, 2), dpi=100, levels=16)
+    svg = buffer.getvalue()
+    # One symbol per dot size, one <use> per dot above sea level
+    assert 1 < svg.count(b"<symbol") <= 16
+    assert svg.count(b"<use") == 40 * 40 - 10 * 10
+    assert b'width="220" height="220"' in svg
+
+    path = generator.generate(43.5, 5.5, size_km=20, resolution=60,
+                              output_filename="dots.svgz", format='halftone',
+                              grid_spacing=6, figsize=(3, 4), dpi=50, title="Dots & Co")
+    with gzip.open(path) as f:
+        svg = f.read()
+    assert svg.count(b"<use") > 0
+    assert b">Dots &amp; Co</text>" in svg
+
+
+def test_gpx_overlay_is_split_at_the_map_edge(generator, tmp_path):
+    gpx = tmp_path / "track.gpx"
+    gpx.write_text(
+        '<?xml version="1.0"?><gpx version="1.1" creator="test"><trk><trkseg>'
+        '<trkpt lat="43.5" lon="5.0"></trkpt><trkpt lat="43.5" lon="5.5"></trkpt>'
+        '<trkpt lat="43.5" lon="6.5"></trkpt><trkpt lat="43.6" lon="5.5"></trkpt>'
+        '</trkseg></trk></gpx>')
+    fig = generator.create_png(np.full((30, 40), 500.0), num_lines=10, figsize=(2, 2))
+
+    for simplify in (0, 0.25):
+        generator.overlay_gpx_track(fig, fig.axes[0], str(gpx), 43.0, 44.0, 5.0, 6.0,
+                                    30, 40, simplify=simplify, dpi=100)
+    full, simplified = (c.get_paths() for c in fig.axes[0].collections[-2:])
+
+    # Leaving through the east edge and coming back is two runs, not one
+    # straight line across the map
+    assert len(full) == 2
+    np.testing.assert_allclose(full[0].vertices, [[0, 15], [20, 15], [40, 15]])
+    assert full[1].vertices[0, 0] == 40
+    # The collinear point adds nothing at the output resolution
+    np.testing.assert_allclose(simplified[0].vertices, [[0, 15], [40, 15]])
+
+
+@pytest.mark.parametrize("backend", ["matplotlib", "raster"])
+def test_gpx_heatmap_overlay(generator, tmp_path, backend):
+    from PIL import Image
+
+    archive = tmp_path / "archive"
+    archive.mkdir()
+    for i, lat in enumerate((43.485, 43.485, 43.525)):
+        (archive / f"ride{i}.gpx").write_text(
+            '<?xml version="1.0"?><gpx version="1.1" creator="test"><trk><trkseg>'
+            f'<trkpt lat="{lat}" lon="5.40"></trkpt><trkpt lat="{lat}" lon="5.60"></trkpt>'
+            '</trkseg></trk></gpx>')
+    # A malformed file is skipped rather than aborting the archive
+    (archive / "broken.gpx").write_text('<gpx><trk><trkseg><trkpt lat="43.5"')
+
+    density = generator.gpx_heatmap(str(archive), 43.4, 43.6, 5.4, 5.6, (20, 20),
+                                    processes=2)
+    # Two rides share the southern row, one takes the northern one
+    assert density[8].sum() == pytest.approx(2 * density[12].sum())
+    assert density.sum() == pytest.approx(3 * 21)
+
+    path = generator.generate(43.5, 5.5, size_km=20, resolution=60, format='halftone',
+                              output_filename="heat.png", backend=backend,
+                              gpx_files=str(archive), gpx_cmap='autumn',
+                              gpx_processes=1, figsize=(3, 4), dpi=50)
+    pixels = np.asarray(Image.open(path))[..., :3].astype(int)
+    # autumn runs from red to yellow: only the heatmap draws them
+    assert np.any((pixels[..., 0] > 200) & (pixels[..., 2] < 50))
+
+
+@pytest.mark.parametrize("output_format, filename, size", [
+    ("svg", "route.svg", dict(width=300, height=400)),
+    ("halftone", "route_dots.svg", dict(figsize=(3, 4), dpi=50)),
+])
+def test_svg_gpx_overlay_is_one_path(generator, tmp_path, output_format, filename, size):
+    import xml.etree.ElementTree as ET
+
+    gpx = tmp_path / "track.gpx"
+    points = "".join(f'<trkpt lat="{43.5 + 0.02 * np.sin(t)}" lon="{5.3 + t / 20}"></trkpt>'
+                     for t in np.linspace(0, 8, 400))
+    gpx.write_text(f'<?xml version="1.0"?><gpx version="1.1" creator="test"><trk><trkseg>'
+                   f'{points}</trkseg></trk></gpx>')
+
+    path = generator.generate(43.5, 5.5, size_km=20, resolution=60, num_lines=15,
+                              output_filename=filename, format=output_format,
+                              gpx_file=str(gpx), gpx_color='#ff0000', gpx_style='--',
+                              **size)
+    ns = "{http://www.w3.org/2000/svg}"
+    tracks = [p for p in ET.parse(path).getroot().iter(f"{ns}path")
+              if p.get("stroke") == "#ff0000"]
+
+    # Clipped where it leaves the map on both sides, and decimated
+    assert len(tracks) == 1
+    d = tracks[0].get("d")
+    assert d.count("M") == 1
+    assert len(d) < 1000
+
+
+def test_svg_gpx_track_lands_on_the_drawn_row(generator, tmp_path):
+    import re
+
+    # Line 4 of 10 draws grid row 16 of 41; a track along that row's
+    # latitude must sit on the line's baseline
+    elevation = np.full((41, 30), 500.0)
+    lat = 43.0 + 16 / 40
+    gpx = tmp_path / "row.gpx"
+    gpx.write_text('<?xml version="1.0"?><gpx version="1.1" creator="test"><trk><trkseg>'
+                   f'<trkpt lat="{lat}" lon="5.1"/><trkpt lat="{lat}" lon="5.9"/>'
+                   '</trkseg></trk></gpx>')
+
+    buffer = io.BytesIO()
+    generator.create_svg(elevation, buffer, num_lines=10, height=120, smoothing=False,
+                         gpx_file=str(gpx), gpx_bounds=(43.0, 44.0, 5.0, 6.0))
+    d = re.search(rb'<path d="([^"]*)"[^>]*stroke="#000000"', buffer.getvalue()).group(1)
+    y = float(re.match(rb"M[\d.]+[ ,]([\d.]+)", d).group(1))
+    assert y == pytest.approx(5 * 120 / 12, abs=0.01)
+
+
+def test_generate_frames_gpx_track_with_corridor(generator, tmp_path, monkeypatch):
+    gpx = tmp_path / "route.gpx"
+    gpx.write_text(
+        '<?xml version="1.0"?><gpx version="1.1" creator="test"><trk><trkseg>'
+        '<trkpt lat="43.40" lon="5.40"/><trkpt lat="43.45" lon="5.50"/>'
+        '<trkpt lat="43.50" lon="5.60"/></trkseg></trk></gpx>')
+
+    lat_min, lat_max, lon_min, lon_max = generator.frame_gpx_track(str(gpx), margin_km=1.11)
+    assert lat_min == pytest.approx(43.39) and lat_max == pytest.approx(43.51)
+    assert lon_min < 5.40 - 0.01 and lon_max > 5.60 + 0.01
+
+    mask = generator.corridor_mask(str(gpx), (lat_min, lat_max, lon_min, lon_max),
+                                   (60, 80), corridor_km=1.0)
+    assert 0 < mask.mean() < 0.5
+    assert mask[30, 40] and not mask[0, -1] and not mask[-1, 0]
+
+    fetched = []
+    monkeypatch.setattr(generator, "get_elevation_corridor",
+                        lambda *args, **kw: fetched.append(args) or np.full(args[4:6], 500.0))
+    path = generator.generate(size_km=5, resolution=40, num_lines=10, format='png',
+                              output_filename="route.png", figsize=(3, 3), dpi=50,
+                              gpx_file=str(gpx), gpx_margin_km=1.11, gpx_corridor_km=1.0)
+    assert os.path.exists(path)
+    assert fetched[0][:4] == pytest.approx((lat_min, lat_max, lon_min, lon_max))
+
+    with pytest.raises(ValueError):
+        generator.generate(size_km=5)
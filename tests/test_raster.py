@@ -0,0 +1,70 @@
+"""Tests for the NumPy raster backend."""
+
+import numpy as np
+import pytest
+
+from rmclogo.raster import RasterCanvas
+
+
+def test_stroke_covers_line_width():
+    canvas = RasterCanvas(40, 20, "black")
+    ink = canvas.layer()
+    canvas.stroke(ink, [np.array([[5.0, 10.0], [35.0, 10.0]])], line_width=4)
+
+    # y is up: data row 10 is pixel row 10 counted from the bottom
+    column = ink[:, 20]
+    assert np.all(column[8:12] > 0.95)
+    assert column[:7].sum() == 0 and column[13:].sum() == 0
+    assert ink[:, :3].sum() == 0 and ink[:, 38:].sum() == 0
+
+
+def test_aliased_stroke_is_binary():
+    canvas = RasterCanvas(30, 30)
+    ink = canvas.layer()
+    canvas.stroke(ink, [np.array([[2.0, 3.0], [27.3, 25.1]])], line_width=3,
+                  antialias=False)
+    assert set(np.unique(ink)) == {0, 1}
+
+
+def test_fill_hides_lines_behind():
+    canvas = RasterCanvas(20, 20, "black")
+    ink = canvas.layer()
+    canvas.stroke(ink, [np.array([[0.0, 10.0], [20.0, 10.0]])], line_width=2)
+    # A nearer ridge at y=15 filled down to y=5 erases the line behind it
+    canvas.fill_between(ink, np.array([0.0, 10.0]), np.array([15.0, 15.0]), 5.0)
+    canvas.composite(ink, "white")
+
+    assert np.all(canvas.pixels[9:11, :10] == [0, 0, 0, 255])
+    assert np.all(canvas.pixels[9:11, 11:] == [255, 255, 255, 255])
+
+
+def test_composite_blends_alpha():
+    canvas = RasterCanvas(4, 4, "black", x_range=(0, 1), y_range=(0, 1))
+    layer = canvas.layer()
+    layer[:2] = 1.0
+    canvas.composite(layer, "white", alpha=0.5)
+
+    assert np.all(canvas.pixels[:2, :, :3] == 128)
+    assert np.all(canvas.pixels[2:, :, :3] == 0)
+
+
+def test_stamped_dots_cover_their_area():
+    canvas = RasterCanvas(200, 100, "white")
+    ink = canvas.layer()
+    radii = np.array([2.0, 6.0, 10.0, 14.0])
+    canvas.stamp_dots(ink, np.array([20.0, 60.0, 110.0, 170.0]), np.full(4, 50.0), radii,
+                      levels=4)
+
+    for center, radius in zip((20, 60, 110, 170), radii):
+        dot = ink[:, center - 20:center + 20]
+        assert dot.sum() == pytest.approx(np.pi * radius ** 2, rel=0.05)
+
+
+def test_overlapping_dots_do_not_add_up():
+    canvas = RasterCanvas(40, 40)
+    ink = canvas.layer()
+    canvas.stamp_dots(ink, np.array([20.0, 20.0, 23.0]), np.array([20.0, 20.0, 20.0]),
+                      np.array([6.0, 6.0, 6.0]))
+    assert ink.max() == 1.0
+    canvas.clip(ink, (0, 20), (0, 40))
+    assert ink[:, 20:].sum() == 0
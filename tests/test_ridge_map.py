@@ -0,0 +1,75 @@
+"""Offline tests for RidgeMap using synthetic terrain."""
+
+import matplotlib
+matplotlib.use("Agg")
+
+import matplotlib.font_manager as fm
+import numpy as np
+import pytest
+
+from rmclogo import RidgeMap
+
+
+class HillTiles:
+    """Smooth synthetic terrain covering every tile."""
+
+    def get_tile(self, tile_lat, tile_lon):
+        yy, xx = np.mgrid[0:361, 0:361]
+        return (500 + 300 * np.sin(yy / 17.0) + 200 * np.cos(xx / 23.0)).astype(np.int16)
+
+
+@pytest.fixture
+def ridge_map():
+    return RidgeMap(bbox=(5.1, 43.1, 5.6, 43.4), font=fm.FontProperties(),
+                    tile_store=HillTiles())
+
+
+def test_sample_rotated_without_angle_matches_legacy(ridge_map):
+    legacy = ridge_map.get_elevation_data(num_lines=30, elevation_pts=50)
+    direct = ridge_map.get_elevation_data(num_lines=30, elevation_pts=50,
+                                          sample_rotated=True)
+    np.testing.assert_array_equal(direct, legacy)
+
+
+@pytest.mark.parametrize("crop", [False, True])
+def test_sample_rotated_matches_rotated_image(ridge_map, crop):
+    legacy = ridge_map.get_elevation_data(num_lines=40, elevation_pts=60,
+                                          viewpoint_angle=30, crop=crop)
+    direct = ridge_map.get_elevation_data(num_lines=40, elevation_pts=60,
+                                          viewpoint_angle=30, crop=crop,
+                                          sample_rotated=True)
+
+    assert direct.shape == legacy.shape
+    # Corners outside the bounding box are left empty instead of zero-padded
+    assert np.isnan(direct[0, 0])
+    inside = ~np.isnan(direct) & (legacy != 0)
+    assert np.mean(np.abs(direct[inside] - legacy[inside]) < 30) > 0.9
+
+
+def test_save_svg_streams_one_path_per_line(ridge_map, tmp_path):
+    values = ridge_map.preprocess(
+        values=ridge_map.get_elevation_data(num_lines=20, elevation_pts=40))
+    values[3, :] = np.nan
+
+    path = ridge_map.save_svg(str(tmp_path / "ridges.svg"), values=values, label="A\nB")
+
+    with open(path) as f:
+        svg = f.read()
+    assert svg.count("<path") == 19
+    assert svg.count("<text") == 2
+
+
+def test_plot_map_simplifies_to_the_save_dpi(ridge_map):
+    import matplotlib.pyplot as plt
+
+    values = ridge_map.preprocess(
+        values=ridge_map.get_elevation_data(num_lines=10, elevation_pts=400))
+    counts = []
+    for dpi in (None, 600):
+        fig, ax = plt.subplots(figsize=(4, 3), dpi=50)
+        ridge_map.plot_map(values=values, label="", ax=ax, dpi=dpi)
+        counts.append(sum(len(line.get_xdata()) for line in ax.lines))
+        plt.close(fig)
+
+    # Twelve times the pixels keep more of every line
+    assert counts[0] < counts[1] <= values.size
@@ -0,0 +1,194 @@
+"""Tests for the shared ridge line geometry helpers."""
+
+import warnings
+
+import numpy as np
+from matplotlib.path import Path
+
+from rmclogo.ridges import (
+    RidgeSet,
+    fill_polygons,
+    horizon_clip,
+    line_segments,
+    find_runs,
+    full_runs,
+    simplify_lines,
+    simplify_runs,
+)
+
+
+def loop_runs(row, threshold=0.0, min_length=2):
+    """Reference implementation: the original per-point loop."""
+    runs, start = [], None
+    for j, value in enumerate(row):
+        if value > threshold:
+            start = j if start is None else start
+        else:
+            if start is not None and j - start >= min_length:
+                runs.append((start, j))
+            start = None
+    if start is not None and len(row) - start >= min_length:
+        runs.append((start, len(row)))
+    return runs
+
+
+def test_find_runs_matches_loop_on_every_line():
+    rng = np.random.default_rng(0)
+    values = rng.normal(size=(40, 75))
+
+    runs = find_runs(values)
+
+    for i, row in enumerate(values):
+        assert list(runs.segments(i)) == loop_runs(row)
+    assert runs.offsets[-1] == len(runs.start)
+
+
+def test_find_runs_edges_and_min_length():
+    values = np.array([[1, 1, 0, 1, 0, 1, 1, 1],
+                       [0, 0, 0, 0, 0, 0, 0, 0]], dtype=float)
+
+    assert list(find_runs(values).segments(0)) == [(0, 2), (5, 8)]
+    assert list(find_runs(values, min_length=1).segments(0)) == [(0, 2), (3, 4), (5, 8)]
+    assert list(find_runs(values).segments(1)) == []
+
+
+def test_fill_polygons_close_each_run_on_its_baseline():
+    x = np.arange(5.0)
+    y = np.array([[1, 1, 0, 1, 1],
+                  [2, 2, 2, 2, 2]], dtype=float)
+    runs = find_runs(y)
+
+    vertices, codes, offsets = fill_polygons(x, y, np.array([10.0, 20.0]), runs)
+
+    np.testing.assert_array_equal(offsets, [0, 10, 18])
+    np.testing.assert_array_equal(vertices[:5], [[0, 10], [0, 1], [1, 1], [1, 10], [0, 10]])
+    assert list(codes[:5]) == [Path.MOVETO, Path.LINETO, Path.LINETO, Path.LINETO, Path.CLOSEPOLY]
+    np.testing.assert_array_equal(vertices[10:18, 1], [20, 2, 2, 2, 2, 2, 20, 20])
+
+
+def test_full_runs_cover_every_line():
+    runs = full_runs(3, 7)
+    assert [list(runs.segments(i)) for i in range(3)] == [[(0, 7)]] * 3
+
+
+def test_ridge_set_is_contiguous_and_shares_x():
+    profiles = np.linspace(0, 1, 12).reshape(3, 4)
+    raw = np.array([[5, 5, 0, 5], [1, 1, 1, 1], [0, 0, 0, 0]], dtype=float)
+
+    ridges = RidgeSet.from_profiles(profiles, raw, (30, 4), exaggeration=2.0,
+                                    scaling_factors=[1.0, 0.5, 1.0])
+
+    assert ridges.heights.dtype == np.float32 and ridges.heights.flags.c_contiguous
+    np.testing.assert_allclose(ridges.heights[1], profiles[1])
+    assert [list(ridges.runs.segments(i)) for i in range(3)] == [[(0, 2)], [(0, 4)], []]
+    assert all(x is ridges.x for x, _ in ridges.lines())
+    np.testing.assert_allclose(ridges.place([10, 20, 30], 2.0)[0], 10 - 4 * profiles[0])
+
+
+def reference_rdp(x, y, tolerance):
+    """Textbook recursive Ramer-Douglas-Peucker, returning kept indices."""
+    def recurse(lo, hi):
+        if hi - lo < 2:
+            return []
+        dx, dy = x[hi] - x[lo], y[hi] - y[lo]
+        dist = [abs(dx * (y[k] - y[lo]) - dy * (x[k] - x[lo])) / np.hypot(dx, dy)
+                for k in range(lo + 1, hi)]
+        k = lo + 1 + int(np.argmax(dist))
+        if dist[k - lo - 1] <= tolerance:
+            return []
+        return recurse(lo, k) + [k] + recurse(k, hi)
+    return [0] + recurse(0, len(x) - 1) + [len(x) - 1]
+
+
+def test_simplify_runs_matches_recursive_rdp():
+    rng = np.random.default_rng(1)
+    x = np.arange(300.0)
+    y = np.cumsum(rng.normal(size=(6, 300)), axis=1)
+    y[2, 100:250] = 0  # flat stretch collapses to its ends
+    runs = find_runs(np.abs(y) + 1)  # one run per line
+
+    keep = simplify_runs(x, y, runs, tolerance=1.5)
+
+    for i in range(6):
+        assert list(np.flatnonzero(keep[i])) == reference_rdp(x, y[i], 1.5)
+
+
+def test_simplify_lines_keeps_gaps():
+    y = np.array([[0.0, 0.0, 0.0, np.nan, 0.0, 1.0, 2.0, 3.0]])
+    keep = simplify_lines(np.arange(8.0), y, tolerance=0.1)
+    assert keep.tolist() == [[True, False, True, True, True, False, False, True]]
+
+
+def test_fill_polygons_only_use_kept_samples():
+    x = np.arange(6.0)
+    y = np.ones((1, 6))
+    keep = np.array([[True, False, False, True, False, True]])
+
+    vertices, codes, offsets = fill_polygons(x, y, np.array([5.0]), full_runs(1, 6), keep)
+
+    np.testing.assert_array_equal(vertices[:, 0], [0, 0, 3, 5, 5, 0])
+    assert list(offsets) == [0, 6]
+
+
+def test_horizon_clip_cuts_back_line_at_the_crossings():
+    x = np.arange(5.0)
+    y = np.array([[8, 8, 3, 8, 8],     # back line with one peak
+                  [5, 5, 5, 5, 5]],    # flat line in front
+                 dtype=float)
+
+    visible = horizon_clip(x, y, full_runs(2, 5), front_to_back=[1, 0])
+    segments = line_segments(x, y, visible.runs, endpoints=(visible.first, visible.last))
+
+    assert list(visible.runs.line) == [0, 1]
+    np.testing.assert_allclose(segments[0], [[1.6, 5], [2, 3], [2.4, 5]])
+    np.testing.assert_allclose(segments[1], np.column_stack([x, y[1]]))
+
+
+def test_horizon_clip_fill_edges_bound_the_occluder():
+    x = np.arange(3.0)
+    y = np.array([[0, 0, 0],
+                  [0.5, 2, 0.5]])
+
+    visible = horizon_clip(x, y, full_runs(2, 3), front_to_back=[0, 1],
+                           fill_edges=np.array([1.0, 2.0]))
+
+    # Line 1 only shows where it leaves line 0's fill (0 <= y <= 1)
+    (start, stop), = visible.runs.segments(1)
+    assert (start, stop) == (0, 3)
+    np.testing.assert_allclose(visible.first[1], [1 / 3, 1])
+    np.testing.assert_allclose(visible.last[1], [5 / 3, 1])
+
+
+def test_horizon_clip_shows_lines_between_separate_fills():
+    x = np.arange(5.0)
+    y = np.array([[0, 0, 0, 0, 0],      # fills 0 <= y <= 1
+                  [3, 3, 3, 3, 3],      # fills 3 <= y <= 4
+                  [2, 2, 3.5, 2, 2]],   # in the gap, dipping into the second fill
+                 dtype=float)
+
+    visible = horizon_clip(x, y, full_runs(3, 5), front_to_back=[0, 1, 2],
+                           fill_edges=np.array([1.0, 4.0, 5.0]))
+    segments = line_segments(x, y, visible.runs, endpoints=(visible.first, visible.last))
+
+    assert list(visible.runs.line) == [0, 1, 2, 2]
+    np.testing.assert_allclose(segments[2], [[0, 2], [1, 2], [1 + 2 / 3, 3]])
+    np.testing.assert_allclose(segments[3], [[3 - 2 / 3, 3], [3, 2], [4, 2]])
+
+
+def test_horizon_clip_shares_sea_gaps_without_warnings():
+    x = np.arange(6.0)
+    y = np.array([[5, 5, 5, 5, 5, 5],
+                  [3, 3, 3, 3, 3, 3],
+                  [1, 1, 1, 1, 1, 1]], dtype=float)
+    # Every line is at sea over columns 2-3
+    raw = np.where((np.arange(6) >= 2) & (np.arange(6) < 4), 0.0, 100.0)
+    runs = find_runs(np.tile(raw, (3, 1)))
+
+    with warnings.catch_warnings():
+        warnings.simplefilter("error")
+        visible = horizon_clip(x, y, runs, front_to_back=[0, 1, 2])
+
+    # Nothing hides the raised back lines; the gap stays undrawn
+    assert list(visible.runs.line) == [0, 0, 1, 1, 2, 2]
+    assert list(visible.runs.start) == [0, 4] * 3
+    assert list(visible.runs.stop) == [2, 6] * 3
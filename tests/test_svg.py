@@ -0,0 +1,115 @@
+"""Tests for the streaming SVG writer."""
+
+import gzip
+import io
+import re
+import xml.etree.ElementTree as ET
+
+import numpy as np
+
+from rmclogo.svg import SVGWriter, format_numbers
+
+SVG_NS = "{http://www.w3.org/2000/svg}"
+
+
+def test_writer_streams_valid_svg_to_bytes():
+    points = np.column_stack([np.arange(10000.0), np.sin(np.arange(10000.0))])
+    buffer = io.BytesIO()
+
+    with SVGWriter(buffer, 300, 200, chunk_size=128) as svg:
+        svg.rect(0, 0, 300, 200, fill="#2B1B4D")
+        svg.polyline(points, stroke="white", stroke_width=1.5, fill="none")
+        svg.text("Mont <Blanc> & co", 150, 100, font_size=12)
+
+    root = ET.fromstring(buffer.getvalue())
+    assert root.get("width") == "300"
+    polyline = root.find(f"{SVG_NS}polyline")
+    assert polyline.get("stroke-width") == "1.5"
+    parsed = np.array([p.split(",") for p in polyline.get("points").split(" ")], dtype=float)
+    np.testing.assert_allclose(parsed, points, atol=5e-4)
+    assert root.find(f"{SVG_NS}rect").get("fill") == "#2B1B4D"
+    assert root.find(f"{SVG_NS}text").text == "Mont <Blanc> & co"
+
+
+def test_writer_accepts_text_streams():
+    buffer = io.StringIO()
+    with SVGWriter(buffer, 10, 10) as svg:
+        svg.polygon(np.array([[0, 0], [1, 0], [1, 1]]), fill="red")
+
+    polygon = ET.fromstring(buffer.getvalue()).find(f"{SVG_NS}polygon")
+    assert polygon.get("points") == "0,0 1,0 1,1"
+
+
+def parse_path(d):
+    """Absolute vertices of a path made of M and relative h/v/l commands."""
+    tokens = re.findall(r"[MhvlZz]|-?(?:\d+\.?\d*|\.\d+)", d)
+    points, command, i = [], None, 0
+    while i < len(tokens):
+        if tokens[i].isalpha():
+            command = tokens[i]
+            i += 1
+            if command in "zZ":
+                continue
+        if command == "M":
+            points.append([float(tokens[i]), float(tokens[i + 1])])
+            i += 2
+        elif command == "l":
+            x, y = points[-1]
+            points.append([x + float(tokens[i]), y + float(tokens[i + 1])])
+            i += 2
+        elif command == "h":
+            points.append([points[-1][0] + float(tokens[i]), points[-1][1]])
+            i += 1
+        elif command == "v":
+            points.append([points[-1][0], points[-1][1] + float(tokens[i])])
+            i += 1
+    return np.array(points)
+
+
+def test_format_numbers_is_compact():
+    values = np.array([0.5, -0.5, 100, 1.25, -0.0001, 3.10, 2.0])
+    assert format_numbers(values, 2) == [".5", "-.5", "100", "1.25", "0", "3.1", "2"]
+
+
+def test_relative_path_does_not_drift():
+    rng = np.random.default_rng(0)
+    points = np.cumsum(rng.normal(size=(5000, 2)), axis=0)
+    points[100:200, 1] = points[99, 1]   # horizontal stretch -> h commands
+    buffer = io.StringIO()
+
+    with SVGWriter(buffer, 100, 100, precision=2, chunk_size=256) as svg:
+        svg.path([points], fill="none")
+
+    d = ET.fromstring(buffer.getvalue()).find(f"{SVG_NS}path").get("d")
+    assert "h" in d
+    # Vertices that quantize onto their predecessor are dropped
+    quantized = np.round(points * 100) / 100
+    distinct = np.concatenate([[True], np.any(np.diff(quantized, axis=0) != 0, axis=1)])
+    np.testing.assert_allclose(parse_path(d), quantized[distinct], atol=1e-9)
+
+
+def test_svgz_output(tmp_path):
+    path = str(tmp_path / "map.svgz")
+    with SVGWriter(path, 10, 10) as svg:
+        svg.rect(0, 0, 10, 10, fill="red")
+
+    with gzip.open(path) as f:
+        assert ET.fromstring(f.read()).find(f"{SVG_NS}rect") is not None
+
+
+def test_symbol_uses_stream_in_chunks():
+    points = np.column_stack([np.arange(1000) * 0.5, np.arange(1000) * 0.25])
+    buffer = io.BytesIO()
+
+    with SVGWriter(buffer, 100, 100, precision=2, chunk_size=64) as svg:
+        with svg.defs():
+            with svg.symbol("dot"):
+                svg.circle(0, 0, 1.5)
+        svg.uses("dot", points)
+
+    root = ET.fromstring(buffer.getvalue())
+    assert root.find(f"{SVG_NS}defs/{SVG_NS}symbol/{SVG_NS}circle").get("r") == "1.5"
+    uses = root.findall(f"{SVG_NS}use")
+    assert len(uses) == 1000
+    assert uses[-1].get("{http://www.w3.org/1999/xlink}href") == "#dot"
+    assert (uses[-1].get("x"), uses[-1].get("y")) == ("499.5", "249.75")
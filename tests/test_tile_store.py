@@ -0,0 +1,69 @@
+"""Tests for the memory-mapped SRTM tile store."""
+
+import os
+
+import numpy as np
+
+from rmclogo.elevation import decode_hgt, sample_grid
+from rmclogo.tile_store import MemmapTileStore
+
+
+class FakeHandler:
+    """Serves synthetic .hgt bytes the way srtm.get_data() does."""
+
+    def __init__(self, tiles):
+        self.tiles = tiles
+        self.retrievals = 0
+
+    def get_file_name(self, latitude, longitude):
+        name = f"N{int(np.floor(latitude)):02d}E{int(np.floor(longitude)):03d}.hgt"
+        return name if name in self.tiles else None
+
+    def retrieve_or_load_file_data(self, file_name):
+        self.retrievals += 1
+        return self.tiles[file_name]
+
+
+def make_tile(side=61, seed=0):
+    rng = np.random.default_rng(seed)
+    return rng.integers(0, 2000, size=(side, side)).astype('>i2').tobytes()
+
+
+def test_tiles_are_decompressed_once_and_memory_mapped(tmp_path):
+    handler = FakeHandler({"N43E005.hgt": make_tile()})
+    store = MemmapTileStore(handler, cache_dir=str(tmp_path))
+
+    tile = store.get_tile(43, 5)
+
+    assert isinstance(tile, np.memmap)
+    assert tile.dtype == np.int16
+    np.testing.assert_array_equal(tile, decode_hgt(handler.tiles["N43E005.hgt"]))
+    assert os.path.exists(tmp_path / "tiles" / "N43E005.i16")
+
+    # A second store (e.g. another worker) reuses the raw file
+    other = MemmapTileStore(handler, cache_dir=str(tmp_path))
+    np.testing.assert_array_equal(other.get_tile(43, 5), tile)
+    assert handler.retrievals == 1
+
+
+def test_missing_tiles_and_lru_eviction(tmp_path):
+    handler = FakeHandler({
+        "N43E005.hgt": make_tile(seed=1),
+        "N43E006.hgt": make_tile(seed=2),
+    })
+    store = MemmapTileStore(handler, cache_dir=str(tmp_path), max_open_tiles=1)
+
+    assert store.get_tile(10, 10) is None
+    store.get_tile(43, 5)
+    store.get_tile(43, 6)
+    assert list(store._open_tiles) == ["N43E006.hgt"]
+
+
+def test_store_plugs_into_sampler(tmp_path):
+    handler = FakeHandler({"N43E005.hgt": make_tile(seed=3)})
+    store = MemmapTileStore(handler, cache_dir=str(tmp_path))
+
+    result = sample_grid(store, np.linspace(43.1, 43.9, 5), np.linspace(5.1, 5.9, 7))
+
+    assert result.shape == (5, 7)
+    assert not np.isnan(result).any()